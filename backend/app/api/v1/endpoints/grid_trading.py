@@ -13,6 +13,7 @@ from app.services.grid_trading_service import GridTradingService, GridType, Grid
 from app.services.exchange_service import ExchangeService
 from app.tasks.grid_trading_tasks import (
     process_active_grids,
+    process_grid_symbol,
     initialize_new_grids,
     grid_rebalancing,
     grid_performance_monitor,
@@ -147,6 +148,7 @@ async def initialize_grid_trading(
         
         if result.get("success"):
             logger.info(f"✅ Grid initialized for bot {request.bot_id} on {request.symbol}")
+            process_grid_symbol.delay(bot.id, request.symbol)
             return result
         else:
             logger.error(f"❌ Failed to initialize grid for bot {request.bot_id}: {result.get('error')}")
@@ -75,6 +75,40 @@ class Cache:
         except Exception as e:
             logger.error(f"Error setting value in Redis cache for key '{key}': {e}", exc_info=True)
 
+    def set_if_absent(self, key: str, value: Any, ttl_seconds: int = 60) -> bool:
+        """Set key only if it does not exist. Returns True when the caller now owns the key,
+        and also when Redis is unavailable so guarded work is never silently dropped."""
+        if not self.redis:
+            return True
+        try:
+            return bool(self.redis.set(key, json.dumps(value), nx=True, ex=ttl_seconds))
+        except Exception as e:
+            logger.error(f"Error setting value in Redis cache for key '{key}': {e}", exc_info=True)
+            return True
+
+    def get_hash_field(self, key: str, field: str) -> Optional[Any]:
+        if not self.redis:
+            return None
+        try:
+            cached_value = self.redis.hget(key, field)
+            if cached_value:
+                return json.loads(cached_value)
+        except Exception as e:
+            logger.error(f"Error getting field '{field}' of Redis hash '{key}': {e}", exc_info=True)
+        return None
+
+    def set_hash_field(self, key: str, field: str, value: Any, ttl_seconds: int = 60) -> None:
+        """Set one field of a hash and refresh the TTL of the whole hash"""
+        if not self.redis:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.hset(key, field, json.dumps(value))
+            pipe.expire(key, ttl_seconds)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Error setting field '{field}' of Redis hash '{key}': {e}", exc_info=True)
+
     def delete(self, key: str):
         if not self.redis:
             return
@@ -88,4 +122,45 @@ cache_client = Cache(settings.REDIS_URL)
 
 def get_cache_key_for_user_portfolio(user_id: int) -> str:
     """Generates a consistent cache key for a user's portfolio."""
-    return f"portfolio:{user_id}" 
\ No newline at end of file
+    return f"portfolio:{user_id}" 
+
+def get_cache_key_for_cassava_stop_loss(bot_id: int, symbol: str) -> str:
+    """Generates the cache key holding the last D-1 candle date used for a Cassava stop loss update."""
+    return f"cassava:sl:{bot_id}:{symbol}"
+
+def get_cache_key_for_active_grid_bots() -> str:
+    """Generates the cache key holding the list of active grid trading bots."""
+    return "grid:active_bots"
+
+def get_cache_key_for_emergency_scan_queued() -> str:
+    """Generates the cache key marking that an emergency position scan has been dispatched."""
+    return "emergency_scan:queued"
+
+def get_cache_key_for_emergency_scan_running() -> str:
+    """Generates the cache key held while an emergency position scan is running."""
+    return "emergency_scan:running"
+
+def get_cache_key_for_real_time_trade_metrics(user_id: Optional[int]) -> str:
+    """Generates the cache key for a user's real-time trade metrics ("all" for system-wide)."""
+    return f"rtm:{user_id if user_id is not None else 'all'}"
+
+def get_cache_key_for_db_health() -> str:
+    """Generates the cache key holding the latest database connectivity probe result."""
+    return "health:db"
+
+
+def get_cache_key_for_bot_stoploss_levels(bot_id: int) -> str:
+    """Generates the key of the hash of a trading bot's stop loss level per symbol."""
+    return f"bot:{bot_id}:stoploss"
+
+def get_cache_key_for_bot_last_bar(bot_id: int) -> str:
+    """Generates the key of the hash of the last bar a trading bot checked per symbol."""
+    return f"bot:{bot_id}:last_bar"
+
+def get_cache_key_for_bot_crossover_state(bot_id: int) -> str:
+    """Generates the key of the hash of a trading bot's pending strategy crossover per symbol."""
+    return f"bot:{bot_id}:crossover"
+
+def get_cache_key_for_bot_tick_lock(bot_id: int) -> str:
+    """Generates the key held while a trading bot's tick is running."""
+    return f"bot:{bot_id}:tick"
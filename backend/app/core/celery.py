@@ -1,7 +1,29 @@
+from decimal import Decimal
+
+import orjson
 from celery import Celery
+from celery.signals import worker_init
+from kombu.serialization import register
 from app.core.config import settings
 from celery.schedules import crontab
 
+
+def _orjson_default(obj):
+    # Mirror what Celery's json serializer accepts beyond orjson's native types
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _orjson_dumps(obj) -> bytes:
+    return orjson.dumps(obj, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+# Task payloads and results (large nested dicts) go through orjson; plain json is still accepted
+register('orjson', _orjson_dumps, orjson.loads, content_type='application/x-orjson', content_encoding='utf-8')
+
 celery_app = Celery(
     "trading_bot",
     broker=settings.CELERY_BROKER_URL,
@@ -16,6 +38,7 @@ celery_app = Celery(
         "app.tasks.automated_cassava_tasks",
         "app.tasks.grid_trading_tasks",
         "app.tasks.trade_analytics_tasks",
+        "app.tasks.activity_tasks",
         "app.tasks.example_tasks"
     ],
     beat_scheduler='redbeat.RedBeatScheduler'
@@ -24,9 +47,10 @@ celery_app = Celery(
 celery_app.conf.update(
     timezone="UTC",
     enable_utc=True,
-    task_serializer="json",
-    accept_content=["json"],
-    result_serializer="json",
+    task_serializer="orjson",
+    accept_content=["orjson", "json"],
+    result_accept_content=["orjson", "json"],
+    result_serializer="orjson",
     task_track_started=True,
     broker_connection_retry_on_startup=True,
     broker_connection_retry=True,
@@ -34,6 +58,7 @@ celery_app.conf.update(
     result_expires=3600,
     worker_prefetch_multiplier=1,
     task_acks_late=True,
+    task_reject_on_worker_lost=True,
     worker_disable_rate_limits=True,
     broker_transport_options={
         'visibility_timeout': 3600,
@@ -48,12 +73,24 @@ celery_app.conf.update(
     task_routes={
         "tasks.update_all_position_prices": {"queue": "position_updates"},
         "tasks.update_user_position_prices": {"queue": "position_updates"},
-        "tasks.calculate_daily_pnl_records": {"queue": "pnl_calculations"},
+        "tasks.update_position_price_chunk": {"queue": "position_updates"},
+        "tasks.aggregate_position_results": {"queue": "analytics_io"},
+        # Sync DB-bound analytics run on the gevent worker consuming analytics_io
+        "trade_analytics.update_real_time_metrics": {"queue": "analytics_io"},
+        "trade_analytics.generate_daily_reports": {"queue": "analytics_io"},
+        "trade_analytics.activity_monitor": {"queue": "analytics_io"},
+        "trade_analytics.system_health_check": {"queue": "analytics_io"},
+        "trade_analytics.cleanup_old_metrics": {"queue": "analytics_io"},
+        "tasks.calculate_daily_pnl_records": {"queue": "analytics_io"},
+        "tasks.cleanup_old_performance_records": {"queue": "analytics_io"},
         "tasks.run_trading_bot_strategy": {"queue": "trading"},
+        "tasks.tick_trading_bot": {"queue": "trading"},
+        # tasks.execute_trade_on_exchange stays on the default queue, which the general
+        # worker consumes; Cassava bots on the cassava_bots worker queue it too
         "tasks.process_cassava_bot_signals_and_trades": {"queue": "cassava_bots"},
         "tasks.update_cassava_trend_data": {"queue": "data_updates"},
         "tasks.update_manual_stop_losses": {"queue": "stop_loss_management"},
-        "tasks.update_cassava_bot_stop_losses": {"queue": "stop_loss_management"},
+        "tasks.update_cassava_bot_stop_losses": {"queue": "cassava_bots"},
         "tasks.update_advanced_stop_losses": {"queue": "advanced_stop_loss"},
         "tasks.analyze_stop_loss_performance": {"queue": "analytics"},
         "tasks.optimize_stop_loss_parameters": {"queue": "optimization"},
@@ -66,6 +103,8 @@ celery_app.conf.update(
         "tasks.cassava_system_report": {"queue": "reporting"},
         "tasks.process_active_grids": {"queue": "grid_trading"},
         "tasks.initialize_new_grids": {"queue": "grid_trading"},
+        "grid_trading.process_grid_symbol": {"queue": "grid_batches"},
+        "activity.log_activities_batch": {"queue": "activity_batches"},
         "tasks.grid_rebalancing": {"queue": "grid_rebalancing"},
         "tasks.grid_performance_monitor": {"queue": "monitoring"},
         "tasks.emergency_grid_stop": {"queue": "emergency"},
@@ -166,30 +205,33 @@ celery_app.conf.update(
             'schedule': crontab(hour=6, minute=0),
         },
         # Grid Trading Tasks
-        # Process active grids every 1 minute
+        # Offsets are staggered so the 5/15/60-minute jobs never share a minute
+        # with each other or with the :00 jobs above (the per-minute scan aside)
+        # Process active grids every 1 minute; the batched grid_trading.process_grid_symbol
+        # task only adds an immediate pass for grids created through the API
         'process-active-grids': {
             'task': 'tasks.process_active_grids',
             'schedule': crontab(minute='*/1'),
         },
-        # Initialize new grids every 5 minutes
+        # Initialize new grids every 5 minutes, starting at :02
         'initialize-new-grids': {
             'task': 'tasks.initialize_new_grids',
-            'schedule': crontab(minute='*/5'),
+            'schedule': crontab(minute='2-59/5'),
         },
-        # Grid rebalancing every 15 minutes
+        # Grid rebalancing every 15 minutes, starting at :07
         'grid-rebalancing': {
             'task': 'tasks.grid_rebalancing',
-            'schedule': crontab(minute='*/15'),
+            'schedule': crontab(minute='7-59/15'),
         },
-        # Grid performance monitoring every hour
+        # Grid performance monitoring every hour at minute 3
         'grid-performance-monitor': {
             'task': 'tasks.grid_performance_monitor',
-            'schedule': crontab(minute=0),
+            'schedule': crontab(minute=3),
         },
-        # Grid cleanup daily at 04:00 UTC
+        # Grid cleanup daily at 04:17 UTC
         'cleanup-completed-grids': {
             'task': 'tasks.cleanup_completed_grids',
-            'schedule': crontab(hour=4, minute=0),
+            'schedule': crontab(hour=4, minute=17),
         },
         
         # Trade Analytics Tasks
@@ -220,10 +262,23 @@ celery_app.conf.update(
         },
         
         # COMPREHENSIVE POSITION SAFETY SYSTEM
-        # Position safety monitor every 15 minutes (15-minute retry + 4-hour force closure)
+        # Position safety monitor every 15 minutes starting at :08 (15-minute retry + 4-hour force closure)
         'position-safety-monitor': {
             'task': 'tasks.position_safety_monitor',
-            'schedule': crontab(minute='*/15'),
+            'schedule': crontab(minute='8-59/15'),
         },
     }
-) 
\ No newline at end of file
+)
+
+
+@worker_init.connect
+def _make_psycopg_cooperative(**kwargs) -> None:
+    # Celery monkey-patches the stdlib for -P gevent; psycopg2 is a C extension and
+    # needs its own wait callback or every query would block the whole worker
+    try:
+        from gevent import monkey
+    except ImportError:
+        return
+    if monkey.is_module_patched("socket"):
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
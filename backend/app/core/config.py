@@ -51,6 +51,7 @@ class Settings(BaseSettings):
     
     DATABASE_POOL_SIZE: int = 20
     DATABASE_MAX_OVERFLOW: int = 30
+    DATABASE_POOL_RECYCLE: int = 1800
     
     # Redis settings
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://redis:6379/0")
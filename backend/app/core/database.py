@@ -1,8 +1,11 @@
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.orm import sessionmaker, scoped_session, Session
+from contextlib import contextmanager
 from typing import Generator
 import logging
 import os
+import threading
 
 from app.core.config import settings
 from app.core.logging import get_logger
@@ -13,6 +16,10 @@ logger = get_logger(__name__)
 # Global variables for engine and session
 engine = None
 SessionLocal = None
+ScopedSession = None
+
+# Tracks nested session_scope() usage per thread
+_scope_state = threading.local()
 
 def get_engine():
     """Get or create the database engine with the correct URL"""
@@ -26,6 +33,10 @@ def get_engine():
         # Create a synchronous engine
         engine = create_engine(
             database_url,
+            poolclass=QueuePool,
+            pool_size=settings.DATABASE_POOL_SIZE,
+            max_overflow=settings.DATABASE_MAX_OVERFLOW,
+            pool_recycle=settings.DATABASE_POOL_RECYCLE,
             pool_pre_ping=True,
             echo=settings.DB_ECHO,
         )
@@ -48,6 +59,30 @@ def get_session_maker():
         )
     return SessionLocal
 
+def get_scoped_session():
+    """Get or create the thread-local scoped session registry"""
+    global ScopedSession
+    if ScopedSession is None:
+        ScopedSession = scoped_session(get_session_maker())
+    return ScopedSession
+
+@contextmanager
+def session_scope() -> Generator[Session, None, None]:
+    """
+    Provides the current thread's database session.
+    Nested scopes (e.g. a task calling a helper that also opens a scope) share
+    one session; only the outermost scope closes it.
+    """
+    registry = get_scoped_session()
+    depth = getattr(_scope_state, "depth", 0)
+    _scope_state.depth = depth + 1
+    try:
+        yield registry()
+    finally:
+        _scope_state.depth = depth
+        if depth == 0:
+            registry.remove()
+
 def get_db() -> Generator[Session, None, None]:
     """Provides a synchronous database session to a decorated function."""
     session_maker = get_session_maker()
@@ -0,0 +1,80 @@
+"""
+Persistent asyncio event loop for Celery worker processes
+
+Tasks that drive async services submit their coroutines here instead of
+creating a fresh loop per invocation, so connector pools and other
+loop-bound resources survive between task runs.
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+from typing import Any, Coroutine, Optional
+
+from celery.signals import worker_process_init, worker_process_shutdown
+
+from app.core.logging import get_logger
+
+try:
+    import uvloop
+except ImportError:  # uvloop has no Windows build
+    uvloop = None
+
+logger = get_logger(__name__)
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_lock = threading.Lock()
+
+
+def get_worker_loop() -> asyncio.AbstractEventLoop:
+    """Return the process-wide event loop, starting its daemon thread on first use"""
+    global _loop
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            _loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+            if hasattr(asyncio, "eager_task_factory"):
+                # Python 3.12+: tasks that finish without suspending skip a loop iteration
+                _loop.set_task_factory(asyncio.eager_task_factory)
+            threading.Thread(target=_loop.run_forever, name="worker-event-loop", daemon=True).start()
+            logger.info("Started persistent worker event loop", uvloop=uvloop is not None)
+        return _loop
+
+
+@worker_process_init.connect
+def _start_worker_loop(**kwargs) -> None:
+    global _loop
+    if uvloop is not None:
+        # Also covers tasks that still create their own loops via asyncio.new_event_loop()
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    # A loop inherited from the parent across fork has no thread running it
+    _loop = None
+    get_worker_loop()
+
+
+@worker_process_shutdown.connect
+def _stop_worker_loop(**kwargs) -> None:
+    global _loop
+    with _lock:
+        loop, _loop = _loop, None
+    if loop is None or loop.is_closed():
+        return
+    loop.call_soon_threadsafe(loop.stop)
+    # run_forever returns on the loop thread once stop() is processed; only then can it close
+    for _ in range(50):
+        if not loop.is_running():
+            break
+        time.sleep(0.1)
+    if not loop.is_running():
+        loop.close()
+        logger.info("Closed persistent worker event loop")
+
+
+def run_coroutine(coro: Coroutine[Any, Any, Any], timeout: Optional[float] = None) -> Any:
+    """Run a coroutine on the worker loop and block until it finishes"""
+    future = asyncio.run_coroutine_threadsafe(coro, get_worker_loop())
+    try:
+        return future.result(timeout=timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
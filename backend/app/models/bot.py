@@ -1,9 +1,16 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean, Text, CheckConstraint
+from functools import lru_cache
+
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean, Text, CheckConstraint, Index
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.models.base_class import Base
 
+@lru_cache(maxsize=1024)
+def _parse_trading_pairs(trading_pairs: str) -> tuple:
+    # Keyed on the column value, so a pair list is only re-parsed after the bot's config changes
+    return tuple(pair.strip() for pair in trading_pairs.split(',') if pair.strip())
+
 class BotConfig(Base):
     __tablename__ = "bot_configs"
     
@@ -73,6 +80,8 @@ class Bot(Base):
         CheckConstraint(trade_type.in_(['spot', 'futures']), name='valid_bot_trade_type'),
         CheckConstraint(direction.in_(['long', 'short', 'both']), name='valid_bot_direction'),
         CheckConstraint(leverage >= 1, name='valid_leverage'),
+        Index('ix_bots_strategy_active_updated', 'strategy_name', 'is_active', 'updated_at'),
+        Index('ix_bots_is_active', 'is_active', postgresql_where=(is_active == True)),
     )
 
     # Relationships
@@ -84,5 +93,12 @@ class Bot(Base):
     positions = relationship("Position", back_populates="bot", cascade="all, delete-orphan")
     activities = relationship("Activity", back_populates="bot", cascade="all, delete-orphan")
 
+    @property
+    def symbol_list(self) -> tuple:
+        """Trading pairs parsed from the comma-separated trading_pairs column"""
+        if not self.trading_pairs:
+            return ()
+        return _parse_trading_pairs(self.trading_pairs)
+
     def __repr__(self):
         return f"<Bot(id={self.id}, name='{self.name}', user_id={self.user_id})>" 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, Text, ForeignKey, CheckConstraint, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, Text, ForeignKey, CheckConstraint, UniqueConstraint, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
@@ -65,6 +65,7 @@ class Trade(Base):
         CheckConstraint(order_type.in_(['market', 'limit', 'stop', 'stop_limit', 'stop-limit']), name='valid_order_type'),
         CheckConstraint(side.in_(['buy', 'sell']), name='valid_side'),
         CheckConstraint(status.in_(['pending', 'open', 'filled', 'partially_filled', 'cancelled', 'rejected']), name='valid_status'),
+        Index('ix_trades_bot_id_created_at', 'bot_id', 'created_at'),
     )
     
     # Relationships
@@ -129,10 +130,11 @@ class Position(Base):
     __table_args__ = (
         CheckConstraint(trade_type.in_(['spot', 'futures']), name='valid_position_trade_type'),
         CheckConstraint(side.in_(['buy', 'sell']), name='valid_position_side'),
+        Index('ix_positions_bot_open_symbol', 'bot_id', 'is_open', 'symbol', postgresql_where=(is_open == True)),
     )
     
     # Relationships
-    user = relationship("User")
+    user = relationship("User", back_populates="positions")
     bot = relationship("Bot", back_populates="positions")
     strategy = relationship("Strategy", back_populates="positions")
     exchange_connection = relationship("ExchangeConnection")
@@ -169,6 +171,11 @@ class PerformanceRecord(Base):
     
     # Relationships
     user = relationship("User", back_populates="performance_records")
+    
+    __table_args__ = (
+        # One record per user per day; calculate_daily_pnl_records upserts against it
+        UniqueConstraint('user_id', 'date', name='uq_performance_records_user_id_date'),
+    )
 
 
 class BacktestResult(Base):
@@ -77,6 +77,7 @@ class User(Base):
     strategies = relationship("Strategy", back_populates="user", cascade="all, delete-orphan")
     bots = relationship("Bot", back_populates="user", cascade="all, delete-orphan")
     trades = relationship("Trade", back_populates="user", cascade="all, delete-orphan")
+    positions = relationship("Position", back_populates="user")
     deposits = relationship("Deposit", back_populates="user", cascade="all, delete-orphan")
     withdrawals = relationship("Withdrawal", back_populates="user", cascade="all, delete-orphan")
     performance_records = relationship("PerformanceRecord", back_populates="user", cascade="all, delete-orphan")
@@ -4,11 +4,16 @@ from app.models.user import User
 from app.models.bot import Bot
 from app.schemas.bot import BotCreate, BotUpdate
 from app.core.logging import get_logger
+from app.core.cache import cache_client, get_cache_key_for_active_grid_bots
 from typing import Any, Dict, Optional, Union, List
 from sqlalchemy.orm import Session
 
 logger = get_logger(__name__)
 
+def clear_active_grid_bots_cache():
+    """Clear the cached list of active grid trading bots"""
+    cache_client.delete(get_cache_key_for_active_grid_bots())
+
 async def create_bot(db: AsyncSession, *, user: User, bot_in: BotCreate) -> Bot:
     """
     Creates a new trading bot for a user.
@@ -190,6 +195,7 @@ class CRUDBot:
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        clear_active_grid_bots_cache()
         logger.info(f"Bot {db_obj.id} updated successfully.")
         return db_obj
 
@@ -206,6 +212,7 @@ class CRUDBot:
             
             db.delete(obj)
             db.commit()
+            clear_active_grid_bots_cache()
             
             # Log activity for bot deleted
             try:
@@ -251,6 +258,7 @@ class CRUDBot:
             # Update bot status first
             bot.is_active = True
             db.commit()
+            clear_active_grid_bots_cache()
             
             # Call the task directly (this will execute immediately)
             task_result = run_trading_bot_strategy.delay(bot.id)
@@ -310,11 +318,19 @@ class CRUDBot:
             except Exception as e:
                 logger.error(f"Failed to revoke Celery task {task_id} for bot {bot.id}: {e}. The bot will be marked as stopped regardless.")
 
+        try:
+            # Ticks also stop on their own once they see the bot inactive
+            from app.tasks.trading_tasks import unschedule_trading_bot
+            unschedule_trading_bot(bot.id)
+        except ImportError:
+            logger.warning("Celery not available, skipping trading tick unscheduling")
+
         # Always update the bot's status in the database to reflect the user's intent.
         bot.is_active = False
         bot.celery_task_id = None
         db.commit()
         db.refresh(bot)
+        clear_active_grid_bots_cache()
         
         # Log activity for bot stopped
         try:
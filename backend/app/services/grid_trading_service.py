@@ -16,6 +16,7 @@ from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
 import math
+import asyncio
 
 logger = get_logger(__name__)
 
@@ -215,6 +216,16 @@ class GridTradingService:
             logger.error(f"❌ Error processing grid orders for {symbol}: {e}")
             return {"success": False, "error": str(e)}
 
+    async def aprocess_grid_orders(self, symbol: str) -> Dict[str, Any]:
+        """Async variant of process_grid_orders that overlaps the market data fetch with other symbols"""
+        if self.grid_state == GridState.ACTIVE:
+            await self.aprefetch_market_data(symbol)
+        return self.process_grid_orders(symbol)
+
+    async def aprefetch_market_data(self, symbol: str) -> pd.DataFrame:
+        """Warm the market data cache from a worker thread; DB work stays on the caller's thread"""
+        return await asyncio.to_thread(self._get_market_data, symbol)
+
     def _get_market_data(self, symbol: str, lookback_days: int = 50) -> pd.DataFrame:
         """Get market data with caching"""
         now = datetime.utcnow()
@@ -251,8 +262,14 @@ class GridTradingService:
             bb_period = self.config.bollinger_period
             bb_std = self.config.bollinger_std_dev
             
-            sma = market_data['close'].rolling(window=bb_period).mean().iloc[-1]
-            std = market_data['close'].rolling(window=bb_period).std().iloc[-1]
+            # Only the latest band is needed, so take it from the last window
+            # rather than rolling over the whole series (NaN while too short)
+            window = market_data['close'].to_numpy(dtype=np.float64)[-bb_period:]
+            if len(window) < bb_period:
+                sma = std = np.nan
+            else:
+                sma = window.mean()
+                std = window.std(ddof=1)
             
             upper_limit = sma + (bb_std * std)
             lower_limit = sma - (bb_std * std)
@@ -260,7 +277,8 @@ class GridTradingService:
         elif self.config.grid_type == GridType.DYNAMIC:
             # Use volatility-based range
             returns = market_data['close'].pct_change().dropna()
-            volatility = returns.rolling(window=self.config.volatility_lookback).std().iloc[-1]
+            lookback = self.config.volatility_lookback
+            volatility = returns.iloc[-lookback:].std() if len(returns) >= lookback else np.nan
             
             # Calculate range based on volatility
             volatility_range = volatility * self.config.volatility_multiplier * current_price
@@ -649,7 +667,7 @@ class GridTradingService:
             self.grid_state = GridState.ACTIVE  # Restore previous state
             return {'error': str(e)}
 
-    def _cancel_open_orders(self, symbol: str) -> int:
+    def _cancel_open_orders(self, symbol: str, commit: bool = True) -> int:
         """Cancel all open grid orders"""
         cancelled_count = 0
         
@@ -678,7 +696,8 @@ class GridTradingService:
             except Exception as e:
                 logger.error(f"Error cancelling order {trade.exchange_order_id}: {e}")
         
-        self.db.commit()
+        if commit:
+            self.db.commit()
         logger.info(f"📋 Cancelled {cancelled_count} open orders")
         return cancelled_count
 
@@ -714,16 +733,16 @@ class GridTradingService:
         
         return result
 
-    def _stop_grid(self, symbol: str, reason: str) -> Dict[str, Any]:
-        """Stop the entire grid trading operation"""
+    def _stop_grid(self, symbol: str, reason: str, commit: bool = True) -> Dict[str, Any]:
+        """Stop the entire grid trading operation; pass commit=False to leave the commit to the caller"""
         logger.info(f"🛑 Stopping grid for {symbol}, reason: {reason}")
         
         try:
             # Cancel all open orders
-            cancelled_orders = self._cancel_open_orders(symbol)
+            cancelled_orders = self._cancel_open_orders(symbol, commit=commit)
             
             # Close all open positions (if any)
-            closed_positions = self._close_open_positions(symbol)
+            closed_positions = self._close_open_positions(symbol, commit=commit)
             
             # Update grid state
             self.grid_state = GridState.STOPPED
@@ -747,7 +766,7 @@ class GridTradingService:
             logger.error(f"❌ Error stopping grid: {e}")
             return {'error': str(e)}
 
-    def _close_open_positions(self, symbol: str) -> int:
+    def _close_open_positions(self, symbol: str, commit: bool = True) -> int:
         """Close any open positions related to this grid"""
         closed_count = 0
         
@@ -771,7 +790,8 @@ class GridTradingService:
             except Exception as e:
                 logger.error(f"Error closing position {position.id}: {e}")
         
-        self.db.commit()
+        if commit:
+            self.db.commit()
         return closed_count
 
     def get_grid_status(self, symbol: str) -> Dict[str, Any]:
@@ -1,7 +1,7 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, desc
+from sqlalchemy import and_, func, desc, select
 
 from app.models.trading import Position, Trade, OrderStatus
 from app.models.user import User
@@ -13,6 +13,10 @@ from app.schemas.position import Position as PositionSchema
 
 logger = get_logger(__name__)
 
+def _as_utc(value: datetime) -> datetime:
+    # Freshly assigned timestamps are naive UTC until the row is reloaded
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
 class PositionService(ServiceBase[Position, None, None]):
     """Enhanced Position Service with real-time P&L calculations"""
     
@@ -106,40 +110,34 @@ class PositionService(ServiceBase[Position, None, None]):
                 'error': str(e)
             }
     
-    def get_portfolio_pnl_summary(self, db: Session, user_id: int) -> Dict[str, Any]:
-        """Get comprehensive P&L summary for a user's portfolio"""
+    def get_portfolio_pnl_summary(self, db: Session, user_id: int, positions: Optional[List[Position]] = None) -> Dict[str, Any]:
+        """
+        Get comprehensive P&L summary for a user's portfolio
+        Pass already-loaded positions (e.g. user.positions) to skip the position query
+        """
         try:
             # Get all positions (open and closed)
-            all_positions = db.query(Position).filter(Position.user_id == user_id).all()
+            all_positions = positions if positions is not None else db.query(Position).filter(Position.user_id == user_id).all()
+            open_positions = [p for p in all_positions if p.is_open]
             
             # Calculate totals
-            total_unrealized_pnl = sum(p.unrealized_pnl for p in all_positions if p.is_open)
-            total_realized_pnl = sum(p.realized_pnl for p in all_positions)
+            total_unrealized_pnl = sum(p.unrealized_pnl or 0.0 for p in open_positions)
+            total_realized_pnl = sum(p.realized_pnl or 0.0 for p in all_positions)
             total_pnl = total_unrealized_pnl + total_realized_pnl
             
             # Get daily P&L (positions updated today)
-            today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-            daily_pnl = db.query(func.sum(Position.unrealized_pnl)).filter(
-                and_(
-                    Position.user_id == user_id,
-                    Position.updated_at >= today_start,
-                    Position.is_open == True
-                )
-            ).scalar() or 0.0
+            today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+            daily_pnl = sum(
+                p.unrealized_pnl or 0.0 for p in open_positions
+                if p.updated_at is not None and _as_utc(p.updated_at) >= today_start
+            )
             
             # Count active positions
-            active_positions_count = db.query(Position).filter(
-                and_(Position.user_id == user_id, Position.is_open == True)
-            ).count()
+            active_positions_count = len(open_positions)
             
             # Get best and worst performing positions
-            best_position = db.query(Position).filter(
-                Position.user_id == user_id
-            ).order_by(desc(Position.total_pnl)).first()
-            
-            worst_position = db.query(Position).filter(
-                Position.user_id == user_id
-            ).order_by(Position.total_pnl).first()
+            best_position = max(all_positions, key=lambda p: p.total_pnl or 0.0, default=None)
+            worst_position = min(all_positions, key=lambda p: p.total_pnl or 0.0, default=None)
             
             return {
                 'total_unrealized_pnl': total_unrealized_pnl,
@@ -170,6 +168,70 @@ class PositionService(ServiceBase[Position, None, None]):
                 'error': str(e)
             }
     
+    def get_portfolio_pnl_summary_bulk(self, db: Session, user_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Get the get_portfolio_pnl_summary result for many users with two grouped queries"""
+        summaries = {
+            user_id: {
+                'total_unrealized_pnl': 0.0,
+                'total_realized_pnl': 0.0,
+                'total_pnl': 0.0,
+                'daily_pnl': 0.0,
+                'active_positions_count': 0,
+                'best_position': {'symbol': None, 'pnl': 0},
+                'worst_position': {'symbol': None, 'pnl': 0}
+            }
+            for user_id in user_ids
+        }
+        if not user_ids:
+            return summaries
+        
+        today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        totals = db.execute(
+            select(
+                Position.user_id,
+                func.coalesce(func.sum(Position.unrealized_pnl).filter(Position.is_open == True), 0.0),
+                func.coalesce(func.sum(Position.realized_pnl), 0.0),
+                func.coalesce(func.sum(Position.unrealized_pnl).filter(
+                    and_(Position.is_open == True, Position.updated_at >= today_start)
+                ), 0.0),
+                func.count().filter(Position.is_open == True)
+            )
+            .where(Position.user_id.in_(user_ids))
+            .group_by(Position.user_id)
+        ).all()
+        for user_id, unrealized_pnl, realized_pnl, daily_pnl, active_count in totals:
+            summary = summaries[user_id]
+            summary['total_unrealized_pnl'] = unrealized_pnl
+            summary['total_realized_pnl'] = realized_pnl
+            summary['total_pnl'] = unrealized_pnl + realized_pnl
+            summary['daily_pnl'] = daily_pnl
+            summary['active_positions_count'] = active_count
+        
+        # Best and worst position per user, ordered the same way as get_portfolio_pnl_summary
+        ranked = (
+            select(
+                Position.user_id,
+                Position.symbol,
+                Position.total_pnl,
+                func.row_number().over(partition_by=Position.user_id, order_by=desc(Position.total_pnl)).label('best_rank'),
+                func.row_number().over(partition_by=Position.user_id, order_by=Position.total_pnl).label('worst_rank')
+            )
+            .where(Position.user_id.in_(user_ids))
+            .subquery()
+        )
+        extremes = db.execute(
+            select(ranked.c.user_id, ranked.c.symbol, ranked.c.total_pnl, ranked.c.best_rank, ranked.c.worst_rank)
+            .where((ranked.c.best_rank == 1) | (ranked.c.worst_rank == 1))
+        ).all()
+        for user_id, symbol, total_pnl, best_rank, worst_rank in extremes:
+            position = {'symbol': symbol, 'pnl': total_pnl}
+            if best_rank == 1:
+                summaries[user_id]['best_position'] = position
+            if worst_rank == 1:
+                summaries[user_id]['worst_position'] = position
+        
+        return summaries
+    
     def get_detailed_positions(self, db: Session, user_id: int, include_closed: bool = False) -> List[Dict[str, Any]]:
         """Get detailed position information with P&L breakdown"""
         try:
@@ -314,4 +376,6 @@ class PositionService(ServiceBase[Position, None, None]):
             
         except Exception as e:
             logger.error(f"Error calculating risk metrics for position {position_id}: {e}")
-            return {'error': str(e)} 
\ No newline at end of file
+            return {'error': str(e)}
+
+position_service = PositionService()
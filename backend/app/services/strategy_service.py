@@ -14,6 +14,19 @@ class Signal(Enum):
     SELL = "SELL"
     HOLD = "HOLD"
 
+def ema(values: np.ndarray, length: int) -> np.ndarray:
+    """EMA over a numpy array, seeded with the SMA of the first `length` values (same as pandas_ta.ema)."""
+    out = np.full(values.shape[0], np.nan)
+    if values.shape[0] < length:
+        return out
+    alpha = 2.0 / (length + 1)
+    prev = values[:length].mean()
+    out[length - 1] = prev
+    for i in range(length, values.shape[0]):
+        prev = alpha * values[i] + (1 - alpha) * prev
+        out[i] = prev
+    return out
+
 class StrategyService:
     def __init__(self, strategy_name: str, exchange_service: ExchangeService, strategy_params: Dict[str, Any] = None):
         self.strategy_name = strategy_name
@@ -91,6 +104,10 @@ class StrategyService:
         df['minus_di_ps'] = pine_script_dmi['DI-']
         df['adx_ps'] = pine_script_dmi['ADX']
 
+    def calculate_exit_ema(self, close: np.ndarray) -> np.ndarray:
+        """Calculates only the exit EMA from a numpy array of closes."""
+        return ema(close, self.params.get('ema_exit', 25))
+
     def _check_signal(self, df: pd.DataFrame, i: int) -> Dict[str, Any]:
         """Checks for a buy or sell signal at index i based on the defined strategy."""
         if i < 1:
@@ -8,12 +8,16 @@ from sqlalchemy import and_, or_, func, desc, text
 from app.models.trading import Trade, OrderStatus, Position
 from app.models.bot import Bot
 from app.models.user import User
+from app.core.cache import cache_client, get_cache_key_for_real_time_trade_metrics
 from app.core.logging import get_logger
 from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
 
 logger = get_logger(__name__)
 
+# Real-time metrics are read by the 2-minute refresh, the activity monitor and the API
+REAL_TIME_METRICS_TTL_SECONDS = 75
+
 class TradeAnalyticsService:
     """Enhanced Trade Analytics Service"""
 
@@ -119,8 +123,23 @@ class TradeAnalyticsService:
             logger.error(f"❌ Error getting enhanced trade counts: {e}")
             return {"error": str(e)}
 
-    def get_real_time_trade_metrics(self, user_id: Optional[int] = None) -> Dict[str, Any]:
-        """Get real-time trade metrics and live statistics"""
+    def get_real_time_trade_metrics(self, user_id: Optional[int] = None, refresh: bool = False) -> Dict[str, Any]:
+        """
+        Get real-time trade metrics and live statistics
+        Results are cached briefly in Redis; refresh=True recomputes and rewrites the entry
+        """
+        cache_key = get_cache_key_for_real_time_trade_metrics(user_id)
+        if not refresh:
+            cached_metrics = cache_client.get(cache_key)
+            if cached_metrics is not None:
+                return cached_metrics
+        
+        metrics = self._compute_real_time_trade_metrics(user_id)
+        if "error" not in metrics:
+            cache_client.set(cache_key, metrics, ttl_seconds=REAL_TIME_METRICS_TTL_SECONDS)
+        return metrics
+
+    def _compute_real_time_trade_metrics(self, user_id: Optional[int] = None) -> Dict[str, Any]:
         logger.info(f"⚡ Getting real-time trade metrics for user {user_id}")
         
         try:
@@ -182,6 +201,238 @@ class TradeAnalyticsService:
             logger.error(f"❌ Error getting real-time metrics: {e}")
             return {"error": str(e)}
 
+    def compute_user_analytics_bundle(self, user_ids: List[int], include_daily_report: bool = True) -> Dict[int, Dict[str, Any]]:
+        """
+        Compute real-time metrics (and optionally the 24h report) for many users at once
+        Returns {user_id: {"real_time": ..., "daily_report": ...}} in the same shapes as
+        get_real_time_trade_metrics and get_enhanced_trade_counts(user_id, 1), using a
+        fixed number of grouped queries instead of a dozen-plus per user. Real-time
+        metrics are written to the same cache entries get_real_time_trade_metrics reads
+        """
+        if not user_ids:
+            return {}
+        
+        real_time = self._bulk_real_time_trade_metrics(user_ids)
+        for user_id, metrics in real_time.items():
+            cache_client.set(get_cache_key_for_real_time_trade_metrics(user_id), metrics, ttl_seconds=REAL_TIME_METRICS_TTL_SECONDS)
+        
+        daily_reports = self._bulk_daily_trade_reports(user_ids) if include_daily_report else {}
+        
+        bundle = {}
+        for user_id in user_ids:
+            bundle[user_id] = {"real_time": real_time[user_id]}
+            if include_daily_report:
+                bundle[user_id]["daily_report"] = daily_reports[user_id]
+        return bundle
+
+    def find_alert_candidates(self, user_ids: List[int]) -> List[Dict[str, Any]]:
+        """
+        Return the activity counts of only those users that trip an activity_monitor threshold:
+        more than half of last hour's trades failed, more than 10 trades in 5 minutes,
+        or open positions with no trade in 24 hours
+        """
+        if not user_ids:
+            return []
+        
+        now = datetime.utcnow()
+        last_hour = now - timedelta(hours=1)
+        
+        trade_counts = self.db.query(
+            Trade.user_id.label('user_id'),
+            func.count(Trade.id).label('trades_last_24h'),
+            func.count(Trade.id).filter(Trade.created_at >= last_hour).label('trades_last_hour'),
+            func.count(Trade.id).filter(Trade.created_at >= now - timedelta(minutes=5)).label('trades_last_5min'),
+            func.count(Trade.id).filter(
+                Trade.created_at >= last_hour,
+                Trade.status.in_(['rejected', 'cancelled'])
+            ).label('recent_failures')
+        ).filter(
+            Trade.user_id.in_(user_ids),
+            Trade.created_at >= now - timedelta(hours=24)
+        ).group_by(Trade.user_id).subquery()
+        
+        open_positions = self.db.query(
+            Position.user_id.label('user_id'),
+            func.count(Position.id).label('active_positions')
+        ).filter(
+            Position.user_id.in_(user_ids),
+            Position.is_open == True
+        ).group_by(Position.user_id).subquery()
+        
+        trades_last_24h = func.coalesce(trade_counts.c.trades_last_24h, 0)
+        trades_last_hour = func.coalesce(trade_counts.c.trades_last_hour, 0)
+        trades_last_5min = func.coalesce(trade_counts.c.trades_last_5min, 0)
+        recent_failures = func.coalesce(trade_counts.c.recent_failures, 0)
+        active_positions = func.coalesce(open_positions.c.active_positions, 0)
+        
+        rows = self.db.query(
+            User.id.label('user_id'),
+            trades_last_24h.label('trades_last_24h'),
+            trades_last_hour.label('trades_last_hour'),
+            trades_last_5min.label('trades_last_5min'),
+            recent_failures.label('recent_failures'),
+            active_positions.label('active_positions')
+        ).outerjoin(
+            trade_counts, trade_counts.c.user_id == User.id
+        ).outerjoin(
+            open_positions, open_positions.c.user_id == User.id
+        ).filter(
+            User.id.in_(user_ids),
+            or_(
+                and_(trades_last_hour > 0, recent_failures * 2 > trades_last_hour),
+                trades_last_5min > 10,
+                and_(trades_last_24h == 0, active_positions > 0)
+            )
+        ).all()
+        
+        return [dict(row._mapping) for row in rows]
+
+    def _bulk_real_time_trade_metrics(self, user_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        now = datetime.utcnow()
+        last_24h = now - timedelta(hours=24)
+        last_hour = now - timedelta(hours=1)
+        last_5min = now - timedelta(minutes=5)
+        thirty_days_ago = now - timedelta(days=30)
+        
+        trade_counts = {
+            row.user_id: row
+            for row in self.db.query(
+                Trade.user_id,
+                func.count(Trade.id).filter(Trade.created_at >= last_24h).label('trades_24h'),
+                func.count(Trade.id).filter(Trade.created_at >= last_hour).label('trades_last_hour'),
+                func.count(Trade.id).filter(Trade.created_at >= last_5min).label('trades_last_5min'),
+                func.count(Trade.id).filter(Trade.status == 'pending').label('pending_trades'),
+                func.count(Trade.id).filter(
+                    Trade.created_at >= last_hour,
+                    Trade.status.in_(['rejected', 'cancelled'])
+                ).label('recent_failures'),
+                func.count(Trade.id).filter(Trade.created_at >= thirty_days_ago).label('trades_30d')
+            ).filter(Trade.user_id.in_(user_ids)).group_by(Trade.user_id)
+        }
+        
+        active_positions = dict(
+            self.db.query(Position.user_id, func.count(Position.id)).filter(
+                Position.user_id.in_(user_ids),
+                Position.is_open == True
+            ).group_by(Position.user_id).all()
+        )
+        
+        metrics = {}
+        for user_id in user_ids:
+            row = trade_counts.get(user_id)
+            trades_24h = row.trades_24h if row else 0
+            trades_last_hour = row.trades_last_hour if row else 0
+            trades_30d = row.trades_30d if row else 0
+            metrics[user_id] = {
+                "real_time_counts": {
+                    "trades_last_5min": row.trades_last_5min if row else 0,
+                    "trades_last_hour": trades_last_hour,
+                    "trades_last_24h": trades_24h,
+                    "active_positions": active_positions.get(user_id, 0),
+                    "pending_trades": row.pending_trades if row else 0,
+                    "recent_failures": row.recent_failures if row else 0
+                },
+                "trading_frequency": {
+                    "trades_per_day": trades_30d / 30,
+                    "trades_per_week": trades_30d / 4.3,
+                    "trades_per_hour": trades_30d / (30 * 24)
+                },
+                "activity_level": self._assess_activity_level(trades_last_hour, trades_24h),
+                "last_updated": now.isoformat()
+            }
+        return metrics
+
+    def _bulk_daily_trade_reports(self, user_ids: List[int], days: int = 1) -> Dict[int, Dict[str, Any]]:
+        cutoff_date = datetime.utcnow() - timedelta(days=days)
+        in_window = and_(Trade.user_id.in_(user_ids), Trade.created_at >= cutoff_date)
+        filled_with_price = and_(Trade.status == 'filled', Trade.executed_price.isnot(None))
+        
+        status_columns = [
+            func.count(Trade.id).filter(Trade.status == status.value).label(status.value)
+            for status in OrderStatus
+        ]
+        counts = {
+            row.user_id: row
+            for row in self.db.query(
+                Trade.user_id,
+                func.count(Trade.id).label('total_trades'),
+                *status_columns,
+                func.count(Trade.id).filter(Trade.side == 'buy').label('buy_trades'),
+                func.count(Trade.id).filter(Trade.side == 'sell').label('sell_trades'),
+                func.count(Trade.id).filter(Trade.trade_type == 'spot').label('spot_trades'),
+                func.count(Trade.id).filter(Trade.trade_type == 'futures').label('futures_trades'),
+                func.count(Trade.id).filter(Trade.bot_id.is_(None)).label('manual_trades'),
+                func.count(Trade.id).filter(Trade.bot_id.isnot(None)).label('bot_trades'),
+                func.sum(Trade.executed_price * Trade.quantity).filter(filled_with_price).label('total_volume')
+            ).filter(in_window).group_by(Trade.user_id)
+        }
+        
+        hour = func.extract('hour', Trade.created_at)
+        time_distribution = {user_id: {str(i): 0 for i in range(24)} for user_id in user_ids}
+        for user_id, trade_hour, count in self.db.query(
+            Trade.user_id, hour, func.count(Trade.id)
+        ).filter(in_window).group_by(Trade.user_id, hour):
+            time_distribution[user_id][str(int(trade_hour))] = count
+        
+        symbol_breakdown = {user_id: [] for user_id in user_ids}
+        for user_id, symbol, count, volume in self.db.query(
+            Trade.user_id,
+            Trade.symbol,
+            func.count(Trade.id).label('count'),
+            func.sum(Trade.executed_price * Trade.quantity)
+        ).filter(in_window, filled_with_price).group_by(Trade.user_id, Trade.symbol).order_by(Trade.user_id, desc('count')):
+            if len(symbol_breakdown[user_id]) < 10:
+                symbol_breakdown[user_id].append({
+                    "symbol": symbol,
+                    "trade_count": count,
+                    "volume": float(volume or 0)
+                })
+        
+        reports = {}
+        for user_id in user_ids:
+            row = counts.get(user_id)
+            total_trades = row.total_trades if row else 0
+            status_counts = {status.value: getattr(row, status.value) if row else 0 for status in OrderStatus}
+            filled_trades = status_counts.get('filled', 0)
+            total_volume = float(row.total_volume or 0) if row else 0.0
+            buy_trades = row.buy_trades if row else 0
+            sell_trades = row.sell_trades if row else 0
+            spot_trades = row.spot_trades if row else 0
+            futures_trades = row.futures_trades if row else 0
+            manual_trades = row.manual_trades if row else 0
+            bot_trades = row.bot_trades if row else 0
+            
+            reports[user_id] = {
+                "summary": {
+                    "total_trades": total_trades,
+                    "time_period_days": days,
+                    "success_rate": filled_trades / total_trades if total_trades > 0 else 0,
+                    "total_volume": total_volume,
+                    "avg_trade_size": total_volume / filled_trades if filled_trades > 0 else 0
+                },
+                "status_breakdown": status_counts,
+                "side_breakdown": {
+                    "buy_trades": buy_trades,
+                    "sell_trades": sell_trades,
+                    "buy_percentage": buy_trades / total_trades * 100 if total_trades > 0 else 0,
+                    "sell_percentage": sell_trades / total_trades * 100 if total_trades > 0 else 0
+                },
+                "type_breakdown": {
+                    "spot_trades": spot_trades,
+                    "futures_trades": futures_trades,
+                    "spot_percentage": spot_trades / total_trades * 100 if total_trades > 0 else 0,
+                    "futures_percentage": futures_trades / total_trades * 100 if total_trades > 0 else 0
+                },
+                "automation_breakdown": {
+                    "manual_trades": manual_trades,
+                    "bot_trades": bot_trades,
+                    "automation_rate": bot_trades / total_trades * 100 if total_trades > 0 else 0
+                },
+                "time_distribution": time_distribution[user_id],
+                "symbol_breakdown": symbol_breakdown[user_id]
+            }
+        return reports
+
     def _get_time_distribution(self, base_query) -> Dict[str, int]:
         """Get hourly distribution of trades"""
         try:
@@ -0,0 +1,110 @@
+"""
+Activity Logging Celery Tasks
+Batched persistence of activity log entries produced by the trading tasks
+"""
+
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from celery_batches import Batches
+from sqlalchemy import insert
+
+from app.core.celery import celery_app
+from app.core.database import session_scope
+from app.core.logging import get_logger
+from app.models.activity import Activity
+from app.schemas.activity import ActivityCreate
+
+logger = get_logger(__name__)
+
+# Inserts tried per flushed batch before its activities are requeued, and the
+# base delay between tries (grows linearly)
+ACTIVITY_INSERT_ATTEMPTS = 3
+ACTIVITY_INSERT_RETRY_DELAY_SECONDS = 1
+# Times an activity goes back through the queue before it is dropped
+ACTIVITY_MAX_REQUEUES = 5
+
+
+def queue_activity(
+    user_id: int,
+    activity: ActivityCreate,
+    bot_id: Optional[int] = None,
+    pnl: Optional[float] = None
+) -> None:
+    """Queue an activity for the next batched insert instead of committing it inline.
+    Fire-and-forget: nothing waits on the insert and no result is stored."""
+    # The timestamp is taken here so batching does not shift when the event happened
+    log_activities_batch.delay(user_id, activity.model_dump(), datetime.utcnow().isoformat(), bot_id, pnl)
+
+
+def _activity_row(
+    user_id: int,
+    payload: Dict[str, Any],
+    timestamp: str,
+    bot_id: Optional[int] = None,
+    pnl: Optional[float] = None
+) -> Dict[str, Any]:
+    activity = ActivityCreate(**payload)
+    return {
+        "user_id": user_id,
+        "bot_id": bot_id,
+        "timestamp": datetime.fromisoformat(timestamp),
+        "type": activity.type,
+        "description": activity.description,
+        "amount": activity.amount,
+        "pnl": pnl,
+    }
+
+
+@celery_app.task(base=Batches, flush_every=100, flush_interval=5, ignore_result=True, name="activity.log_activities_batch")
+def log_activities_batch(requests) -> None:
+    """
+    Persist activities queued with queue_activity / log_activities_batch.delay(user_id, payload, timestamp[, bot_id, pnl])
+    Queued calls are flushed together and written with a single bulk INSERT
+    The messages are already acked when a batch is flushed, so a failed INSERT is
+    retried and then requeued rather than dropped
+    """
+    requests = list(requests)
+    rows = []
+    queued = []
+    for request in requests:
+        try:
+            rows.append(_activity_row(*request.args))
+            queued.append(request)
+        except Exception as e:
+            logger.error(f"Dropping malformed activity request {request.id}: {e}")
+
+    if not rows:
+        return
+
+    for attempt in range(1, ACTIVITY_INSERT_ATTEMPTS + 1):
+        with session_scope() as db:
+            try:
+                # Core insert: log rows need no ORM identity map or RETURNING
+                db.execute(insert(Activity.__table__), rows)
+                db.commit()
+                logger.info(f"Logged batch of {len(rows)} activities")
+                return
+            except Exception as e:
+                logger.error(f"Error logging batch of {len(rows)} activities (attempt {attempt}/{ACTIVITY_INSERT_ATTEMPTS}): {e}")
+                db.rollback()
+        if attempt < ACTIVITY_INSERT_ATTEMPTS:
+            time.sleep(ACTIVITY_INSERT_RETRY_DELAY_SECONDS * attempt)
+
+    _requeue_activities(queued)
+
+
+def _requeue_activities(requests) -> None:
+    """Send activities from a batch that could not be inserted back through the queue"""
+    dropped = 0
+    for request in requests:
+        requeues = (request.kwargs or {}).get("requeues", 0)
+        if requeues >= ACTIVITY_MAX_REQUEUES:
+            dropped += 1
+            continue
+        log_activities_batch.apply_async(args=request.args, kwargs={"requeues": requeues + 1})
+    if dropped:
+        logger.error(f"Dropped {dropped} activities after {ACTIVITY_MAX_REQUEUES} requeues")
+    if len(requests) > dropped:
+        logger.warning(f"Requeued {len(requests) - dropped} activities after failed inserts")
@@ -4,90 +4,135 @@ Event-driven scheduling for Cassava strategy BOTs
 """
 
 import asyncio
+import math
 from celery import current_task
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import and_
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple, FrozenSet, Optional
 from datetime import datetime, timedelta
 import pandas as pd
 
-from app.core.database import SessionLocal
+from app.core.database import session_scope
 from app.core.celery import celery_app
-from app.models.bot import Bot
+from app.core.cache import cache_client, get_cache_key_for_cassava_stop_loss
+from app.models.bot import Bot, BotConfig
 from app.models.trading import Trade, Position, OrderStatus
-from app.models.user import User
 from app.models.exchange import ExchangeConnection
-from app.services.activity_service import ActivityService, ActivityCreate
+from app.services.activity_service import ActivityCreate
 from app.services.strategy_service import StrategyService, Signal
 from app.services.exchange_service import ExchangeService
 from app.trading.data_service import data_service
 from app.trading.trading_service import trading_service
+from app.tasks.activity_tasks import queue_activity
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Cassava strategy parameters are fixed for every Cassava BOT
+CASSAVA_STRATEGY_PARAMS = {
+    'ema_fast': 10,
+    'ema_slow_buy': 20,
+    'ema_slow_sell': 15,
+    'ema_exit': 25,
+    'short_exit_ema': 5,
+    'dmi_length': 14,
+    'di_plus_buy': 25,
+    'di_plus_short': 16,
+}
+
+# Bound lazily on first use to avoid a circular import with trading_tasks
+_execute_trade = None
+
+def _get_execute_trade():
+    """Return trading_tasks._execute_trade, importing it once"""
+    global _execute_trade
+    if _execute_trade is None:
+        from app.tasks.trading_tasks import _execute_trade as execute_trade
+        _execute_trade = execute_trade
+    return _execute_trade
+
+_STRATEGY_CACHE: Dict[Tuple[str, FrozenSet], StrategyService] = {}
+
+def _get_strategy_service(strategy_name: str, strategy_params: Dict[str, Any], exchange_service: Optional[ExchangeService]) -> StrategyService:
+    """Return a shared StrategyService for the given strategy name and params"""
+    key = (strategy_name, frozenset(strategy_params.items()))
+    strategy_service = _STRATEGY_CACHE.get(key)
+    if strategy_service is None:
+        strategy_service = StrategyService(
+            strategy_name=strategy_name,
+            exchange_service=exchange_service,
+            strategy_params=dict(strategy_params)
+        )
+        _STRATEGY_CACHE[key] = strategy_service
+    else:
+        # Rebind per-bot state so a cached instance behaves like a fresh one
+        strategy_service.exchange_service = exchange_service
+        strategy_service.crossover_state = {'type': None, 'bar_index': -1}
+    return strategy_service
+
 @celery_app.task(name="tasks.process_cassava_bot_signals_and_trades")
 def process_cassava_bot_signals_and_trades() -> Dict[str, Any]:
     """
     Daily task at 00:05 UTC to generate signals and execute trades for active Cassava BOTs
     This replaces the continuous while loop with event-driven scheduling
     """
-    db = SessionLocal()
-    try:
-        logger.info("Starting Cassava BOT signal generation and trading task")
-        
-        # Get all active Cassava BOTs
-        active_cassava_bots = db.query(Bot).filter(
-            and_(
-                Bot.is_active == True,
-                Bot.strategy_name == 'cassava_trend_following'
-            )
-        ).all()
-        
-        results = {
-            'total_bots': len(active_cassava_bots),
-            'signals_generated': 0,
-            'trades_executed': 0,
-            'errors': 0,
-            'bot_results': []
-        }
-        
-        for bot in active_cassava_bots:
-            try:
-                bot_result = _process_single_cassava_bot(db, bot)
-                results['bot_results'].append(bot_result)
-                results['signals_generated'] += bot_result['signals_generated']
-                results['trades_executed'] += bot_result['trades_executed']
-                results['errors'] += bot_result['errors']
-                
-            except Exception as e:
-                logger.error(f"Error processing Cassava BOT {bot.id}: {e}")
-                results['errors'] += 1
-                results['bot_results'].append({
-                    'bot_id': bot.id,
-                    'bot_name': bot.name,
-                    'status': 'error',
-                    'error': str(e),
-                    'signals_generated': 0,
-                    'trades_executed': 0,
-                    'errors': 1
-                })
-        
-        logger.info(f"Cassava BOT signal generation completed: {results['signals_generated']} signals, {results['trades_executed']} trades, {results['errors']} errors")
-        
-        return results
-        
-    except Exception as e:
-        logger.error(f"Error in Cassava BOT signal generation task: {e}")
-        return {
-            'total_bots': 0,
-            'signals_generated': 0,
-            'trades_executed': 0,
-            'errors': 1,
-            'bot_results': [{'status': 'error', 'error': str(e)}]
-        }
-    finally:
-        db.close()
+    with session_scope() as db:
+        try:
+            logger.info("Starting Cassava BOT signal generation and trading task")
+            
+            # Get all active Cassava BOTs with their exchange connections and owners in one query
+            active_cassava_bots = db.query(Bot).options(
+                joinedload(Bot.exchange_connection),
+                joinedload(Bot.user)
+            ).filter(
+                and_(
+                    Bot.is_active == True,
+                    Bot.strategy_name == 'cassava_trend_following'
+                )
+            ).all()
+            
+            results = {
+                'total_bots': len(active_cassava_bots),
+                'signals_generated': 0,
+                'trades_executed': 0,
+                'errors': 0,
+                'bot_results': []
+            }
+            
+            for bot in active_cassava_bots:
+                try:
+                    bot_result = _process_single_cassava_bot(db, bot)
+                    results['bot_results'].append(bot_result)
+                    results['signals_generated'] += bot_result['signals_generated']
+                    results['trades_executed'] += bot_result['trades_executed']
+                    results['errors'] += bot_result['errors']
+                    
+                except Exception as e:
+                    logger.error(f"Error processing Cassava BOT {bot.id}: {e}")
+                    results['errors'] += 1
+                    results['bot_results'].append({
+                        'bot_id': bot.id,
+                        'bot_name': bot.name,
+                        'status': 'error',
+                        'error': str(e),
+                        'signals_generated': 0,
+                        'trades_executed': 0,
+                        'errors': 1
+                    })
+            
+            logger.info(f"Cassava BOT signal generation completed: {results['signals_generated']} signals, {results['trades_executed']} trades, {results['errors']} errors")
+            
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error in Cassava BOT signal generation task: {e}")
+            return {
+                'total_bots': 0,
+                'signals_generated': 0,
+                'trades_executed': 0,
+                'errors': 1,
+                'bot_results': [{'status': 'error', 'error': str(e)}]
+            }
 
 def _process_single_cassava_bot(db: Session, bot: Bot) -> Dict[str, Any]:
     """Process signal generation and trading for a single Cassava BOT"""
@@ -103,25 +148,10 @@ def _process_single_cassava_bot(db: Session, bot: Bot) -> Dict[str, Any]:
     try:
         # Initialize services
         exchange_service = ExchangeService(db)
-        strategy_service = StrategyService(
-            strategy_name=bot.strategy_name,
-            exchange_service=exchange_service,
-            strategy_params={
-                'ema_fast': 10,
-                'ema_slow_buy': 20,
-                'ema_slow_sell': 15,
-                'ema_exit': 25,
-                'short_exit_ema': 5,
-                'dmi_length': 14,
-                'di_plus_buy': 25,
-                'di_plus_short': 16,
-            }
-        )
+        strategy_service = _get_strategy_service(bot.strategy_name, CASSAVA_STRATEGY_PARAMS, exchange_service)
         
-        # Load exchange connection
-        connection = db.query(ExchangeConnection).filter(
-            ExchangeConnection.id == bot.exchange_connection_id
-        ).first()
+        # Exchange connection was eager loaded with the bot
+        connection = bot.exchange_connection
         
         if not connection:
             logger.error(f"Exchange connection {bot.exchange_connection_id} not found for bot {bot.id}")
@@ -129,9 +159,7 @@ def _process_single_cassava_bot(db: Session, bot: Bot) -> Dict[str, Any]:
             return bot_result
         
         # Process each trading pair
-        for pair in bot.trading_pairs.split(','):
-            symbol = pair.strip()
-            
+        for symbol in bot.symbol_list:
             try:
                 symbol_result = _process_cassava_symbol(db, bot, symbol, strategy_service, connection)
                 bot_result['symbol_results'].append(symbol_result)
@@ -173,78 +201,23 @@ def _process_cassava_symbol(db: Session, bot: Bot, symbol: str, strategy_service
         market_data = data_service.get_market_data_for_strategy(symbol, '1d', lookback_periods=100)
         
         if market_data.empty or len(market_data) < 50:
-            logger.warning(f"Insufficient market data for {symbol}")
+            logger.warning("Insufficient market data for %s", symbol)
             return symbol_result
         
-        # Check if we have new candle data since last check
-        latest_bar_time = market_data.index[-1] if hasattr(market_data, 'index') else None
-        
-        # For now, always process since this is daily scheduled task
-        # In future, we could store last_processed_candle_time in bot config
-        
-        # Calculate indicators
-        strategy_service._calculate_indicators(market_data)
-        
-        # Check current position and exit conditions first
-        position = db.query(Position).filter_by(bot_id=bot.id, symbol=symbol, is_open=True).first()
-        
-        if position:
-            latest_signal = strategy_service._check_signal(market_data, len(market_data) - 1)
-            
-            # Check exit conditions
-            if position.side == 'buy' and latest_signal.get('exit_long'):
-                logger.info(f"Cassava BOT {bot.id}: Exiting LONG position for {symbol} due to EMA25 exit condition")
-                _execute_cassava_trade(db, bot, symbol, Signal.SELL, connection)
-                symbol_result['signal'] = 'SELL'
-                symbol_result['action_taken'] = 'exit_long'
-                symbol_result['trades_executed'] += 1
-                symbol_result['signals_generated'] += 1
-                return symbol_result
-                
-            elif position.side == 'sell' and latest_signal.get('exit_short'):
-                logger.info(f"Cassava BOT {bot.id}: Exiting SHORT position for {symbol} due to EMA8 exit condition")
-                _execute_cassava_trade(db, bot, symbol, Signal.BUY, connection)
-                symbol_result['signal'] = 'BUY'
-                symbol_result['action_taken'] = 'exit_short'
-                symbol_result['trades_executed'] += 1
-                symbol_result['signals_generated'] += 1
-                return symbol_result
-        
-        # Generate new entry signal
-        signal = strategy_service.generate_signal(symbol)
-        symbol_result['signal'] = signal.value
-        symbol_result['signals_generated'] += 1
-        
-        # Log signal generation
-        user = db.query(User).filter(User.id == bot.user_id).first()
-        if user:
-            activity_service = ActivityService()
-            activity = ActivityCreate(
-                type="signal_generated",
-                description=f"Cassava BOT '{bot.name}' generated {signal.value} signal for {symbol}",
-                amount=None
-            )
-            activity_service.log_activity(db, user, activity, bot_id=bot.id)
+        # Skip if this candle was already processed (retries, manual kicks)
+        latest_bar_time = str(market_data.index[-1])
+        candle_state = _get_candle_state(db, bot.id, symbol)
+        if candle_state and candle_state.config_value == latest_bar_time:
+            logger.info("Cassava BOT %s: Candle %s for %s already processed, skipping", bot.id, latest_bar_time, symbol)
+            symbol_result['action_taken'] = 'already_processed'
+            return symbol_result
         
-        # Execute trade if not HOLD
-        if signal != Signal.HOLD:
-            # Check position constraints
-            if signal == Signal.BUY and position and position.side == 'buy':
-                logger.info(f"BUY signal for {symbol}, but already in LONG position. Holding.")
-                symbol_result['action_taken'] = 'already_in_position'
-                return symbol_result
-                
-            if signal == Signal.SELL and position and position.side == 'sell':
-                logger.info(f"SELL signal for {symbol}, but already in SHORT position. Holding.")
-                symbol_result['action_taken'] = 'already_in_position'
-                return symbol_result
-            
-            # Execute the trade
-            _execute_cassava_trade(db, bot, symbol, signal, connection)
-            symbol_result['trades_executed'] += 1
-            symbol_result['action_taken'] = f'executed_{signal.value.lower()}'
-        else:
-            symbol_result['action_taken'] = 'hold'
+        _evaluate_cassava_symbol(db, bot, symbol, strategy_service, connection, market_data, symbol_result)
+        if symbol_result['errors']:
+            # Leave the candle unprocessed so the failed trade is retried on the next run
+            logger.warning("Cassava BOT %s: Candle %s for %s not marked processed after a failed trade", bot.id, latest_bar_time, symbol)
+            return symbol_result
+        _save_candle_state(db, bot.id, symbol, candle_state, latest_bar_time)
     
     except Exception as e:
         logger.error(f"Error processing Cassava symbol {symbol}: {e}")
@@ -252,82 +225,171 @@ def _process_cassava_symbol(db: Session, bot: Bot, symbol: str, strategy_service
     
     return symbol_result
 
-def _execute_cassava_trade(db: Session, bot: Bot, symbol: str, signal: Signal, connection: ExchangeConnection):
-    """Execute a Cassava trade with proper error handling and logging"""
+def _get_candle_state(db: Session, bot_id: int, symbol: str):
+    """Load the last processed candle time for a bot/symbol from bot config"""
+    return db.query(BotConfig).filter_by(bot_id=bot_id, config_key=f"last_processed_candle:{symbol}").first()
+
+def _save_candle_state(db: Session, bot_id: int, symbol: str, candle_state, candle_time: str):
+    """Upsert the last processed candle time for a bot/symbol"""
+    if candle_state:
+        candle_state.config_value = candle_time
+    else:
+        db.add(BotConfig(bot_id=bot_id, config_key=f"last_processed_candle:{symbol}", config_value=candle_time))
+    db.commit()
+
+def _evaluate_cassava_symbol(db: Session, bot: Bot, symbol: str, strategy_service: StrategyService, connection: ExchangeConnection, market_data: pd.DataFrame, symbol_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Run exit checks, entry signal generation and trade execution for a symbol on fresh market data"""
+    # Calculate indicators
+    strategy_service._calculate_indicators(market_data)
+    
+    # Check current position and exit conditions first
+    position = db.query(Position).filter_by(bot_id=bot.id, symbol=symbol, is_open=True).first()
+    
+    if position:
+        latest_signal = strategy_service._check_signal(market_data, len(market_data) - 1)
+        
+        # Check exit conditions
+        if position.side == 'buy' and latest_signal.get('exit_long'):
+            logger.info("Cassava BOT %s: Exiting LONG position for %s due to EMA25 exit condition", bot.id, symbol)
+            symbol_result['signal'] = 'SELL'
+            symbol_result['signals_generated'] += 1
+            if not _execute_cassava_trade(db, bot, symbol, Signal.SELL, connection):
+                symbol_result['action_taken'] = 'trade_failed'
+                symbol_result['errors'] += 1
+                return symbol_result
+            symbol_result['action_taken'] = 'exit_long'
+            symbol_result['trades_executed'] += 1
+            return symbol_result
+            
+        elif position.side == 'sell' and latest_signal.get('exit_short'):
+            logger.info("Cassava BOT %s: Exiting SHORT position for %s due to EMA8 exit condition", bot.id, symbol)
+            symbol_result['signal'] = 'BUY'
+            symbol_result['signals_generated'] += 1
+            if not _execute_cassava_trade(db, bot, symbol, Signal.BUY, connection):
+                symbol_result['action_taken'] = 'trade_failed'
+                symbol_result['errors'] += 1
+                return symbol_result
+            symbol_result['action_taken'] = 'exit_short'
+            symbol_result['trades_executed'] += 1
+            return symbol_result
+    
+    # Generate new entry signal
+    signal = strategy_service.generate_signal(symbol)
+    symbol_result['signal'] = signal.value
+    symbol_result['signals_generated'] += 1
+    
+    # Log signal generation
+    user = bot.user
+    if user:
+        activity = ActivityCreate(
+            type="signal_generated",
+            description=f"Cassava BOT '{bot.name}' generated {signal.value} signal for {symbol}",
+            amount=None
+        )
+        queue_activity(bot.user_id, activity, bot_id=bot.id)
+    
+    # Execute trade if not HOLD
+    if signal != Signal.HOLD:
+        # Check position constraints
+        if signal == Signal.BUY and position and position.side == 'buy':
+            logger.info("BUY signal for %s, but already in LONG position. Holding.", symbol)
+            symbol_result['action_taken'] = 'already_in_position'
+            return symbol_result
+            
+        if signal == Signal.SELL and position and position.side == 'sell':
+            logger.info("SELL signal for %s, but already in SHORT position. Holding.", symbol)
+            symbol_result['action_taken'] = 'already_in_position'
+            return symbol_result
+        
+        # Execute the trade
+        if not _execute_cassava_trade(db, bot, symbol, signal, connection):
+            symbol_result['action_taken'] = 'trade_failed'
+            symbol_result['errors'] += 1
+            return symbol_result
+        symbol_result['trades_executed'] += 1
+        symbol_result['action_taken'] = f'queued_{signal.value.lower()}'
+    else:
+        symbol_result['action_taken'] = 'hold'
+    
+    return symbol_result
+
+def _execute_cassava_trade(db: Session, bot: Bot, symbol: str, signal: Signal, connection: ExchangeConnection) -> bool:
+    """Execute a Cassava trade with proper error handling and logging; returns whether it was queued"""
     try:
-        # Import here to avoid circular imports
-        from app.tasks.trading_tasks import _execute_trade
+        execute_trade = _get_execute_trade()
         
-        # Execute the trade using the existing trade execution logic
-        _execute_trade(db, bot, symbol, signal)
+        # Record the trade as PENDING; execute_trade_on_exchange places it on the exchange
+        trade_id = execute_trade(db, bot, symbol, signal, connection=connection)
+        if trade_id is None:
+            logger.error("Cassava BOT %s: %s trade for %s was not queued", bot.id, signal.value, symbol)
+            return False
         
-        logger.info(f"Cassava BOT {bot.id}: Successfully executed {signal.value} trade for {symbol}")
+        logger.info("Cassava BOT %s: Queued %s trade %s for %s", bot.id, signal.value, trade_id, symbol)
+        return True
         
     except Exception as e:
         logger.error(f"Error executing Cassava trade for {symbol}: {e}")
         # Log the error to user activity
-        user = db.query(User).filter(User.id == bot.user_id).first()
+        user = bot.user
         if user:
-            activity_service = ActivityService()
             activity = ActivityCreate(
                 type="error",
                 description=f"Cassava BOT '{bot.name}': Error executing {signal.value} trade for {symbol}: {e}",
                 amount=None
             )
-            activity_service.log_activity(db, user, activity, bot_id=bot.id)
+            queue_activity(bot.user_id, activity, bot_id=bot.id)
+        return False
 
 @celery_app.task(name="tasks.update_cassava_bot_stop_losses")
 def update_cassava_bot_stop_losses() -> Dict[str, Any]:
     """
     Daily task at 00:20 UTC to update EMA25 trailing stop losses for active Cassava BOT trades
     """
-    db = SessionLocal()
-    try:
-        logger.info("Starting Cassava BOT stop loss update task")
-        
-        # Get all active Cassava BOTs with open positions
-        active_cassava_bots = db.query(Bot).filter(
-            and_(
-                Bot.is_active == True,
-                Bot.strategy_name == 'cassava_trend_following'
-            )
-        ).all()
-        
-        results = {
-            'total_bots': len(active_cassava_bots),
-            'positions_checked': 0,
-            'stop_losses_updated': 0,
-            'errors': 0,
-            'bot_results': []
-        }
-        
-        for bot in active_cassava_bots:
-            try:
-                bot_result = _update_cassava_bot_stop_losses(db, bot)
-                results['bot_results'].append(bot_result)
-                results['positions_checked'] += bot_result['positions_checked']
-                results['stop_losses_updated'] += bot_result['stop_losses_updated']
-                results['errors'] += bot_result['errors']
-                
-            except Exception as e:
-                logger.error(f"Error updating stop losses for Cassava BOT {bot.id}: {e}")
-                results['errors'] += 1
-        
-        logger.info(f"Cassava BOT stop loss update completed: {results['positions_checked']} positions checked, {results['stop_losses_updated']} stop losses updated")
-        
-        return results
-        
-    except Exception as e:
-        logger.error(f"Error in Cassava BOT stop loss update task: {e}")
-        return {
-            'total_bots': 0,
-            'positions_checked': 0,
-            'stop_losses_updated': 0,
-            'errors': 1,
-            'bot_results': [{'status': 'error', 'error': str(e)}]
-        }
-    finally:
-        db.close()
+    with session_scope() as db:
+        try:
+            logger.info("Starting Cassava BOT stop loss update task")
+            
+            # Get all active Cassava BOTs with open positions
+            active_cassava_bots = db.query(Bot).options(joinedload(Bot.user)).filter(
+                and_(
+                    Bot.is_active == True,
+                    Bot.strategy_name == 'cassava_trend_following'
+                )
+            ).all()
+            
+            results = {
+                'total_bots': len(active_cassava_bots),
+                'positions_checked': 0,
+                'stop_losses_updated': 0,
+                'errors': 0,
+                'bot_results': []
+            }
+            
+            for bot in active_cassava_bots:
+                try:
+                    bot_result = _update_cassava_bot_stop_losses(db, bot)
+                    results['bot_results'].append(bot_result)
+                    results['positions_checked'] += bot_result['positions_checked']
+                    results['stop_losses_updated'] += bot_result['stop_losses_updated']
+                    results['errors'] += bot_result['errors']
+                    
+                except Exception as e:
+                    logger.error(f"Error updating stop losses for Cassava BOT {bot.id}: {e}")
+                    results['errors'] += 1
+            
+            logger.info(f"Cassava BOT stop loss update completed: {results['positions_checked']} positions checked, {results['stop_losses_updated']} stop losses updated")
+            
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error in Cassava BOT stop loss update task: {e}")
+            return {
+                'total_bots': 0,
+                'positions_checked': 0,
+                'stop_losses_updated': 0,
+                'errors': 1,
+                'bot_results': [{'status': 'error', 'error': str(e)}]
+            }
 
 def _update_cassava_bot_stop_losses(db: Session, bot: Bot) -> Dict[str, Any]:
     """Update EMA25 trailing stop losses for a single Cassava BOT"""
@@ -353,20 +415,7 @@ def _update_cassava_bot_stop_losses(db: Session, bot: Bot) -> Dict[str, Any]:
         bot_result['positions_checked'] = len(open_positions)
         
         # Initialize strategy service for EMA calculation
-        strategy_service = StrategyService(
-            strategy_name=bot.strategy_name,
-            exchange_service=None,
-            strategy_params={
-                'ema_fast': 10,
-                'ema_slow_buy': 20,
-                'ema_slow_sell': 15,
-                'ema_exit': 25,
-                'short_exit_ema': 5,
-                'dmi_length': 14,
-                'di_plus_buy': 25,
-                'di_plus_short': 16,
-            }
-        )
+        strategy_service = _get_strategy_service(bot.strategy_name, CASSAVA_STRATEGY_PARAMS, None)
         
         for position in open_positions:
             try:
@@ -402,6 +451,14 @@ def _update_position_stop_loss(db: Session, bot: Bot, position: Position, strate
     try:
         symbol = position.symbol
         
+        # Skip if the latest closed daily candle was already processed (retries, catch-up runs)
+        state_key = get_cache_key_for_cassava_stop_loss(bot.id, symbol)
+        expected_d1_date = (datetime.utcnow() - timedelta(days=1)).date().isoformat()
+        if cache_client.get(state_key) == expected_d1_date:
+            logger.info("Cassava BOT %s: Stop loss for %s already processed for D-1 candle %s", bot.id, symbol, expected_d1_date)
+            position_result['skipped'] = True
+            return position_result
+        
         # Get current stop loss from associated trade
         trade = db.query(Trade).filter(
             and_(
@@ -413,7 +470,7 @@ def _update_position_stop_loss(db: Session, bot: Bot, position: Position, strate
         ).order_by(Trade.created_at.desc()).first()
         
         if not trade or not trade.stop_loss:
-            logger.warning(f"No trade with stop loss found for position {position.id}")
+            logger.warning("No trade with stop loss found for position %s", position.id)
             return position_result
         
         current_stop_loss = trade.stop_loss
@@ -422,28 +479,21 @@ def _update_position_stop_loss(db: Session, bot: Bot, position: Position, strate
         # Get D-1 EMA25 value (yesterday's EMA25)
         market_data = data_service.get_market_data_for_strategy(symbol, '1d', lookback_periods=100)
         
-        if market_data.empty or len(market_data) < 2:
-            logger.warning(f"Insufficient market data for {symbol}")
-            position_result['error'] = True
-            return position_result
+        # Only the exit EMA is needed here, so compute it on the raw close array
+        # instead of running the full pandas indicator suite
+        close = market_data['close'].to_numpy(dtype=float) if not market_data.empty else None
         
-        # Calculate indicators
-        strategy_service._calculate_indicators(market_data)
-        
-        # Get D-1 EMA25 value (second to last row)
-        ema_exit_period = strategy_service.params.get('ema_exit', 25)
-        ema_exit_col = f"EMA_{ema_exit_period}"
-        
-        if ema_exit_col not in market_data.columns:
-            logger.warning(f"EMA column {ema_exit_col} not found for {symbol}")
+        if close is None or len(close) < 2:
+            logger.warning("Insufficient market data for %s", symbol)
             position_result['error'] = True
             return position_result
         
-        d1_ema25 = market_data[ema_exit_col].iloc[-2]  # D-1 EMA25
-        position_result['d1_ema25'] = float(d1_ema25)
+        ema_arr = strategy_service.calculate_exit_ema(close)
+        d1_ema25 = float(ema_arr[-2])  # D-1 EMA25
+        position_result['d1_ema25'] = d1_ema25
         
-        if pd.isna(d1_ema25):
-            logger.warning(f"D-1 EMA25 is NaN for {symbol}")
+        if math.isnan(d1_ema25):
+            logger.warning("D-1 EMA25 is NaN for %s", symbol)
             position_result['error'] = True
             return position_result
         
@@ -459,19 +509,21 @@ def _update_position_stop_loss(db: Session, bot: Bot, position: Position, strate
             position_result['updated'] = True
             
             # Log the stop loss update
-            user = db.query(User).filter(User.id == bot.user_id).first()
+            user = bot.user
             if user:
-                activity_service = ActivityService()
                 activity = ActivityCreate(
                     type="stop_loss_updated",
                     description=f"Cassava BOT '{bot.name}': EMA25 trailing stop loss updated for {symbol}: {current_stop_loss:.6f} → {new_stop_loss:.6f}",
                     amount=None
                 )
-                activity_service.log_activity(db, user, activity, bot_id=bot.id)
+                queue_activity(bot.user_id, activity, bot_id=bot.id)
             
-            logger.info(f"Cassava BOT {bot.id}: EMA25 trailing stop loss updated for {symbol}: {current_stop_loss} -> {new_stop_loss} (D-1 EMA25: {d1_ema25})")
+            logger.info("Cassava BOT %s: EMA25 trailing stop loss updated for %s: %s -> %s (D-1 EMA25: %s)", bot.id, symbol, current_stop_loss, new_stop_loss, d1_ema25)
         else:
-            logger.info(f"Cassava BOT {bot.id}: Stop loss unchanged for {symbol}: {current_stop_loss} (D-1 EMA25: {d1_ema25} <= current stop loss)")
+            logger.info("Cassava BOT %s: Stop loss unchanged for %s: %s (D-1 EMA25: %s <= current stop loss)", bot.id, symbol, current_stop_loss, d1_ema25)
+        
+        # Remember the D-1 candle this update was based on
+        cache_client.set(state_key, market_data.index[-2].date().isoformat(), ttl_seconds=2 * 24 * 3600)
     
     except Exception as e:
         logger.error(f"Error updating stop loss for position {position.id}: {e}")
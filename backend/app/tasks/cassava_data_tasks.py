@@ -1,5 +1,5 @@
-from celery import shared_task
-from app.core.database import SessionLocal
+from celery import shared_task, group
+from app.core.database import session_scope
 from app.services.cassava_data_service import CassavaDataService
 from datetime import datetime, timedelta
 import logging
@@ -9,32 +9,40 @@ logger = logging.getLogger(__name__)
 @shared_task(name="tasks.update_cassava_trend_data")
 def update_cassava_trend_data():
     """Daily task to update Cassava trend data for all trading pairs"""
-    db = SessionLocal()
-    try:
-        logger.info("Starting daily Cassava trend data update")
-        
-        # Get yesterday's date (UTC+0) for daily candle close
-        yesterday = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
-        
-        cassava_service = CassavaDataService(db)
-        
-        # Update data for yesterday
-        cassava_service.update_daily_data(yesterday)
-        
-        # Clean up old data (keep only 50 days)
-        cassava_service.cleanup_old_data()
-        
-        logger.info("Daily Cassava trend data update completed successfully")
-        
-    except Exception as e:
-        logger.error(f"Error in daily Cassava trend data update: {e}")
-    finally:
-        db.close()
+    with session_scope() as db:
+        try:
+            logger.info("Starting daily Cassava trend data update")
+            
+            # Get yesterday's date (UTC+0) for daily candle close
+            yesterday = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
+            
+            cassava_service = CassavaDataService(db)
+            
+            # Update data for yesterday
+            cassava_service.update_daily_data(yesterday)
+            
+            # Clean up old data (keep only 50 days)
+            cassava_service.cleanup_old_data()
+            
+            logger.info("Daily Cassava trend data update completed successfully")
+            
+        except Exception as e:
+            logger.error(f"Error in daily Cassava trend data update: {e}")
+
+@shared_task(name="tasks.backfill_cassava_trend_data_day")
+def _backfill_one_day(iso_date: str):
+    """Backfill Cassava trend data for a single day"""
+    with session_scope() as db:
+        try:
+            day = datetime.fromisoformat(iso_date)
+            logger.info(f"Backfilling data for {day.date()}")
+            CassavaDataService(db).update_daily_data(day)
+        except Exception as e:
+            logger.error(f"Error backfilling Cassava trend data for {iso_date}: {e}")
 
 @shared_task(name="tasks.backfill_cassava_trend_data")
 def backfill_cassava_trend_data(start_date: str = None, end_date: str = None):
-    """Backfill Cassava trend data for a date range"""
-    db = SessionLocal()
+    """Backfill Cassava trend data for a date range, one subtask per day"""
     try:
         logger.info("Starting Cassava trend data backfill")
         
@@ -49,35 +57,26 @@ def backfill_cassava_trend_data(start_date: str = None, end_date: str = None):
         else:
             end_dt = datetime.utcnow() - timedelta(days=1)
         
-        cassava_service = CassavaDataService(db)
+        # Days are independent, so fan them out across workers
+        dates = [(start_dt + timedelta(days=i)).isoformat() for i in range((end_dt - start_dt).days + 1)]
+        group(_backfill_one_day.s(d) for d in dates).apply_async()
         
-        # Update data for each day in the range
-        current_date = start_dt
-        while current_date <= end_dt:
-            logger.info(f"Backfilling data for {current_date.date()}")
-            cassava_service.update_daily_data(current_date)
-            current_date += timedelta(days=1)
-        
-        logger.info("Cassava trend data backfill completed successfully")
+        logger.info(f"Cassava trend data backfill dispatched for {len(dates)} days")
         
     except Exception as e:
         logger.error(f"Error in Cassava trend data backfill: {e}")
-    finally:
-        db.close()
 
 @shared_task(name="tasks.cleanup_old_cassava_data")
 def cleanup_old_cassava_data():
     """Clean up Cassava trend data older than 50 days"""
-    db = SessionLocal()
-    try:
-        logger.info("Starting cleanup of old Cassava trend data")
-        
-        cassava_service = CassavaDataService(db)
-        cassava_service.cleanup_old_data()
-        
-        logger.info("Cleanup of old Cassava trend data completed")
-        
-    except Exception as e:
-        logger.error(f"Error in cleanup of old Cassava trend data: {e}")
-    finally:
-        db.close() 
\ No newline at end of file
+    with session_scope() as db:
+        try:
+            logger.info("Starting cleanup of old Cassava trend data")
+            
+            cassava_service = CassavaDataService(db)
+            cassava_service.cleanup_old_data()
+            
+            logger.info("Cleanup of old Cassava trend data completed")
+            
+        except Exception as e:
+            logger.error(f"Error in cleanup of old Cassava trend data: {e}")
\ No newline at end of file
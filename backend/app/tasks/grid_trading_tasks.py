@@ -3,89 +3,327 @@ Grid Trading Strategy Celery Tasks
 Automated execution and management of grid trading strategies
 """
 
-from celery import Celery
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from celery import Celery, chord
+from celery_batches import Batches
+from sqlalchemy import func, delete, select, lambda_stmt, Select
+from sqlalchemy.sql.lambdas import StatementLambdaElement
+from sqlalchemy.orm import Session, selectinload, load_only
+from app.core.database import session_scope
 from app.core.celery import celery_app
 from app.models.bot import Bot
 from app.models.trading import Trade
 from app.services.grid_trading_service import GridTradingService, GridState
 from app.services.exchange_service import ExchangeService
 from app.core.logging import get_logger
-from typing import Dict, Any, List
-import traceback
+from app.core.cache import cache_client, get_cache_key_for_active_grid_bots
+from app.services.bot_service import clear_active_grid_bots_cache
+from typing import Dict, Any, List, Tuple, Iterable, Iterator, Awaitable, Callable
+import asyncio
+import json
+from collections import Counter
+from dataclasses import dataclass, asdict, is_dataclass
 from datetime import datetime, timedelta
 
 logger = get_logger(__name__)
 
-@celery_app.task(bind=True, name="grid_trading.process_active_grids")
+@dataclass(slots=True)
+class GridProcessSummary:
+    """Per (bot, symbol) outcome of grid order processing"""
+    orders_processed: int
+    profit_realized: float
+    grid_state: str
+
+@dataclass(slots=True)
+class GridInitSummary:
+    """Per (bot, symbol) outcome of grid initialization"""
+    grid_levels: int
+    base_price: float
+    orders_created: int
+
+@dataclass(slots=True)
+class GridRebalanceSummary:
+    """Per (bot, symbol) outcome of a grid rebalance"""
+    old_levels: int
+    new_levels: int
+    price_change: float
+
+@dataclass(slots=True)
+class GridPerformanceReport:
+    """Per (bot, symbol) grid performance metrics"""
+    total_profit: float
+    total_trades: int
+    success_rate: float
+    avg_profit_per_trade: float
+    grid_efficiency: float
+    current_drawdown: float
+
+def _summary_to_json(summary: Dict[Tuple[int, str], Any]) -> Dict[str, Any]:
+    """Flatten a (bot_id, symbol) keyed summary into the JSON-safe "<bot_id>_<symbol>" form"""
+    return {
+        f"{bot_id}_{symbol}": asdict(entry) if is_dataclass(entry) else entry
+        for (bot_id, symbol), entry in summary.items()
+    }
+
+ACTIVE_GRID_BOTS_TTL_SECONDS = 30
+
+# Hot grid scan statements are built with lambda_stmt so their compiled SQL is cached across ticks
+_ACTIVE_GRID_BOT_ROWS = lambda_stmt(
+    lambda: select(Bot.id, Bot.exchange_connection_id, Bot.trading_pairs).where(
+        Bot.is_active == True,
+        Bot.strategy_name == "grid_trading"
+    )
+)
+
+def _grid_bots_stmt(*criteria_lambdas: Callable[[Select], Select]) -> StatementLambdaElement:
+    """
+    Active grid bots loaded with only the columns the grid scans and GridTradingService read
+    (other columns load lazily if touched); extra criteria are applied as cached lambdas
+    """
+    stmt = lambda_stmt(lambda: select(Bot).where(
+        Bot.is_active == True,
+        Bot.strategy_name == "grid_trading"
+    ).options(
+        load_only(Bot.id, Bot.user_id, Bot.exchange_connection_id, Bot.trading_pairs, Bot.strategy_params),
+        selectinload(Bot.exchange_connection)
+    ))
+    for criteria in criteria_lambdas:
+        stmt += criteria
+    return stmt
+
+def _active_grid_bot_specs(db: Session) -> List[Dict[str, Any]]:
+    """Active grid bots as plain dicts, cached in Redis briefly since the set rarely changes"""
+    cache_key = get_cache_key_for_active_grid_bots()
+    specs = cache_client.get(cache_key)
+    if specs is None:
+        rows = db.execute(_ACTIVE_GRID_BOT_ROWS).all()
+        specs = [
+            {"id": row.id, "exchange_connection_id": row.exchange_connection_id, "trading_pairs": row.trading_pairs}
+            for row in rows
+        ]
+        cache_client.set(cache_key, specs, ttl_seconds=ACTIVE_GRID_BOTS_TTL_SECONDS)
+    return specs
+
+ACTIVE_GRID_BOT_BATCH_SIZE = 50
+
+def _iter_active_grid_bot_batches(db: Session, batch_size: int = ACTIVE_GRID_BOT_BATCH_SIZE) -> Iterator[List[Bot]]:
+    """
+    Yield active grid bots in batches of batch_size so work starts before the whole fleet is loaded
+    Each batch is a fully consumed query, so callers may commit between batches
+    """
+    bot_ids = [spec["id"] for spec in _active_grid_bot_specs(db)]
+    for start in range(0, len(bot_ids), batch_size):
+        batch_ids = bot_ids[start:start + batch_size]
+        yield db.execute(_grid_bots_stmt(lambda s: s.where(Bot.id.in_(batch_ids)))).scalars().all()
+
+def _build_grid_services(db: Session, bots: List[Bot], errors: List[str]) -> Dict[int, GridTradingService]:
+    """Create one GridTradingService per bot, shared by all of that bot's symbols"""
+    grid_services = {}
+    # Bots on the same exchange connection share one ExchangeService for the tick
+    exchange_services: Dict[int, ExchangeService] = {}
+    for bot in bots:
+        try:
+            exchange_service = exchange_services.get(bot.exchange_connection_id)
+            if exchange_service is None:
+                exchange_service = ExchangeService(bot.exchange_connection)
+                exchange_services[bot.exchange_connection_id] = exchange_service
+            grid_services[bot.id] = GridTradingService(db, bot, exchange_service)
+        except Exception as e:
+            error_msg = f"Error initializing services for bot {bot.id}: {str(e)}"
+            errors.append(error_msg)
+            logger.exception(error_msg)
+    return grid_services
+
+def _grid_jobs(bots: List[Bot], grid_services: Dict[int, GridTradingService]) -> List[Tuple[Bot, str]]:
+    """Flatten bots into (bot, symbol) pairs for every bot that has a grid service"""
+    return [(bot, symbol) for bot in bots if bot.id in grid_services for symbol in bot.symbol_list]
+
+async def _gather(coros: Iterable[Awaitable[Any]]) -> List[Any]:
+    return await asyncio.gather(*coros, return_exceptions=True)
+
+def _fetch_last_prices(db: Session, bots: List[Bot]) -> Dict[Tuple[int, str], float]:
+    """Last traded price per (bot_id, symbol), using one multi-ticker request per exchange connection"""
+    bots_by_connection: Dict[int, List[Bot]] = {}
+    for bot in bots:
+        bots_by_connection.setdefault(bot.exchange_connection_id, []).append(bot)
+    
+    exchange_service = ExchangeService(db)
+    connection_bots = list(bots_by_connection.values())
+    ticker_requests = [
+        exchange_service.get_tickers(
+            group[0].user_id,
+            group[0].exchange_connection.exchange_name,
+            sorted({symbol for bot in group for symbol in bot.symbol_list})
+        )
+        for group in connection_bots
+    ]
+    outcomes = asyncio.run(_gather(ticker_requests)) if ticker_requests else []
+    
+    last_prices = {}
+    for group, tickers in zip(connection_bots, outcomes):
+        if isinstance(tickers, Exception):
+            logger.warning(f"Ticker fetch failed for exchange connection {group[0].exchange_connection_id}: {tickers}")
+            continue
+        for bot in group:
+            for symbol in bot.symbol_list:
+                ticker = tickers.get(symbol)
+                if ticker is not None:
+                    last_prices[(bot.id, symbol)] = float(ticker.last_price)
+    return last_prices
+
+def _prefetch_market_data(jobs: List[Tuple[Bot, str]], grid_services: Dict[int, GridTradingService]) -> None:
+    """Load market data for all (bot, symbol) pairs concurrently before the sequential DB pass"""
+    if jobs:
+        asyncio.run(_gather(grid_services[bot.id].aprefetch_market_data(symbol) for bot, symbol in jobs))
+
+@celery_app.task(bind=True, ignore_result=True, name="grid_trading.process_active_grids")
 def process_active_grids(self) -> Dict[str, Any]:
     """
     Process all active grid trading bots
-    Runs every 1 minute to check for filled orders and manage grid levels
+    Runs every minute; each bot is processed by its own process_one_bot subtask so
+    workers share the load
     """
     logger.info("🔲 Processing active grid trading bots...")
     
     results = {
-        "processed_bots": 0,
-        "successful_operations": 0,
-        "errors": [],
-        "summary": {}
+        "dispatched_bots": 0,
+        "errors": []
     }
     
     try:
-        db = next(get_db())
-        
-        # Get all active grid trading bots
-        active_bots = db.query(Bot).filter(
-            Bot.is_active == True,
-            Bot.strategy_name == "grid_trading"
-        ).all()
+        with session_scope() as db:
+            # Get all active grid trading bots
+            bot_specs = _active_grid_bot_specs(db)
         
-        logger.info(f"Found {len(active_bots)} active grid trading bots")
-        
-        for bot in active_bots:
-            try:
-                # Initialize services
-                exchange_service = ExchangeService(bot.exchange_connection)
-                grid_service = GridTradingService(db, bot, exchange_service)
-                
-                # Process grid for each trading pair
-                if bot.trading_pairs:
-                    for symbol in bot.trading_pairs:
-                        result = grid_service.process_grid_orders(symbol)
-                        
-                        if result.get("success"):
-                            results["successful_operations"] += 1
-                            results["summary"][f"{bot.id}_{symbol}"] = {
-                                "orders_processed": result.get("orders_processed", 0),
-                                "profit_realized": result.get("profit_realized", 0),
-                                "grid_state": result.get("grid_state", "unknown")
-                            }
-                        else:
-                            error_msg = f"Bot {bot.id} ({symbol}): {result.get('error', 'Unknown error')}"
-                            results["errors"].append(error_msg)
-                            logger.error(error_msg)
-                
-                results["processed_bots"] += 1
-                
-            except Exception as e:
-                error_msg = f"Error processing bot {bot.id}: {str(e)}"
-                results["errors"].append(error_msg)
-                logger.error(f"{error_msg}\n{traceback.format_exc()}")
-        
-        logger.info(f"✅ Grid processing complete: {results['successful_operations']} operations, {len(results['errors'])} errors")
+        logger.info(f"Found {len(bot_specs)} active grid trading bots")
         
+        if bot_specs:
+            chord(process_one_bot.s(spec["id"]) for spec in bot_specs)(aggregate_grid_results.s())
+            results["dispatched_bots"] = len(bot_specs)
+            
     except Exception as e:
         error_msg = f"Critical error in process_active_grids: {str(e)}"
         results["errors"].append(error_msg)
-        logger.error(f"{error_msg}\n{traceback.format_exc()}")
-    finally:
-        if 'db' in locals():
-            db.close()
+        logger.exception(error_msg)
     
     return results
 
+@celery_app.task(name="grid_trading.process_one_bot")
+def process_one_bot(bot_id: int) -> Dict[str, Any]:
+    """
+    Process grid orders for every trading pair of a single bot
+    Dispatched per bot by process_active_grids
+    """
+    results = {
+        "bot_id": bot_id,
+        "successful_operations": 0,
+        "errors": [],
+        "summary": {}
+    }
+    
+    try:
+        with session_scope() as db:
+            bot = db.execute(_grid_bots_stmt(lambda s: s.where(Bot.id == bot_id))).scalars().first()
+            if not bot:
+                results["errors"].append(f"Bot {bot_id} is no longer active")
+                return results
+            
+            grid_services = _build_grid_services(db, [bot], results["errors"])
+            jobs = _grid_jobs([bot], grid_services)
+            
+            # Process the bot's symbols concurrently so exchange round trips overlap
+            outcomes = asyncio.run(_gather(
+                grid_services[bot.id].aprocess_grid_orders(symbol) for bot, symbol in jobs
+            )) if jobs else []
+            
+            for (bot, symbol), result in zip(jobs, outcomes):
+                if isinstance(result, Exception):
+                    error_msg = f"Error processing bot {bot.id} ({symbol}): {str(result)}"
+                    results["errors"].append(error_msg)
+                    logger.error(error_msg)
+                elif result.get("success"):
+                    results["successful_operations"] += 1
+                    results["summary"][(bot.id, symbol)] = GridProcessSummary(
+                        orders_processed=result.get("orders_processed", 0),
+                        profit_realized=result.get("profit_realized", 0),
+                        grid_state=result.get("grid_state", "unknown")
+                    )
+                else:
+                    error_msg = f"Bot {bot.id} ({symbol}): {result.get('error', 'Unknown error')}"
+                    results["errors"].append(error_msg)
+                    logger.error(error_msg)
+            
+    except Exception as e:
+        error_msg = f"Error processing bot {bot_id}: {str(e)}"
+        results["errors"].append(error_msg)
+        logger.exception(error_msg)
+    
+    results["summary"] = _summary_to_json(results["summary"])
+    return results
+
+@celery_app.task(ignore_result=True, name="grid_trading.aggregate_grid_results")
+def aggregate_grid_results(bot_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Chord callback combining the per-bot results of process_active_grids"""
+    results = {
+        "processed_bots": len(bot_results),
+        "successful_operations": sum(r["successful_operations"] for r in bot_results),
+        "errors": [error for r in bot_results for error in r["errors"]],
+        "summary": {key: value for r in bot_results for key, value in r["summary"].items()}
+    }
+    
+    logger.info(f"✅ Grid processing complete: {results['successful_operations']} operations, {len(results['errors'])} errors")
+    logger.info("process_active_grids summary: %s", json.dumps(results, default=str))
+    return results
+
+@celery_app.task(base=Batches, flush_every=100, flush_interval=5, name="grid_trading.process_grid_symbol")
+def process_grid_symbol(requests) -> None:
+    """
+    Process grid orders for (bot_id, symbol) pairs queued on grid state changes
+    Call as process_grid_symbol.delay(bot_id, symbol); queued calls are flushed
+    together so one DB session and exchange service cache serve the whole batch
+    """
+    requests = list(requests)
+    logger.info(f"🔲 Processing batch of {len(requests)} grid symbol requests...")
+    
+    results = {}
+    try:
+        with session_scope() as db:
+            pairs = {tuple(request.args) for request in requests}
+            bot_ids = list({bot_id for bot_id, _ in pairs})
+            bots = db.execute(_grid_bots_stmt(lambda s: s.where(Bot.id.in_(bot_ids)))).scalars().all()
+            
+            errors = []
+            grid_services = _build_grid_services(db, bots, errors)
+            bots_by_id = {bot.id: bot for bot in bots}
+            jobs = [(bot_id, symbol) for bot_id, symbol in pairs if bot_id in grid_services]
+            
+            outcomes = asyncio.run(_gather(
+                grid_services[bot_id].aprocess_grid_orders(symbol) for bot_id, symbol in jobs
+            )) if jobs else []
+            
+            for (bot_id, symbol), result in zip(jobs, outcomes):
+                if isinstance(result, Exception):
+                    result = {"success": False, "error": str(result)}
+                if not result.get("success"):
+                    logger.error(f"Bot {bot_id} ({symbol}): {result.get('error', 'Unknown error')}")
+                results[(bot_id, symbol)] = result
+            
+            for bot_id, symbol in pairs - results.keys():
+                if bot_id in bots_by_id:
+                    error = f"Failed to initialize services for bot {bot_id}"
+                else:
+                    error = f"Bot {bot_id} is not an active grid trading bot"
+                results[(bot_id, symbol)] = {"success": False, "error": error}
+                    
+    except Exception as e:
+        logger.exception(f"Critical error in process_grid_symbol: {str(e)}")
+        error_result = {"success": False, "error": str(e)}
+        results = {tuple(request.args): error_result for request in requests}
+    
+    for request in requests:
+        process_grid_symbol.backend.mark_as_done(
+            request.id, results[tuple(request.args)], request=request
+        )
+
 @celery_app.task(bind=True, name="grid_trading.initialize_new_grids")
 def initialize_new_grids(self) -> Dict[str, Any]:
     """
@@ -101,69 +339,72 @@ def initialize_new_grids(self) -> Dict[str, Any]:
         "summary": {}
     }
     
+    now = datetime.utcnow()
+    
     try:
-        db = next(get_db())
-        
-        # Get grid trading bots that are active but haven't been initialized
-        new_bots = db.query(Bot).filter(
-            Bot.is_active == True,
-            Bot.strategy_name == "grid_trading",
-            Bot.created_at >= datetime.utcnow() - timedelta(minutes=10)  # Recently created
-        ).all()
-        
-        for bot in new_bots:
-            try:
-                # Check if grid is already initialized (has recent trades)
-                recent_trades = db.query(Trade).filter(
-                    Trade.bot_id == bot.id,
-                    Trade.created_at >= datetime.utcnow() - timedelta(minutes=5)
-                ).count()
-                
-                if recent_trades > 0:
-                    continue  # Already initialized
-                
-                # Initialize services
-                exchange_service = ExchangeService(bot.exchange_connection)
-                grid_service = GridTradingService(db, bot, exchange_service)
-                
-                # Initialize grid for each trading pair
-                if bot.trading_pairs:
-                    for symbol in bot.trading_pairs:
-                        result = grid_service.initialize_grid(symbol)
-                        
-                        if result.get("success"):
-                            results["successful_initializations"] += 1
-                            results["summary"][f"{bot.id}_{symbol}"] = {
-                                "grid_levels": result.get("grid_levels", 0),
-                                "base_price": result.get("base_price", 0),
-                                "orders_created": result.get("orders_created", 0)
-                            }
-                            logger.info(f"✅ Grid initialized for bot {bot.id} on {symbol}")
-                        else:
-                            error_msg = f"Failed to initialize grid for bot {bot.id} ({symbol}): {result.get('error')}"
-                            results["errors"].append(error_msg)
-                            logger.error(error_msg)
-                
-                results["initialized_bots"] += 1
-                
-            except Exception as e:
-                error_msg = f"Error initializing bot {bot.id}: {str(e)}"
-                results["errors"].append(error_msg)
-                logger.error(f"{error_msg}\n{traceback.format_exc()}")
-        
-        logger.info(f"✅ Grid initialization complete: {results['successful_initializations']} grids initialized")
-        
+        with session_scope() as db:
+            # Get grid trading bots that are active but haven't been initialized
+            created_after = now - timedelta(minutes=10)  # Recently created
+            new_bots = db.execute(
+                _grid_bots_stmt(lambda s: s.where(Bot.created_at >= created_after))
+            ).scalars().all()
+            
+            # Count recent trades for all candidate bots in one GROUP BY query
+            recent_trade_counts = {}
+            if new_bots:
+                recent_trade_counts = dict(
+                    db.query(Trade.bot_id, func.count(Trade.id)).filter(
+                        Trade.bot_id.in_([bot.id for bot in new_bots]),
+                        Trade.created_at >= now - timedelta(minutes=5)
+                    ).group_by(Trade.bot_id).all()
+                )
+            
+            # Skip bots whose grid is already initialized (has recent trades)
+            pending_bots = [bot for bot in new_bots if recent_trade_counts.get(bot.id, 0) == 0]
+            grid_services = _build_grid_services(db, pending_bots, results["errors"])
+            
+            for bot in pending_bots:
+                if bot.id not in grid_services:
+                    continue
+                try:
+                    grid_service = grid_services[bot.id]
+                    
+                    # Initialize grid for each trading pair
+                    if bot.trading_pairs:
+                        for symbol in bot.symbol_list:
+                            result = grid_service.initialize_grid(symbol)
+                            
+                            if result.get("success"):
+                                results["successful_initializations"] += 1
+                                results["summary"][(bot.id, symbol)] = GridInitSummary(
+                                    grid_levels=result.get("grid_levels", 0),
+                                    base_price=result.get("base_price", 0),
+                                    orders_created=result.get("orders_created", 0)
+                                )
+                                logger.info(f"✅ Grid initialized for bot {bot.id} on {symbol}")
+                            else:
+                                error_msg = f"Failed to initialize grid for bot {bot.id} ({symbol}): {result.get('error')}"
+                                results["errors"].append(error_msg)
+                                logger.error(error_msg)
+                    
+                    results["initialized_bots"] += 1
+                    
+                except Exception as e:
+                    error_msg = f"Error initializing bot {bot.id}: {str(e)}"
+                    results["errors"].append(error_msg)
+                    logger.exception(error_msg)
+            
+            logger.info(f"✅ Grid initialization complete: {results['successful_initializations']} grids initialized")
+            
     except Exception as e:
         error_msg = f"Critical error in initialize_new_grids: {str(e)}"
         results["errors"].append(error_msg)
-        logger.error(f"{error_msg}\n{traceback.format_exc()}")
-    finally:
-        if 'db' in locals():
-            db.close()
+        logger.exception(error_msg)
     
+    results["summary"] = _summary_to_json(results["summary"])
     return results
 
-@celery_app.task(bind=True, name="grid_trading.grid_rebalancing")
+@celery_app.task(bind=True, ignore_result=True, name="grid_trading.grid_rebalancing")
 def grid_rebalancing(self) -> Dict[str, Any]:
     """
     Check and perform grid rebalancing when market conditions change significantly
@@ -179,67 +420,81 @@ def grid_rebalancing(self) -> Dict[str, Any]:
     }
     
     try:
-        db = next(get_db())
-        
-        # Get all active grid trading bots
-        active_bots = db.query(Bot).filter(
-            Bot.is_active == True,
-            Bot.strategy_name == "grid_trading"
-        ).all()
-        
-        for bot in active_bots:
-            try:
-                # Initialize services
-                exchange_service = ExchangeService(bot.exchange_connection)
-                grid_service = GridTradingService(db, bot, exchange_service)
+        with session_scope() as db:
+            # Get all active grid trading bots, a batch at a time
+            for active_bots in _iter_active_grid_bot_batches(db):
+                grid_services = _build_grid_services(db, active_bots, results["errors"])
                 
-                # Check rebalancing for each trading pair
-                if bot.trading_pairs:
-                    for symbol in bot.trading_pairs:
-                        # Get grid status to check if rebalancing is needed
-                        status = grid_service.get_grid_status(symbol)
+                # Pairs whose grid status asks for rebalancing; prices are only fetched for these
+                flagged: Dict[int, List[str]] = {}
+                for bot in active_bots:
+                    if bot.id not in grid_services:
+                        continue
+                    try:
+                        # Check rebalancing for each trading pair
+                        if bot.trading_pairs:
+                            for symbol in bot.symbol_list:
+                                # Get grid status to check if rebalancing is needed
+                                status = grid_services[bot.id].get_grid_status(symbol)
+                                if status.get("needs_rebalancing", False):
+                                    flagged.setdefault(bot.id, []).append(symbol)
                         
-                        if status.get("needs_rebalancing", False):
+                        results["checked_bots"] += 1
+                        
+                    except Exception as e:
+                        error_msg = f"Error checking rebalancing for bot {bot.id}: {str(e)}"
+                        results["errors"].append(error_msg)
+                        logger.exception(error_msg)
+                
+                if not flagged:
+                    continue
+                flagged_bots = [bot for bot in active_bots if bot.id in flagged]
+                last_prices = _fetch_last_prices(db, flagged_bots)
+                
+                for bot in flagged_bots:
+                    grid_service = grid_services[bot.id]
+                    for symbol in flagged[bot.id]:
+                        try:
                             logger.info(f"🔄 Rebalancing needed for bot {bot.id} on {symbol}")
-                            
-                            # Get current market data and perform rebalancing
-                            market_data = grid_service._get_market_data(symbol)
-                            if not market_data.empty:
+                            current_price = last_prices.get((bot.id, symbol))
+                            if current_price is None:
+                                # No ticker for this symbol, fall back to candle data
+                                market_data = grid_service._get_market_data(symbol)
+                                if market_data.empty:
+                                    continue
                                 current_price = market_data['close'].iloc[-1]
-                                rebalance_result = grid_service._rebalance_grid(symbol, current_price)
-                                
-                                if rebalance_result.get("success"):
-                                    results["rebalanced_grids"] += 1
-                                    results["summary"][f"{bot.id}_{symbol}"] = {
-                                        "old_levels": rebalance_result.get("old_levels", 0),
-                                        "new_levels": rebalance_result.get("new_levels", 0),
-                                        "price_change": rebalance_result.get("price_change_percent", 0)
-                                    }
-                                    logger.info(f"✅ Grid rebalanced for bot {bot.id} on {symbol}")
-                                else:
-                                    error_msg = f"Failed to rebalance grid for bot {bot.id} ({symbol}): {rebalance_result.get('error')}"
-                                    results["errors"].append(error_msg)
-                
-                results["checked_bots"] += 1
+                            
+                            rebalance_result = grid_service._rebalance_grid(symbol, current_price)
+                            
+                            if rebalance_result.get("success"):
+                                results["rebalanced_grids"] += 1
+                                results["summary"][(bot.id, symbol)] = GridRebalanceSummary(
+                                    old_levels=rebalance_result.get("old_levels", 0),
+                                    new_levels=rebalance_result.get("new_levels", 0),
+                                    price_change=rebalance_result.get("price_change_percent", 0)
+                                )
+                                logger.info(f"✅ Grid rebalanced for bot {bot.id} on {symbol}")
+                            else:
+                                error_msg = f"Failed to rebalance grid for bot {bot.id} ({symbol}): {rebalance_result.get('error')}"
+                                results["errors"].append(error_msg)
+                        
+                        except Exception as e:
+                            error_msg = f"Error rebalancing bot {bot.id} ({symbol}): {str(e)}"
+                            results["errors"].append(error_msg)
+                            logger.exception(error_msg)
                 
-            except Exception as e:
-                error_msg = f"Error checking rebalancing for bot {bot.id}: {str(e)}"
-                results["errors"].append(error_msg)
-                logger.error(f"{error_msg}\n{traceback.format_exc()}")
-        
-        logger.info(f"✅ Grid rebalancing check complete: {results['rebalanced_grids']} grids rebalanced")
-        
+            logger.info(f"✅ Grid rebalancing check complete: {results['rebalanced_grids']} grids rebalanced")
+            
     except Exception as e:
         error_msg = f"Critical error in grid_rebalancing: {str(e)}"
         results["errors"].append(error_msg)
-        logger.error(f"{error_msg}\n{traceback.format_exc()}")
-    finally:
-        if 'db' in locals():
-            db.close()
+        logger.exception(error_msg)
     
+    results["summary"] = _summary_to_json(results["summary"])
+    logger.info("grid_rebalancing summary: %s", json.dumps(results, default=str))
     return results
 
-@celery_app.task(bind=True, name="grid_trading.grid_performance_monitor")
+@celery_app.task(bind=True, ignore_result=True, name="grid_trading.grid_performance_monitor")
 def grid_performance_monitor(self) -> Dict[str, Any]:
     """
     Monitor grid trading performance and generate optimization suggestions
@@ -255,62 +510,60 @@ def grid_performance_monitor(self) -> Dict[str, Any]:
     }
     
     try:
-        db = next(get_db())
-        
-        # Get all active grid trading bots
-        active_bots = db.query(Bot).filter(
-            Bot.is_active == True,
-            Bot.strategy_name == "grid_trading"
-        ).all()
-        
-        for bot in active_bots:
-            try:
-                # Initialize services
-                exchange_service = ExchangeService(bot.exchange_connection)
-                grid_service = GridTradingService(db, bot, exchange_service)
+        with session_scope() as db:
+            # Get all active grid trading bots, a batch at a time
+            for active_bots in _iter_active_grid_bot_batches(db):
+                grid_services = _build_grid_services(db, active_bots, results["errors"])
+                _prefetch_market_data(_grid_jobs(active_bots, grid_services), grid_services)
                 
-                # Generate performance report for each trading pair
-                if bot.trading_pairs:
-                    for symbol in bot.trading_pairs:
-                        # Get comprehensive grid status
-                        status = grid_service.get_grid_status(symbol)
+                for bot in active_bots:
+                    if bot.id not in grid_services:
+                        continue
+                    try:
+                        grid_service = grid_services[bot.id]
                         
-                        # Get optimization suggestions
-                        suggestions = grid_service.get_optimization_suggestions(symbol)
-                        
-                        results["performance_reports"][f"{bot.id}_{symbol}"] = {
-                            "total_profit": status.get("total_profit", 0),
-                            "total_trades": status.get("total_trades", 0),
-                            "success_rate": status.get("success_rate", 0),
-                            "avg_profit_per_trade": status.get("avg_profit_per_trade", 0),
-                            "grid_efficiency": status.get("grid_efficiency", 0),
-                            "current_drawdown": status.get("current_drawdown", 0)
-                        }
+                        # Generate performance report for each trading pair
+                        if bot.trading_pairs:
+                            for symbol in bot.symbol_list:
+                                # Get comprehensive grid status
+                                status = grid_service.get_grid_status(symbol)
+                                
+                                # Get optimization suggestions
+                                suggestions = grid_service.get_optimization_suggestions(symbol)
+                                
+                                results["performance_reports"][(bot.id, symbol)] = GridPerformanceReport(
+                                    total_profit=status.get("total_profit", 0),
+                                    total_trades=status.get("total_trades", 0),
+                                    success_rate=status.get("success_rate", 0),
+                                    avg_profit_per_trade=status.get("avg_profit_per_trade", 0),
+                                    grid_efficiency=status.get("grid_efficiency", 0),
+                                    current_drawdown=status.get("current_drawdown", 0)
+                                )
+                                
+                                results["optimization_suggestions"][(bot.id, symbol)] = suggestions
+                                
+                                # Log performance metrics
+                                logger.info(f"📈 Bot {bot.id} ({symbol}) - Profit: ${status.get('total_profit', 0):.2f}, "
+                                          f"Trades: {status.get('total_trades', 0)}, "
+                                          f"Success Rate: {status.get('success_rate', 0):.1f}%")
                         
-                        results["optimization_suggestions"][f"{bot.id}_{symbol}"] = suggestions
+                        results["monitored_bots"] += 1
                         
-                        # Log performance metrics
-                        logger.info(f"📈 Bot {bot.id} ({symbol}) - Profit: ${status.get('total_profit', 0):.2f}, "
-                                  f"Trades: {status.get('total_trades', 0)}, "
-                                  f"Success Rate: {status.get('success_rate', 0):.1f}%")
-                
-                results["monitored_bots"] += 1
+                    except Exception as e:
+                        error_msg = f"Error monitoring bot {bot.id}: {str(e)}"
+                        results["errors"].append(error_msg)
+                        logger.exception(error_msg)
                 
-            except Exception as e:
-                error_msg = f"Error monitoring bot {bot.id}: {str(e)}"
-                results["errors"].append(error_msg)
-                logger.error(f"{error_msg}\n{traceback.format_exc()}")
-        
-        logger.info(f"✅ Performance monitoring complete: {results['monitored_bots']} bots analyzed")
-        
+            logger.info(f"✅ Performance monitoring complete: {results['monitored_bots']} bots analyzed")
+            
     except Exception as e:
         error_msg = f"Critical error in grid_performance_monitor: {str(e)}"
         results["errors"].append(error_msg)
-        logger.error(f"{error_msg}\n{traceback.format_exc()}")
-    finally:
-        if 'db' in locals():
-            db.close()
+        logger.exception(error_msg)
     
+    results["performance_reports"] = _summary_to_json(results["performance_reports"])
+    results["optimization_suggestions"] = _summary_to_json(results["optimization_suggestions"])
+    logger.info("grid_performance_monitor summary: %s", json.dumps(results, default=str))
     return results
 
 @celery_app.task(bind=True, name="grid_trading.emergency_grid_stop")
@@ -331,44 +584,40 @@ def emergency_grid_stop(self, bot_id: int, reason: str = "Emergency stop") -> Di
     }
     
     try:
-        db = next(get_db())
-        
-        # Get the bot
-        bot = db.query(Bot).filter(Bot.id == bot_id).first()
-        if not bot:
-            result["error"] = f"Bot {bot_id} not found"
-            return result
-        
-        # Initialize services
-        exchange_service = ExchangeService(bot.exchange_connection)
-        grid_service = GridTradingService(db, bot, exchange_service)
-        
-        # Stop grid for each trading pair
-        if bot.trading_pairs:
-            for symbol in bot.trading_pairs:
-                stop_result = grid_service._stop_grid(symbol, reason)
+        with session_scope() as db:
+            # Get the bot
+            bot = db.query(Bot).filter(Bot.id == bot_id).first()
+            if not bot:
+                result["error"] = f"Bot {bot_id} not found"
+                return result
+            
+            # Initialize services
+            exchange_service = ExchangeService(bot.exchange_connection)
+            grid_service = GridTradingService(db, bot, exchange_service)
+            
+            # Stop grid for each trading pair, deferring the writes to a single commit
+            for symbol in bot.symbol_list:
+                stop_result = grid_service._stop_grid(symbol, reason, commit=False)
                 
-                if stop_result.get("success"):
-                    result["orders_cancelled"] += stop_result.get("orders_cancelled", 0)
-                    result["positions_closed"] += stop_result.get("positions_closed", 0)
-        
-        # Update bot status
-        bot.is_active = False
-        db.commit()
-        
-        result["stopped"] = True
-        logger.info(f"✅ Emergency stop completed for bot {bot_id}")
-        
+                if "error" not in stop_result:
+                    result["orders_cancelled"] += stop_result.get("cancelled_orders", 0)
+                    result["positions_closed"] += stop_result.get("closed_positions", 0)
+            
+            # Update bot status
+            db.bulk_update_mappings(Bot, [{"id": bot.id, "is_active": False}])
+            db.commit()
+            clear_active_grid_bots_cache()
+            
+            result["stopped"] = True
+            logger.info(f"✅ Emergency stop completed for bot {bot_id}")
+            
     except Exception as e:
         result["error"] = str(e)
-        logger.error(f"❌ Error in emergency stop for bot {bot_id}: {e}\n{traceback.format_exc()}")
-    finally:
-        if 'db' in locals():
-            db.close()
+        logger.exception(f"❌ Error in emergency stop for bot {bot_id}: {e}")
     
     return result
 
-@celery_app.task(bind=True, name="grid_trading.cleanup_completed_grids")
+@celery_app.task(bind=True, ignore_result=True, name="grid_trading.cleanup_completed_grids")
 def cleanup_completed_grids(self) -> Dict[str, Any]:
     """
     Clean up data for completed/stopped grid trading bots
@@ -381,46 +630,37 @@ def cleanup_completed_grids(self) -> Dict[str, Any]:
         "cleaned_trades": 0,
         "errors": []
     }
+    now = datetime.utcnow()
     
     try:
-        db = next(get_db())
-        
-        # Get completed/stopped grid trading bots older than 30 days
-        cutoff_date = datetime.utcnow() - timedelta(days=30)
-        completed_bots = db.query(Bot).filter(
-            Bot.strategy_name == "grid_trading",
-            Bot.is_active == False,
-            Bot.updated_at <= cutoff_date
-        ).all()
-        
-        for bot in completed_bots:
-            try:
-                # Archive old trades (move to archive table or delete if needed)
-                old_trades = db.query(Trade).filter(
-                    Trade.bot_id == bot.id,
-                    Trade.created_at <= cutoff_date
-                ).count()
-                
-                # For now, we'll just log the cleanup opportunity
-                # In production, you might want to archive to a separate table
-                logger.info(f"Bot {bot.id} has {old_trades} old trades ready for cleanup")
-                
-                results["cleaned_bots"] += 1
-                results["cleaned_trades"] += old_trades
-                
-            except Exception as e:
-                error_msg = f"Error cleaning up bot {bot.id}: {str(e)}"
-                results["errors"].append(error_msg)
-                logger.error(error_msg)
-        
-        logger.info(f"✅ Cleanup complete: {results['cleaned_bots']} bots processed")
-        
+        with session_scope() as db:
+            # Delete old trades of completed/stopped grid trading bots in one statement
+            cutoff_date = now - timedelta(days=30)
+            completed_bot_ids = select(Bot.id).where(
+                Bot.strategy_name == "grid_trading",
+                Bot.is_active == False,
+                Bot.updated_at <= cutoff_date
+            )
+            stmt = delete(Trade).where(
+                Trade.bot_id.in_(completed_bot_ids),
+                Trade.created_at <= cutoff_date
+            ).returning(Trade.bot_id).execution_options(synchronize_session=False)
+            
+            deleted_per_bot = Counter(row[0] for row in db.execute(stmt))
+            db.commit()
+            
+            for bot_id, deleted in deleted_per_bot.items():
+                logger.info(f"Bot {bot_id}: deleted {deleted} old trades")
+            
+            results["cleaned_bots"] = len(deleted_per_bot)
+            results["cleaned_trades"] = sum(deleted_per_bot.values())
+            
+            logger.info(f"✅ Cleanup complete: {results['cleaned_bots']} bots processed")
+            
     except Exception as e:
         error_msg = f"Critical error in cleanup_completed_grids: {str(e)}"
         results["errors"].append(error_msg)
-        logger.error(f"{error_msg}\n{traceback.format_exc()}")
-    finally:
-        if 'db' in locals():
-            db.close()
+        logger.exception(error_msg)
     
+    logger.info("cleanup_completed_grids summary: %s", json.dumps(results, default=str))
     return results 
\ No newline at end of file
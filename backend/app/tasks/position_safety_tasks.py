@@ -1,14 +1,26 @@
-import asyncio
-from datetime import datetime
+from datetime import datetime, timedelta
 from celery import current_app as celery_app
 import structlog
 
+from app.core.cache import (
+    cache_client,
+    get_cache_key_for_emergency_scan_queued,
+    get_cache_key_for_emergency_scan_running,
+)
+from app.core.worker_loop import run_coroutine
 from app.services.position_safety_service import position_safety_service
 
 logger = structlog.get_logger()
 
+# A failed stop loss older than this triggers an emergency scan
+STOP_LOSS_ATTENTION_AGE = timedelta(minutes=15)
 
-@celery_app.task(bind=True, name="position_safety_monitor")
+# At most one emergency scan is dispatched per window, and only one runs at a time
+EMERGENCY_SCAN_DISPATCH_WINDOW_SECONDS = 60
+EMERGENCY_SCAN_TIMEOUT_SECONDS = 600
+
+
+@celery_app.task(bind=True, ignore_result=True, name="position_safety_monitor")
 def position_safety_monitor_task(self):
     """
     Comprehensive position safety monitor that runs every 15 minutes
@@ -21,7 +33,7 @@ def position_safety_monitor_task(self):
         logger.info("🛡️ Starting position safety monitor...")
         
         # Run the safety monitoring
-        results = asyncio.run(position_safety_service.scan_and_protect_positions())
+        results = run_coroutine(position_safety_service.scan_and_protect_positions(), timeout=600)
         
         logger.info(
             "🛡️ Position safety monitor completed",
@@ -44,9 +56,7 @@ def position_safety_monitor_task(self):
         }
         
     except Exception as e:
-        logger.error(f"Critical error in position safety monitor: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception(f"Critical error in position safety monitor: {e}")
         
         # Retry the task
         raise self.retry(
@@ -62,11 +72,20 @@ def emergency_position_scan_task(self):
     Emergency position scan for immediate safety checks
     Can be triggered manually or automatically when issues are detected
     """
+    running_key = get_cache_key_for_emergency_scan_running()
+    if not cache_client.set_if_absent(running_key, 1, ttl_seconds=EMERGENCY_SCAN_TIMEOUT_SECONDS):
+        logger.info("Emergency position scan already running, skipping")
+        return {
+            "status": "emergency_skipped",
+            "timestamp": datetime.utcnow().isoformat(),
+            "reason": "scan already running"
+        }
+    
     try:
         logger.warning("🚨 EMERGENCY position safety scan initiated...")
         
         # Run emergency scan
-        results = asyncio.run(position_safety_service.scan_and_protect_positions())
+        results = run_coroutine(position_safety_service.scan_and_protect_positions(), timeout=EMERGENCY_SCAN_TIMEOUT_SECONDS)
         
         # Log critical results
         if results["force_closures"] > 0:
@@ -89,9 +108,7 @@ def emergency_position_scan_task(self):
         }
         
     except Exception as e:
-        logger.critical(f"CRITICAL: Emergency position scan failed: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.critical(f"CRITICAL: Emergency position scan failed: {e}", exc_info=True)
         
         # Don't retry emergency scans, log and alert
         return {
@@ -99,6 +116,8 @@ def emergency_position_scan_task(self):
             "timestamp": datetime.utcnow().isoformat(),
             "error": str(e)
         }
+    finally:
+        cache_client.delete(running_key)
 
 
 @celery_app.task(name="check_unprotected_position")
@@ -110,32 +129,38 @@ def check_unprotected_position_task(trade_id: int):
     try:
         logger.info(f"🔍 Checking position safety for Trade ID: {trade_id}")
         
-        from app.core.database import get_db
+        from app.core.database import session_scope
         from app.models.trading import Trade
         
-        db_gen = get_db()
-        db = next(db_gen)
-        
-        try:
+        with session_scope() as db:
             trade = db.query(Trade).filter(Trade.id == trade_id).first()
             if not trade:
                 logger.error(f"Trade not found: {trade_id}")
                 return {"status": "trade_not_found", "trade_id": trade_id}
             
-            # Check if this position needs immediate attention
-            age_hours = (datetime.utcnow() - trade.created_at.replace(tzinfo=None)).total_seconds() / 3600
+            # Only failed stop losses can need attention
+            if not trade.stop_loss_failed:
+                return {"status": "position_ok", "trade_id": trade_id}
             
-            if trade.stop_loss_failed and age_hours > 0.25:  # 15 minutes
+            age = datetime.utcnow() - trade.created_at.replace(tzinfo=None)
+            age_hours = age.total_seconds() / 3600
+            
+            if age > STOP_LOSS_ATTENTION_AGE:
                 logger.warning(f"Position needs immediate attention - Trade ID: {trade_id}, Age: {age_hours:.2f}h")
                 
-                # Trigger emergency scan
-                emergency_position_scan_task.delay()
+                # Trigger emergency scan unless one was already dispatched in this window
+                scan_triggered = cache_client.set_if_absent(
+                    get_cache_key_for_emergency_scan_queued(), 1,
+                    ttl_seconds=EMERGENCY_SCAN_DISPATCH_WINDOW_SECONDS
+                )
+                if scan_triggered:
+                    emergency_position_scan_task.delay()
                 
                 return {
                     "status": "needs_attention",
                     "trade_id": trade_id,
                     "age_hours": age_hours,
-                    "emergency_scan_triggered": True
+                    "emergency_scan_triggered": scan_triggered
                 }
             
             return {
@@ -144,9 +169,6 @@ def check_unprotected_position_task(trade_id: int):
                 "age_hours": age_hours
             }
             
-        finally:
-            db.close()
-            
     except Exception as e:
         logger.error(f"Error checking position safety for Trade ID {trade_id}: {e}")
         return {
@@ -2,99 +2,173 @@
 Celery tasks for position management and real-time P&L calculations
 """
 
-from celery import shared_task
+from celery import shared_task, chord
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, or_, select, delete, func, insert, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from typing import Dict, Any, List
-from datetime import datetime
+from datetime import date, datetime, timedelta
 import asyncio
 
-from app.core.database import SessionLocal
+from app.core.config import settings
+from app.core.database import get_session_maker, session_scope
+from app.core.worker_loop import run_coroutine
 from app.core.celery import celery_app
-from app.models.trading import Position
+from app.models.trading import Position, PerformanceRecord, Trade
 from app.models.user import User
-from app.services.position_service import PositionService
+from app.services.position_service import position_service
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Upper bound on one user's price refresh so a hung exchange call cannot pin the worker
+USER_PRICE_UPDATE_TIMEOUT_SECONDS = 60
+# Users refreshed at once; each holds a pooled connection while awaiting the exchange,
+# and a blocked checkout would stall the whole loop, so stay within the base pool
+POSITION_UPDATE_CONCURRENCY = min(32, settings.DATABASE_POOL_SIZE)
+# Users per update_position_price_chunk subtask
+POSITION_UPDATE_CHUNK_SIZE = 50
+# Users fetched per server-side cursor round trip by calculate_daily_pnl_records
+USER_BATCH_SIZE = 500
+# Rows removed per transaction by cleanup_old_performance_records
+PERFORMANCE_RECORD_DELETE_CHUNK_SIZE = 5000
+
+
+async def _update_users_concurrently(user_ids: List[int]) -> List[Any]:
+    """
+    Refresh every user's positions concurrently on the worker loop.
+    Each user gets a private session so one user's commit or rollback never touches
+    another's pending updates. Failures come back in place as exceptions.
+    """
+    semaphore = asyncio.Semaphore(POSITION_UPDATE_CONCURRENCY)
+    session_maker = get_session_maker()
+    
+    async def update_one(user_id: int) -> Dict[str, Any]:
+        async with semaphore:
+            user_db = session_maker()
+            try:
+                return await asyncio.wait_for(
+                    position_service.update_position_prices(user_db, user_id),
+                    timeout=USER_PRICE_UPDATE_TIMEOUT_SECONDS
+                )
+            finally:
+                user_db.close()
+    
+    return await asyncio.gather(*(update_one(user_id) for user_id in user_ids), return_exceptions=True)
+
+
+def _chunked(items: List[int], size: int) -> List[List[int]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
 
 @celery_app.task(name="tasks.update_all_position_prices")
 def update_all_position_prices() -> Dict[str, Any]:
     """
     Scheduled task to update current prices for all open positions across all users
+    Users are split into chunks refreshed by update_position_price_chunk subtasks so
+    the work spreads over the worker pool; aggregate_position_results sums them up
     """
-    db = SessionLocal()
-    try:
-        logger.info("Starting global position price update task")
+    with session_scope() as db:
+        try:
+            logger.info("Starting global position price update task")
         
-        # Get all users with open positions
-        users_with_positions = db.query(User.id).join(Position).filter(
-            Position.is_open == True
-        ).distinct().all()
+            # Every user with open positions; prices move whether or not positions changed,
+            # so each tick refreshes them all
+            user_ids = [row[0] for row in db.query(Position.user_id).filter(
+                Position.is_open == True
+            ).distinct()]
         
-        results = {
-            'total_users': len(users_with_positions),
-            'total_updated_positions': 0,
-            'total_unrealized_pnl': 0.0,
-            'user_results': [],
-            'errors': 0
-        }
+            chunks = _chunked(user_ids, POSITION_UPDATE_CHUNK_SIZE)
+            if chunks:
+                # One message per chunk of users; the chord header publishes them all through a
+                # single pooled producer, so the enqueue costs one broker round trip per chunk
+                chord(update_position_price_chunk.s(chunk) for chunk in chunks)(aggregate_position_results.s())
         
-        position_service = PositionService()
+            logger.info(f"Dispatched position price updates for {len(user_ids)} users in {len(chunks)} chunks")
         
-        for user_tuple in users_with_positions:
-            user_id = user_tuple[0]
-            try:
-                # Run async function in event loop
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                
-                update_result = loop.run_until_complete(
-                    position_service.update_position_prices(db, user_id)
-                )
-                
-                loop.close()
-                
-                user_result = {
-                    'user_id': user_id,
-                    'updated_positions': update_result.get('updated_positions', 0),
-                    'unrealized_pnl': update_result.get('total_unrealized_pnl', 0.0),
-                    'timestamp': update_result.get('timestamp')
-                }
-                
-                results['user_results'].append(user_result)
-                results['total_updated_positions'] += update_result.get('updated_positions', 0)
-                results['total_unrealized_pnl'] += update_result.get('total_unrealized_pnl', 0.0)
-                
-                logger.info(f"Updated {update_result.get('updated_positions', 0)} positions for user {user_id}")
-                
-            except Exception as e:
-                logger.error(f"Error updating positions for user {user_id}: {e}")
-                results['errors'] += 1
-                results['user_results'].append({
-                    'user_id': user_id,
-                    'error': str(e),
-                    'updated_positions': 0,
-                    'unrealized_pnl': 0.0
-                })
+            return {
+                'total_users': len(user_ids),
+                'dispatched_chunks': len(chunks),
+                'errors': 0
+            }
         
-        logger.info(f"Global position update completed: {results['total_updated_positions']} positions updated across {results['total_users']} users")
+        except Exception as e:
+            logger.error(f"Error in global position price update task: {e}")
+            return {
+                'total_users': 0,
+                'dispatched_chunks': 0,
+                'errors': 1,
+                'error_message': str(e)
+            }
+
+
+@celery_app.task(name="tasks.update_position_price_chunk")
+def update_position_price_chunk(user_ids: List[int]) -> Dict[str, Any]:
+    """
+    Update position prices for one chunk of users dispatched by update_all_position_prices
+    """
+    results = {
+        'total_users': len(user_ids),
+        'total_updated_positions': 0,
+        'user_results': [],
+        'errors': 0
+    }
+    
+    try:
+        outcomes = run_coroutine(_update_users_concurrently(user_ids))
+    except Exception as e:
+        logger.error(f"Error updating position chunk of {len(user_ids)} users: {e}")
+        outcomes = [e] * len(user_ids)
+    
+    for user_id, outcome in zip(user_ids, outcomes):
+        if isinstance(outcome, BaseException):
+            logger.error(f"Error updating positions for user {user_id}: {outcome!r}")
+            results['errors'] += 1
+            results['user_results'].append({
+                'user_id': user_id,
+                'error': str(outcome),
+                'updated_positions': 0,
+                'unrealized_pnl': 0.0
+            })
+            continue
         
-        return results
+        results['user_results'].append({
+            'user_id': user_id,
+            'updated_positions': outcome.get('updated_positions', 0),
+            'unrealized_pnl': outcome.get('total_unrealized_pnl', 0.0),
+            'timestamp': outcome.get('timestamp')
+        })
+        results['total_updated_positions'] += outcome.get('updated_positions', 0)
         
+        logger.info(f"Updated {outcome.get('updated_positions', 0)} positions for user {user_id}")
+    
+    return results
+
+
+@celery_app.task(name="tasks.aggregate_position_results")
+def aggregate_position_results(chunk_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Chord callback combining the per-chunk results of update_all_position_prices"""
+    results = {
+        'total_users': sum(r['total_users'] for r in chunk_results),
+        'total_updated_positions': sum(r['total_updated_positions'] for r in chunk_results),
+        'total_unrealized_pnl': 0.0,
+        'user_results': [user_result for r in chunk_results for user_result in r['user_results']],
+        'errors': sum(r['errors'] for r in chunk_results)
+    }
+    
+    # Every chunk has written its prices back, so the global total is one SUM over open positions
+    try:
+        with session_scope() as db:
+            results['total_unrealized_pnl'] = db.query(
+                func.coalesce(func.sum(Position.unrealized_pnl), 0.0)
+            ).filter(Position.is_open == True).scalar()
     except Exception as e:
-        logger.error(f"Error in global position price update task: {e}")
-        return {
-            'total_users': 0,
-            'total_updated_positions': 0,
-            'total_unrealized_pnl': 0.0,
-            'user_results': [],
-            'errors': 1,
-            'error_message': str(e)
-        }
-    finally:
-        db.close()
+        logger.error(f"Error summing unrealized P&L: {e}")
+        results['errors'] += 1
+    
+    logger.info(f"Global position update completed: {results['total_updated_positions']} positions updated across {results['total_users']} users")
+    
+    return results
 
 
 @celery_app.task(name="tasks.update_user_position_prices")
@@ -102,44 +176,70 @@ def update_user_position_prices(user_id: int) -> Dict[str, Any]:
     """
     Update position prices for a specific user
     """
-    db = SessionLocal()
-    try:
-        logger.info(f"Starting position price update for user {user_id}")
-        
-        position_service = PositionService()
-        
-        # Run async function in event loop
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+    with session_scope() as db:
+        try:
+            logger.info(f"Starting position price update for user {user_id}")
         
-        update_result = loop.run_until_complete(
-            position_service.update_position_prices(db, user_id)
-        )
-        
-        loop.close()
+            update_result = run_coroutine(
+                position_service.update_position_prices(db, user_id),
+                timeout=USER_PRICE_UPDATE_TIMEOUT_SECONDS
+            )
         
-        logger.info(f"Position update completed for user {user_id}: {update_result.get('updated_positions', 0)} positions updated")
+            logger.info(f"Position update completed for user {user_id}: {update_result.get('updated_positions', 0)} positions updated")
         
-        return {
-            'success': True,
-            'user_id': user_id,
-            'updated_positions': update_result.get('updated_positions', 0),
-            'total_unrealized_pnl': update_result.get('total_unrealized_pnl', 0.0),
-            'position_updates': update_result.get('position_updates', []),
-            'timestamp': update_result.get('timestamp')
-        }
+            return {
+                'success': True,
+                'user_id': user_id,
+                'updated_positions': update_result.get('updated_positions', 0),
+                'total_unrealized_pnl': update_result.get('total_unrealized_pnl', 0.0),
+                'position_updates': update_result.get('position_updates', []),
+                'timestamp': update_result.get('timestamp')
+            }
         
-    except Exception as e:
-        logger.error(f"Error updating positions for user {user_id}: {e}")
-        return {
-            'success': False,
-            'user_id': user_id,
-            'error': str(e),
-            'updated_positions': 0,
-            'total_unrealized_pnl': 0.0
-        }
-    finally:
-        db.close()
+        except Exception as e:
+            logger.error(f"Error updating positions for user {user_id}: {e}")
+            return {
+                'success': False,
+                'user_id': user_id,
+                'error': str(e),
+                'updated_positions': 0,
+                'total_unrealized_pnl': 0.0
+            }
+
+
+def _upsert_performance_records(db: Session, rows: List[Dict[str, Any]], day: date) -> None:
+    """
+    Write one day's PerformanceRecord rows; reruns on the same day refresh the P&L columns
+    Postgres gets a single INSERT ... ON CONFLICT. Other dialects fall back to one
+    executemany INSERT for new rows and one bulk UPDATE by primary key for existing ones
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        stmt = pg_insert(PerformanceRecord).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PerformanceRecord.user_id, PerformanceRecord.date],
+            set_={
+                'daily_pnl': stmt.excluded.daily_pnl,
+                'ending_balance': stmt.excluded.ending_balance
+            }
+        )
+        db.execute(stmt)
+        return
+    
+    existing_ids = dict(db.execute(
+        select(PerformanceRecord.user_id, PerformanceRecord.id).where(
+            PerformanceRecord.user_id.in_([row['user_id'] for row in rows]),
+            PerformanceRecord.date == day
+        )
+    ).all())
+    new_rows = [row for row in rows if row['user_id'] not in existing_ids]
+    updates = [
+        {'id': existing_ids[row['user_id']], 'daily_pnl': row['daily_pnl'], 'ending_balance': row['ending_balance']}
+        for row in rows if row['user_id'] in existing_ids
+    ]
+    if new_rows:
+        db.execute(insert(PerformanceRecord), new_rows)
+    if updates:
+        db.execute(update(PerformanceRecord), updates)
 
 
 @celery_app.task(name="tasks.calculate_daily_pnl_records")
@@ -147,89 +247,92 @@ def calculate_daily_pnl_records() -> Dict[str, Any]:
     """
     Daily task to calculate and store P&L records for all users
     """
-    db = SessionLocal()
-    try:
-        logger.info("Starting daily P&L record calculation")
+    with session_scope() as db:
+        try:
+            logger.info("Starting daily P&L record calculation")
         
-        # Get all users with positions or trades
-        users = db.query(User).all()
+            # Get active users with an open position or a trade in the last 24 hours
+            since = datetime.utcnow() - timedelta(hours=24)
+            has_open_position = db.query(Position.id).filter(
+                Position.user_id == User.id,
+                Position.is_open == True
+            ).exists()
+            has_recent_trade = db.query(Trade.id).filter(
+                Trade.user_id == User.id,
+                Trade.created_at > since
+            ).exists()
+            active_user_ids = db.execute(
+                select(User.id).where(
+                    User.is_active == True,
+                    or_(has_open_position, has_recent_trade)
+                ).execution_options(yield_per=USER_BATCH_SIZE)
+            ).scalars()
         
-        results = {
-            'total_users': len(users),
-            'records_created': 0,
-            'errors': 0,
-            'user_results': []
-        }
+            results = {
+                'total_users': 0,
+                'records_created': 0,
+                'errors': 0,
+                'user_results': []
+            }
         
-        position_service = PositionService()
-        today = datetime.utcnow().date()
+            today = datetime.utcnow().date()
         
-        for user in users:
-            try:
-                # Get P&L summary for the user
-                pnl_summary = position_service.get_portfolio_pnl_summary(db, user.id)
-                
-                # Check if record already exists for today
-                from app.models.trading import PerformanceRecord
-                existing_record = db.query(PerformanceRecord).filter(
-                    and_(
-                        PerformanceRecord.user_id == user.id,
-                        PerformanceRecord.date == today
-                    )
-                ).first()
-                
-                if existing_record:
-                    # Update existing record
-                    existing_record.daily_pnl = pnl_summary.get('daily_pnl', 0.0)
-                    existing_record.ending_balance = pnl_summary.get('total_pnl', 0.0)
-                    logger.info(f"Updated existing P&L record for user {user.id}")
-                else:
-                    # Create new record
-                    performance_record = PerformanceRecord(
-                        user_id=user.id,
-                        date=today,
-                        starting_balance=0.0,  # Will be updated by exchange service
-                        ending_balance=pnl_summary.get('total_pnl', 0.0),
-                        daily_pnl=pnl_summary.get('daily_pnl', 0.0),
-                        total_trades=0,  # Will be calculated separately
-                        winning_trades=0,
-                        losing_trades=0,
-                        win_rate=0.0
-                    )
-                    db.add(performance_record)
-                    results['records_created'] += 1
-                    logger.info(f"Created new P&L record for user {user.id}")
-                
-                results['user_results'].append({
-                    'user_id': user.id,
-                    'daily_pnl': pnl_summary.get('daily_pnl', 0.0),
-                    'total_pnl': pnl_summary.get('total_pnl', 0.0),
-                    'active_positions': pnl_summary.get('active_positions_count', 0)
-                })
-                
-            except Exception as e:
-                logger.error(f"Error calculating P&L record for user {user.id}: {e}")
-                results['errors'] += 1
+            # Users stream from a server-side cursor; each batch is summarised and upserted together
+            for user_ids in active_user_ids.partitions():
+                results['total_users'] += len(user_ids)
+            
+                # P&L summaries for the whole batch in two grouped queries
+                summaries = position_service.get_portfolio_pnl_summary_bulk(db, list(user_ids))
+            
+                rows = []
+                for user_id in user_ids:
+                    try:
+                        pnl_summary = summaries[user_id]
+                    
+                        rows.append({
+                            'user_id': user_id,
+                            'date': today,
+                            'starting_balance': 0.0,  # Will be updated by exchange service
+                            'ending_balance': pnl_summary.get('total_pnl', 0.0),
+                            'daily_pnl': pnl_summary.get('daily_pnl', 0.0),
+                            'total_trades': 0,  # Will be calculated separately
+                            'winning_trades': 0,
+                            'losing_trades': 0,
+                            'win_rate': 0.0
+                        })
+                    
+                        results['user_results'].append({
+                            'user_id': user_id,
+                            'daily_pnl': pnl_summary.get('daily_pnl', 0.0),
+                            'total_pnl': pnl_summary.get('total_pnl', 0.0),
+                            'active_positions': pnl_summary.get('active_positions_count', 0)
+                        })
+                    
+                    except Exception as e:
+                        logger.error(f"Error calculating P&L record for user {user_id}: {e}")
+                        results['errors'] += 1
+            
+                if rows:
+                    _upsert_performance_records(db, rows, today)
+                    results['records_created'] += len(rows)
         
-        # Commit all changes
-        db.commit()
+            # Commit all changes
+            db.commit()
         
-        logger.info(f"Daily P&L calculation completed: {results['records_created']} records created/updated")
+            logger.info(f"Daily P&L calculation completed: {results['records_created']} records created/updated")
         
-        return results
+            return results
         
-    except Exception as e:
-        logger.error(f"Error in daily P&L calculation task: {e}")
-        db.rollback()
-        return {
-            'total_users': 0,
-            'records_created': 0,
-            'errors': 1,
-            'error_message': str(e),
-            'user_results': []
-        }
-    finally:
-        db.close()
+        except Exception as e:
+            logger.error(f"Error in daily P&L calculation task: {e}")
+            db.rollback()
+            return {
+                'total_users': 0,
+                'records_created': 0,
+                'errors': 1,
+                'error_message': str(e),
+                'user_results': []
+            }
 
 
 @celery_app.task(name="tasks.cleanup_old_performance_records")
@@ -237,38 +340,42 @@ def cleanup_old_performance_records(days_to_keep: int = 365) -> Dict[str, Any]:
     """
     Clean up old performance records to maintain database size
     """
-    db = SessionLocal()
-    try:
-        logger.info(f"Starting cleanup of performance records older than {days_to_keep} days")
-        
-        from app.models.trading import PerformanceRecord
-        from datetime import timedelta
+    with session_scope() as db:
+        try:
+            logger.info(f"Starting cleanup of performance records older than {days_to_keep} days")
         
-        cutoff_date = datetime.utcnow().date() - timedelta(days=days_to_keep)
+            cutoff_date = datetime.utcnow().date() - timedelta(days=days_to_keep)
         
-        # Delete old records
-        deleted_count = db.query(PerformanceRecord).filter(
-            PerformanceRecord.date < cutoff_date
-        ).delete()
+            # Delete old records a chunk at a time, committing each chunk so no single
+            # transaction holds locks on the whole range
+            deleted_count = 0
+            while True:
+                expired_ids = select(PerformanceRecord.id).where(
+                    PerformanceRecord.date < cutoff_date
+                ).limit(PERFORMANCE_RECORD_DELETE_CHUNK_SIZE)
+                deleted = db.execute(
+                    delete(PerformanceRecord).where(PerformanceRecord.id.in_(expired_ids)),
+                    execution_options={"synchronize_session": False}
+                ).rowcount
+                db.commit()
+                deleted_count += deleted
+                if deleted < PERFORMANCE_RECORD_DELETE_CHUNK_SIZE:
+                    break
         
-        db.commit()
+            logger.info(f"Cleanup completed: {deleted_count} old performance records deleted")
         
-        logger.info(f"Cleanup completed: {deleted_count} old performance records deleted")
+            return {
+                'success': True,
+                'deleted_records': deleted_count,
+                'cutoff_date': cutoff_date.isoformat(),
+                'days_kept': days_to_keep
+            }
         
-        return {
-            'success': True,
-            'deleted_records': deleted_count,
-            'cutoff_date': cutoff_date.isoformat(),
-            'days_kept': days_to_keep
-        }
-        
-    except Exception as e:
-        logger.error(f"Error in performance records cleanup: {e}")
-        db.rollback()
-        return {
-            'success': False,
-            'error': str(e),
-            'deleted_records': 0
-        }
-    finally:
-        db.close() 
\ No newline at end of file
+        except Exception as e:
+            logger.error(f"Error in performance records cleanup: {e}")
+            db.rollback()
+            return {
+                'success': False,
+                'error': str(e),
+                'deleted_records': 0
+            }
@@ -6,16 +6,31 @@ Automated trade analytics processing and monitoring
 from celery import Celery
 from app.core.celery import celery_app
 from app.core.database import SessionLocal
+from app.core.cache import cache_client, get_cache_key_for_db_health
 from app.services.trade_analytics_service import TradeAnalyticsService
 from app.models.user import User
 from app.core.logging import get_logger
+from sqlalchemy import select, text
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List
 import traceback
 
 logger = get_logger(__name__)
 
+# Users fetched per server-side cursor round trip and analysed per batched bundle
+USER_BATCH_SIZE = 500
+# How long one database connectivity probe answers for every health check
+DB_HEALTH_PROBE_TTL_SECONDS = 30
+
+def _iter_active_user_id_batches(db: Session, batch_size: int = USER_BATCH_SIZE) -> Iterator[List[int]]:
+    """Stream active user ids from a server-side cursor, batch_size ids at a time"""
+    result = db.execute(
+        select(User.id).where(User.is_active == True).execution_options(yield_per=batch_size)
+    )
+    for partition in result.scalars().partitions():
+        yield list(partition)
+
 @celery_app.task(bind=True, name="trade_analytics.update_real_time_metrics")
 def update_real_time_metrics(self) -> Dict[str, Any]:
     """
@@ -36,36 +51,24 @@ def update_real_time_metrics(self) -> Dict[str, Any]:
     }
     
     try:
-        # Get all active users
-        active_users = db.query(User).filter(User.is_active == True).all()
-        
         analytics_service = TradeAnalyticsService(db)
         processed_count = 0
+        total_users = 0
         
-        for user in active_users:
-            try:
-                # Update real-time metrics for each user
-                metrics = analytics_service.get_real_time_trade_metrics(user.id)
-                
-                if "error" not in metrics:
-                    processed_count += 1
-                    logger.debug(f"✅ Updated metrics for user {user.id}")
-                else:
-                    result["errors"].append(f"User {user.id}: {metrics['error']}")
-                    
-            except Exception as e:
-                error_msg = f"User {user.id}: {str(e)}"
-                result["errors"].append(error_msg)
-                logger.error(f"❌ Error processing user {user.id}: {e}")
+        # Each batch of active users refreshes its cached real-time metrics in one pass
+        for user_ids in _iter_active_user_id_batches(db):
+            total_users += len(user_ids)
+            bundle = analytics_service.compute_user_analytics_bundle(user_ids, include_daily_report=False)
+            processed_count += len(bundle)
         
         result.update({
             "status": "completed",
             "users_processed": processed_count,
-            "total_users": len(active_users),
+            "total_users": total_users,
             "end_time": datetime.utcnow().isoformat()
         })
         
-        logger.info(f"✅ Real-time metrics update completed - {processed_count}/{len(active_users)} users processed")
+        logger.info(f"✅ Real-time metrics update completed - {processed_count}/{total_users} users processed")
         return result
         
     except Exception as e:
@@ -102,41 +105,33 @@ def generate_daily_reports(self) -> Dict[str, Any]:
     }
     
     try:
-        # Get all active users
-        active_users = db.query(User).filter(User.is_active == True).all()
-        
         analytics_service = TradeAnalyticsService(db)
         reports_generated = 0
+        total_users = 0
         
-        for user in active_users:
-            try:
-                # Generate comprehensive daily report
-                daily_report = analytics_service.get_enhanced_trade_counts(user.id, 1)  # Last 24 hours
+        for user_ids in _iter_active_user_id_batches(db):
+            total_users += len(user_ids)
+            bundle = analytics_service.compute_user_analytics_bundle(user_ids)
+            
+            for user_id, analytics in bundle.items():
+                # Comprehensive daily report for the last 24 hours
+                daily_report = analytics["daily_report"]
+                reports_generated += 1
+                logger.debug(f"✅ Generated daily report for user {user_id}")
                 
-                if "error" not in daily_report:
-                    reports_generated += 1
-                    logger.debug(f"✅ Generated daily report for user {user.id}")
-                    
-                    # Log significant activity if any
-                    if daily_report["summary"]["total_trades"] > 0:
-                        logger.info(f"📈 User {user.id} daily activity: {daily_report['summary']['total_trades']} trades, "
-                                  f"{daily_report['summary']['success_rate']:.1%} success rate")
-                else:
-                    result["errors"].append(f"User {user.id}: {daily_report['error']}")
-                    
-            except Exception as e:
-                error_msg = f"User {user.id}: {str(e)}"
-                result["errors"].append(error_msg)
-                logger.error(f"❌ Error generating report for user {user.id}: {e}")
+                # Log significant activity if any
+                if daily_report["summary"]["total_trades"] > 0:
+                    logger.info(f"📈 User {user_id} daily activity: {daily_report['summary']['total_trades']} trades, "
+                              f"{daily_report['summary']['success_rate']:.1%} success rate")
         
         result.update({
             "status": "completed",
             "reports_generated": reports_generated,
-            "total_users": len(active_users),
+            "total_users": total_users,
             "end_time": datetime.utcnow().isoformat()
         })
         
-        logger.info(f"✅ Daily reports generation completed - {reports_generated}/{len(active_users)} reports generated")
+        logger.info(f"✅ Daily reports generation completed - {reports_generated}/{total_users} reports generated")
         return result
         
     except Exception as e:
@@ -173,71 +168,66 @@ def activity_monitor(self) -> Dict[str, Any]:
     }
     
     try:
-        # Get all active users
-        active_users = db.query(User).filter(User.is_active == True).all()
-        
         analytics_service = TradeAnalyticsService(db)
         monitored_count = 0
+        total_users = 0
         
-        for user in active_users:
-            try:
-                # Get real-time metrics
-                metrics = analytics_service.get_real_time_trade_metrics(user.id)
-                
-                if "error" not in metrics:
-                    monitored_count += 1
-                    
-                    # Check for unusual activity patterns
-                    real_time_data = metrics["real_time_counts"]
-                    
+        for user_ids in _iter_active_user_id_batches(db):
+            total_users += len(user_ids)
+            
+            # Only users that trip a threshold come back from the database
+            monitored_count += len(user_ids)
+            for real_time_data in analytics_service.find_alert_candidates(user_ids):
+                user_id = real_time_data["user_id"]
+                try:
                     # Alert on high failure rate
-                    recent_failures = real_time_data.get("recent_failures", 0)
-                    trades_last_hour = real_time_data.get("trades_last_hour", 0)
+                    recent_failures = real_time_data["recent_failures"]
+                    trades_last_hour = real_time_data["trades_last_hour"]
                     
                     if trades_last_hour > 0 and recent_failures / trades_last_hour > 0.5:
                         alert = {
-                            "user_id": user.id,
+                            "user_id": user_id,
                             "type": "high_failure_rate",
                             "message": f"High failure rate: {recent_failures}/{trades_last_hour} trades failed in last hour",
                             "severity": "warning"
                         }
                         result["alerts_triggered"].append(alert)
-                        logger.warning(f"⚠️ High failure rate for user {user.id}: {recent_failures}/{trades_last_hour}")
+                        logger.warning(f"⚠️ High failure rate for user {user_id}: {recent_failures}/{trades_last_hour}")
                     
                     # Alert on very high activity
-                    if real_time_data.get("trades_last_5min", 0) > 10:
+                    if real_time_data["trades_last_5min"] > 10:
                         alert = {
-                            "user_id": user.id,
+                            "user_id": user_id,
                             "type": "very_high_activity",
                             "message": f"Very high activity: {real_time_data['trades_last_5min']} trades in last 5 minutes",
                             "severity": "info"
                         }
                         result["alerts_triggered"].append(alert)
-                        logger.info(f"🚀 Very high activity for user {user.id}")
+                        logger.info(f"🚀 Very high activity for user {user_id}")
                     
                     # Alert on no activity for active users with open positions
-                    if (real_time_data.get("trades_last_24h", 0) == 0 and 
-                        real_time_data.get("active_positions", 0) > 0):
+                    if (real_time_data["trades_last_24h"] == 0 and 
+                        real_time_data["active_positions"] > 0):
                         alert = {
-                            "user_id": user.id,
+                            "user_id": user_id,
                             "type": "inactive_with_positions",
                             "message": f"No trades in 24h but has {real_time_data['active_positions']} open positions",
                             "severity": "info"
                         }
                         result["alerts_triggered"].append(alert)
-                        logger.info(f"🔒 Inactive user with positions: {user.id}")
+                        logger.info(f"🔒 Inactive user with positions: {user_id}")
                         
-            except Exception as e:
-                logger.error(f"❌ Error monitoring user {user.id}: {e}")
+                except Exception as e:
+                    logger.error(f"❌ Error monitoring user {user_id}: {e}")
         
         result.update({
             "status": "completed",
             "users_monitored": monitored_count,
-            "total_users": len(active_users),
+            "total_users": total_users,
             "end_time": datetime.utcnow().isoformat()
         })
         
-        logger.info(f"✅ Activity monitoring completed - {monitored_count}/{len(active_users)} users monitored, "
+        logger.info(f"✅ Activity monitoring completed - {monitored_count}/{total_users} users monitored, "
                    f"{len(result['alerts_triggered'])} alerts triggered")
         return result
         
@@ -277,17 +267,22 @@ def system_health_check(self) -> Dict[str, Any]:
     try:
         analytics_service = TradeAnalyticsService(db)
         
-        # Check database connectivity
-        try:
-            db.execute("SELECT 1")
-            result["health_checks"]["database"] = "healthy"
-        except Exception as e:
-            result["health_checks"]["database"] = "unhealthy"
-            result["issues_found"].append(f"Database connectivity issue: {str(e)}")
+        # Check database connectivity; concurrent health checks share one recent probe
+        db_probe = cache_client.get(get_cache_key_for_db_health())
+        if db_probe is None:
+            try:
+                db.execute(text("SELECT 1"))
+                db_probe = {"status": "healthy"}
+            except Exception as e:
+                db_probe = {"status": "unhealthy", "issue": f"Database connectivity issue: {str(e)}"}
+            cache_client.set(get_cache_key_for_db_health(), db_probe, ttl_seconds=DB_HEALTH_PROBE_TTL_SECONDS)
+        result["health_checks"]["database"] = db_probe["status"]
+        if "issue" in db_probe:
+            result["issues_found"].append(db_probe["issue"])
         
         # Check analytics service functionality
         try:
-            test_metrics = analytics_service.get_real_time_trade_metrics(None)
+            test_metrics = analytics_service.get_real_time_trade_metrics(None, refresh=True)
             if "error" not in test_metrics:
                 result["health_checks"]["analytics_service"] = "healthy"
             else:
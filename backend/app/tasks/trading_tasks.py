@@ -1,17 +1,28 @@
 import asyncio
-import time
 import logging
+from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Tuple
 from decimal import Decimal
 import pandas as pd
 
 from celery import current_task
-from sqlalchemy.orm import Session
+from celery.schedules import schedule as celery_schedule
+from redbeat import RedBeatSchedulerEntry
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import and_, or_
 
 from app.core.database import SessionLocal
+from app.core.cache import (
+    cache_client,
+    get_cache_key_for_bot_crossover_state,
+    get_cache_key_for_bot_last_bar,
+    get_cache_key_for_bot_stoploss_levels,
+    get_cache_key_for_bot_tick_lock,
+)
 from app.core.celery import celery_app
+from app.core.worker_loop import run_coroutine
+from app.tasks.activity_tasks import queue_activity
 from app.models.bot import Bot
 from app.models.trading import Trade, Position, OrderStatus
 from app.models.user import User
@@ -19,6 +30,8 @@ from app.models.exchange import ExchangeConnection
 from app.services.activity_service import ActivityService, ActivityCreate
 from app.services.strategy_service import StrategyService
 from app.trading.stop_loss import StopLossManager, StopLossConfig, StopLossType
+# Generic-strategy ticks size their stop losses with this in _bot_stop_loss
+from app.trading.stop_loss import DynamicStopLoss
 from app.core.logging import get_logger
 from app.core.database import get_db
 from app.trading.data_service import data_service
@@ -32,13 +45,29 @@ from app.services.activity_service import activity_service
 from app.models.trading import Trade, OrderStatus, Position
 from app.core.config import settings
 from app.trading.trading_service import trading_service
+from app.trading.exchanges.base import OrderType, OrderSide, Ticker
 from app.schemas.activity import ActivityCreate
 from app.trading.exchanges.factory import ExchangeFactory
-from app.trading.exchanges.base import OrderType
 from app.services.stop_loss_timeout_handler import create_stop_loss_safe, safe_dynamic_stoploss_update
 
 logger = get_logger(__name__)
 
+# Cassava trades daily bars, so its bots tick every 4 hours regardless of trade_interval_seconds
+CASSAVA_TICK_INTERVAL_SECONDS = 14400
+# Stop loss levels, last checked bars and pending crossovers only expire if a bot
+# stops ticking for this long
+BOT_TRADING_STATE_TTL_SECONDS = 7 * 24 * 3600
+# Latest-bar strategy signals per worker process, keyed by
+# (strategy, symbol, timeframe, bar time) and evicted oldest first
+BAR_SIGNAL_CACHE_SIZE = 512
+_bar_signal_cache: Dict[tuple, Dict[str, Any]] = {}
+# Order lookups in flight at once per exchange connection in sync_open_positions,
+# kept under exchange rate limits
+ORDER_FETCH_CONCURRENCY = 8
+# Per-symbol generic stop losses per worker process, keyed by bot id and
+# rebuilt when the bot's stop loss settings change
+_bot_stop_losses: Dict[int, Tuple[tuple, Dict[str, DynamicStopLoss]]] = {}
+
 @celery_app.on_after_configure.connect
 def setup_periodic_tasks(sender, **kwargs):
     # Schedule the periodic position sync task
@@ -64,31 +93,35 @@ def sync_open_positions():
     """
     db: Session = SessionLocal()
     try:
-        # Get all exchange connections
-        connections = db.query(ExchangeConnection).all()
-        
-        # Group positions by exchange connection
-        for connection in connections:
+        # Load every open position with its exchange connection in one query and
+        # group in memory, instead of one position query per connection
+        open_positions = db.query(Position).options(
+            joinedload(Position.exchange_connection)
+        ).filter(
+            Position.is_open == True
+        ).order_by(Position.exchange_connection_id).all()
+
+        positions_by_connection = defaultdict(list)
+        for db_position in open_positions:
+            if db_position.exchange_connection is not None:
+                positions_by_connection[db_position.exchange_connection_id].append(db_position)
+
+        # Exchanges are queried concurrently, one coroutine per connection
+        orders_by_position = run_coroutine(_fetch_position_orders(positions_by_connection))
+
+        for db_positions in positions_by_connection.values():
+            connection = db_positions[0].exchange_connection
             logger.info(f"Syncing positions for exchange connection: {connection.exchange_name} (ID: {connection.id})")
-            
-            # Get all open positions for this exchange connection
-            db_positions = db.query(Position).filter(
-                Position.exchange_connection_id == connection.id,
-                Position.is_open == True
-            ).all()
-            
-            if not db_positions:
-                logger.info(f"No open positions found for exchange connection {connection.id}")
-                continue
-                
             logger.info(f"Found {len(db_positions)} open positions to sync for {connection.exchange_name}")
             
             try:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                
                 positions_updated = 0
                 positions_closed = 0
+                # Closes are written with one WHERE-IN UPDATE and other row changes
+                # with one bulk UPDATE per connection
+                closed_position_ids = []
+                position_rows = []
+                now = datetime.utcnow()
                 
                 # Check each position individually using its exchange order ID
                 for db_position in db_positions:
@@ -97,10 +130,10 @@ def sync_open_positions():
                         continue
                     
                     try:
-                        # Fetch the order status from the exchange
-                        order = loop.run_until_complete(
-                            trading_service.get_order(connection.id, db_position.exchange_order_id, db_position.symbol)
-                        )
+                        # Order status fetched from the exchange above
+                        order = orders_by_position.get(db_position.id)
+                        if isinstance(order, Exception):
+                            raise order
                         
                         if order is None:
                             logger.warning(f"Order {db_position.exchange_order_id} for position {db_position.id} not found on exchange or in trade history. Skipping.")
@@ -111,88 +144,106 @@ def sync_open_positions():
                         # Update position based on order status
                         if order.status in ['closed', 'filled', 'canceled']:
                             # Order is closed, so position should be closed
-                            db_position.is_open = False
-                            db_position.closed_at = datetime.utcnow()
-                            db_position.updated_at = datetime.utcnow()
+                            closed_position_ids.append(db_position.id)
                             positions_closed += 1
                             logger.info(f"Closed position {db_position.id} ({db_position.symbol}) - order status: {order.status}")
                         else:
                             # Order is still open, update position data
-                            db_position.quantity = float(order.filled_amount) if order.filled_amount else db_position.quantity
-                            db_position.current_price = float(order.price) if order.price else db_position.current_price
-                            db_position.updated_at = datetime.utcnow()
+                            quantity = float(order.filled_amount) if order.filled_amount else db_position.quantity
+                            current_price = float(order.price) if order.price else db_position.current_price
+                            position_rows.append({
+                                'id': db_position.id,
+                                'quantity': quantity,
+                                'current_price': current_price,
+                                'updated_at': now
+                            })
                             positions_updated += 1
-                            logger.info(f"Updated position {db_position.id} ({db_position.symbol}) - quantity: {db_position.quantity}, price: {db_position.current_price}")
+                            logger.info(f"Updated position {db_position.id} ({db_position.symbol}) - quantity: {quantity}, price: {current_price}")
                     
                     except Exception as e:
                         logger.error(f"Error checking order {db_position.exchange_order_id} for position {db_position.id}: {e}")
                         continue
                 
+                if closed_position_ids:
+                    db.query(Position).filter(Position.id.in_(closed_position_ids)).update(
+                        {Position.is_open: False, Position.closed_at: now, Position.updated_at: now},
+                        synchronize_session=False
+                    )
+                if position_rows:
+                    db.bulk_update_mappings(Position, position_rows)
                 db.commit()
                 logger.info(f"Position sync completed for {connection.exchange_name}: {positions_updated} updated, {positions_closed} closed")
                 
             except Exception as e:
                 logger.error(f"Error syncing positions for exchange {connection.exchange_name}: {e}", exc_info=True)
-            finally:
-                loop.close()
                 
     except Exception as e:
         logger.error(f"Error in sync_open_positions task: {e}", exc_info=True)
     finally:
         db.close()
 
+async def _fetch_connection_orders(connection: ExchangeConnection, db_positions: List[Position]) -> Dict[int, Any]:
+    """Fetch the exchange order behind each position of one connection.
+
+    Maps position id to the order, or to the exception raised fetching it.
+    Orders are fetched concurrently, at most ORDER_FETCH_CONCURRENCY at a time.
+    """
+    semaphore = asyncio.Semaphore(ORDER_FETCH_CONCURRENCY)
+
+    async def fetch_order(db_position: Position):
+        async with semaphore:
+            return await trading_service.get_order(
+                connection.id, db_position.exchange_order_id, db_position.symbol
+            )
+
+    positions = [p for p in db_positions if p.exchange_order_id]
+    results = await asyncio.gather(*(fetch_order(p) for p in positions), return_exceptions=True)
+    return {p.id: result for p, result in zip(positions, results)}
+
+async def _fetch_position_orders(positions_by_connection: Dict[int, List[Position]]) -> Dict[int, Any]:
+    """Fetch position orders for all exchange connections concurrently"""
+    per_connection = await asyncio.gather(*(
+        _fetch_connection_orders(db_positions[0].exchange_connection, db_positions)
+        for db_positions in positions_by_connection.values()
+    ))
+    orders_by_position = {}
+    for orders in per_connection:
+        orders_by_position.update(orders)
+    return orders_by_position
+
 @celery_app.task(name="tasks.run_trading_bot_strategy", bind=True)
 def run_trading_bot_strategy(self, bot_id: int):
     """
-    Celery task to execute a trading strategy for a given bot.
+    Celery task to start a trading strategy for a given bot.
     
-    This task runs continuously while the bot is active and implements:
-    - Immediate signal search within first minute of startup
+    Registers the bot's exchange connection, performs the immediate signal
+    search, then schedules tasks.tick_trading_bot to run the bot's trading loop
+    periodically. Each tick implements:
     - Continuous trading based on strategy conditions
     - Advanced dynamic stop loss management
     - Risk management and position sizing
-    - Automatic stopping when limits are reached
+    - Automatic stopping when the bot is deactivated
     - Trade logging and activity tracking
     """
     db: Session = next(get_db())
+    tick_lock_key = None
     
     try:
-        bot = db.query(Bot).filter(Bot.id == bot_id).first()
+        bot = _load_trading_bot(db, bot_id)
         if not bot:
             logger.error(f"Bot {bot_id} not found.")
             return
+        connection = bot.exchange_connection
+        user = bot.user
 
-        # Initialize services
-        exchange_service = ExchangeService(db)
-        strategy_service = StrategyService(
-            strategy_name=bot.strategy_name,
-            exchange_service=exchange_service,
-            strategy_params={}
-        )
+        if not _ensure_exchange_connection(bot, connection):
+            return
 
-        # Initialize trading service with exchange connections
-        from app.trading.trading_service import trading_service
-        from app.models.exchange import ExchangeConnection
-        
-        # Load the exchange connection for this bot
-        connection = db.query(ExchangeConnection).filter(
-            ExchangeConnection.id == bot.exchange_connection_id
-        ).first()
-        
-        if connection:
-            # Add the exchange connection to the trading service
-            try:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                success = loop.run_until_complete(trading_service.add_exchange_connection(connection))
-                if not success:
-                    logger.error(f"Failed to add exchange connection {connection.exchange_name} to trading service")
-                    return
-                logger.info(f"Successfully added exchange connection {connection.exchange_name} to trading service")
-            finally:
-                loop.close()
-        else:
-            logger.error(f"Exchange connection {bot.exchange_connection_id} not found for bot {bot.id}")
+        # The initial scan can trade too, so it shares the tick lock
+        tick_lock_key = get_cache_key_for_bot_tick_lock(bot_id)
+        if not cache_client.set_if_absent(tick_lock_key, 1, ttl_seconds=_tick_interval_seconds(bot)):
+            logger.info(f"Trading tick for bot {bot_id} already running, skipping initial scan")
+            tick_lock_key = None
             return
 
         logger.info(f"Starting trading bot '{bot.name}' (ID: {bot.id}) with strategy '{bot.strategy_name}'.")
@@ -203,15 +254,16 @@ def run_trading_bot_strategy(self, bot_id: int):
         # Track if we've done the initial scan
         initial_scan_completed = False
         
-        for pair in bot.trading_pairs.split(','):
-            symbol = pair.strip()
-            
+        symbols = bot.symbol_list
+        signals = _generate_signals(db, bot, symbols)
+        tickers = _fetch_tickers(connection, symbols)
+
+        for symbol in symbols:
             try:
-                # Generate signal immediately
-                signal = strategy_service.generate_signal(symbol)
+                # Signal generated immediately above
+                signal = signals[symbol]
                 
                 # Log the signal result
-                user = db.query(User).filter(User.id == bot.user_id).first()
                 if user:
                     if signal == Signal.HOLD:
                         activity = ActivityCreate(
@@ -225,649 +277,892 @@ def run_trading_bot_strategy(self, bot_id: int):
                             description=f"Initial scan: Strategy '{bot.strategy_name}' generated {signal.value} signal for {symbol}",
                             amount=None
                         )
-                    activity_service.log_activity(db, user, activity)
+                    queue_activity(bot.user_id, activity)
                     logger.info(f"Initial signal scan for {symbol}: {signal.value}")
                 
                 # If we found a non-HOLD signal, execute it immediately
                 if signal != Signal.HOLD:
                     logger.info(f"Executing immediate {signal.value} signal for {symbol} from initial scan")
-                    _execute_trade(db, bot, symbol, signal)
+                    _execute_trade(db, bot, symbol, signal, connection=connection, user=user, ticker=tickers.get(symbol))
                     
             except Exception as e:
                 logger.error(f"Error during initial signal scan for {symbol}: {e}")
-                user = db.query(User).filter(User.id == bot.user_id).first()
                 if user:
                     activity = ActivityCreate(
                         type="error",
                         description=f"Error during initial signal scan for {symbol}: {e}",
                         amount=None
                     )
-                    activity_service.log_activity(db, user, activity)
+                    queue_activity(bot.user_id, activity)
         
         initial_scan_completed = True
         logger.info(f"Initial signal scan completed for bot '{bot.name}' (ID: {bot.id})")
 
-        while True:
-            # Refresh bot state from DB
-            db.refresh(bot)
-            if not bot.is_active:
-                logger.info(f"Bot '{bot.name}' (ID: {bot.id}) is no longer active. Stopping task.")
-                break
+        schedule_trading_bot(bot)
+        logger.info(f"Scheduled trading ticks for bot '{bot.name}' (ID: {bot.id}) every {_tick_interval_seconds(bot)}s")
 
-            # --- Main Trading Loop ---
-            try:
-                # --- Risk Management Checks ---
-                # 1. Check daily loss limit
-                # NOTE: PnL tracking needs to be properly implemented for this to work.
-                # daily_pnl = activity_service.get_daily_pnl(db, bot_id=bot.id)
-                # if bot.max_daily_loss and daily_pnl < -abs(bot.max_daily_loss):
-                #     logger.warning(f"Bot {bot.id} reached max daily loss. Stopping.")
-                #     bot_service.update(db, db_obj=bot, obj_in={'is_active': False})
-                #     break
-
-                # 2. Check max trades per day
-                # daily_trades = activity_service.get_daily_trade_count(db, bot_id=bot.id)
-                # if bot.max_trades_per_day and daily_trades >= bot.max_trades_per_day:
-                #     logger.info(f"Bot {bot.id} reached max trades for the day. Pausing until tomorrow.")
-                #     time.sleep(3600) # Sleep for an hour before checking again
-                #     continue
-                
-                # TODO: Re-integrate stop-loss management
-
-                # --- Stoploss tracking state ---
-                if not hasattr(bot, '_last_stoploss_levels'):
-                    bot._last_stoploss_levels = {}
+    except Exception as e:
+        logger.error(f"Fatal error in trading task for bot {bot_id}: {e}", exc_info=True)
+        # Ensure bot is marked as inactive on fatal error
+        unschedule_trading_bot(bot_id)
+        db.rollback()
+        db.query(Bot).filter(Bot.id == bot_id).update({Bot.is_active: False}, synchronize_session=False)
+        db.commit()
+    finally:
+        if tick_lock_key:
+            cache_client.delete(tick_lock_key)
+        db.close()
 
-                for pair in bot.trading_pairs.split(','):
-                    symbol = pair.strip()
-                    
-                    # --- Only check signals when a new bar is available (Cassava strategy) ---
-                    if bot.strategy_name == 'cassava_trend_following':
-                        # Determine timeframe from strategy_params or default to '1d' for Cassava
-                        strategy_params = getattr(bot, 'strategy_params', {}) or {}
-                        timeframe = strategy_params.get('timeframe', '1d')
-                        market_data = data_service.get_market_data_for_strategy(symbol, timeframe, lookback_periods=100)
-                        if market_data.empty:
-                            continue
-                        latest_bar_time = market_data.index[-1] if hasattr(market_data, 'index') else None
-                        if not hasattr(bot, '_last_checked_bar'):
-                            bot._last_checked_bar = {}
-                        last_checked = bot._last_checked_bar.get(symbol)
-                        if last_checked == latest_bar_time:
-                            # No new bar, skip signal check
-                            continue
-                        # Update last checked bar
-                        bot._last_checked_bar[symbol] = latest_bar_time
-                        strategy_service._calculate_indicators(market_data)
-                        
-                        # Check current position and exit conditions
-                        position = db.query(Position).filter_by(bot_id=bot.id, symbol=symbol, is_open=True).first()
-                        if position:
-                            latest_signal = strategy_service._check_signal(market_data, len(market_data) - 1)
-                            
-                            # Execute exit if conditions are met
-                            if position.side == 'buy' and latest_signal.get('exit_long'):
-                                logger.info(f"Cassava strategy: Exiting LONG position for {symbol} due to EMA25 exit condition")
-                                # Execute sell order to close long position
-                                _execute_trade(db, bot, symbol, Signal.SELL)
-                                continue
-                            elif position.side == 'sell' and latest_signal.get('exit_short'):
-                                logger.info(f"Cassava strategy: Exiting SHORT position for {symbol} due to EMA8 exit condition")
-                                # Execute buy order to close short position
-                                _execute_trade(db, bot, symbol, Signal.BUY)
-                                continue
-                    
-                    signal = strategy_service.generate_signal(symbol)
+@celery_app.task(name="tasks.tick_trading_bot")
+def tick_trading_bot(bot_id: int):
+    """
+    One iteration of a bot's trading loop, run periodically by the redbeat
+    entry created in schedule_trading_bot. Unschedules itself once the bot is
+    gone or no longer active.
+    """
+    db: Session = next(get_db())
 
-                    # --- Stoploss adjustment logging ---
-                    # For Cassava strategy, use its internal stoploss logic instead of generic bot stoploss
-                    if bot.strategy_name == 'cassava_trend_following':
-                        # Fetch market data for Cassava strategy stoploss calculation
-                        market_data = data_service.get_market_data_for_strategy(symbol, '1d', lookback_periods=100)
-                        
-                        # Calculate indicators for Cassava strategy
-                        strategy_service._calculate_indicators(market_data)
-                        
-                        # Get the latest signal with stoploss info from Cassava strategy
-                        latest_signal = strategy_service._check_signal(market_data, len(market_data) - 1)
-                        current_ema25 = latest_signal.get('current_ema25')
-                        
-                        # Get current stop loss for this symbol
-                        current_stoploss = bot._last_stoploss_levels.get(symbol)
-                        
-                        # Implement EMA25 trailing stop loss logic for long positions
-                        if current_ema25 is not None:
-                            # Check if we have an existing stop loss (meaning we're in a long position)
-                            if current_stoploss is not None:
-                                # We're in a long position - implement trailing stop loss logic
-                                # Only update if new EMA25 is higher than current stop loss (trailing up only)
-                                if current_ema25 > current_stoploss:
-                                    # New EMA25 is higher - update stop loss
-                                    new_stoploss = current_ema25
-                                    log_stoploss_adjustment(db, bot, symbol, new_stoploss)
-                                    bot._last_stoploss_levels[symbol] = new_stoploss
-                                    logger.info(f"Cassava strategy LONG trailing stop loss for {symbol}: {current_stoploss} -> {new_stoploss} (EMA25: {current_ema25})")
-                                else:
-                                    # New EMA25 is not higher - keep current stop loss
-                                    logger.info(f"Cassava strategy LONG stop loss for {symbol}: keeping current {current_stoploss} (EMA25: {current_ema25} <= current stop loss)")
-                            else:
-                                # No existing stop loss - this might be a new entry signal
-                                # The stop loss will be set when the BUY signal is executed
-                                logger.info(f"Cassava strategy for {symbol}: No current stop loss, EMA25: {current_ema25}")
-                    else:
-                        # Use generic bot stoploss for other strategies
-                        # Fetch market data for stoploss calculation
-                        market_data = data_service.get_market_data_for_strategy(symbol, bot.stop_loss_timeframe or '4h', lookback_periods=100)
-                        # Assume bot.stop_loss_config is available and is a StopLossConfig
-                        stop_loss_config = StopLossConfig(
-                            stop_loss_type=StopLossType.FIXED_PERCENTAGE,  # Default, replace with actual config if available
-                            percentage=getattr(bot, 'stop_loss_percent', 5.0)
-                        )
-                        stop_loss = DynamicStopLoss(stop_loss_config)
-                        # For a real implementation, set position details from DB/position
-                        # Here, we assume entry_price and side are available (mocked for now)
-                        # You may want to fetch the actual open position for this symbol
-                        position = db.query(Position).filter_by(bot_id=bot.id, symbol=symbol, is_open=True).first()
-                        if position:
-                            stop_loss.set_position(entry_price=position.entry_price, side=position.side, entry_time=position.opened_at)
-                            new_stoploss = stop_loss.calculate_stop_loss(market_data)
-                            last_stoploss = bot._last_stoploss_levels.get(symbol)
-                            if new_stoploss is not None and new_stoploss != last_stoploss:
-                                log_stoploss_adjustment(db, bot, symbol, new_stoploss)
-                                bot._last_stoploss_levels[symbol] = new_stoploss
-
-                    user = db.query(User).filter(User.id == bot.user_id).first()
-                    activity = ActivityCreate(
-                        type="signal_generated",
-                        description=f"Strategy '{bot.strategy_name}' generated signal: {signal.value} for {symbol}",
-                        amount=None
-                    )
-                    activity_service.log_activity(db, user, activity)
-
-                    if signal != Signal.HOLD:
-                        # Basic position check to avoid repeat actions
-                        # Get the exchange name from the connection
-                        connection = db.query(ExchangeConnection).filter(
-                            ExchangeConnection.id == bot.exchange_connection_id
-                        ).first()
-                        
-                        if connection:
-                            try:
-                                loop = asyncio.new_event_loop()
-                                asyncio.set_event_loop(loop)
-                                
-                                # Get balance for the specific asset
-                                balances = loop.run_until_complete(
-                                    trading_service.get_balance(connection.exchange_name, symbol.split('/')[0])
-                                )
-                                
-                                current_position = 0
-                                if balances:
-                                    # Find the balance for the specific asset
-                                    for balance in balances:
-                                        if balance.currency == symbol.split('/')[0]:
-                                            current_position = float(balance.total)
-                                            break
-                                
-                                if signal == Signal.BUY and current_position > 0:
-                                    logger.info(f"BUY signal for {symbol}, but already in position. Holding.")
-                                    continue
-                                if signal == Signal.SELL and current_position == 0:
-                                    logger.info(f"SELL signal for {symbol}, but no position to sell. Holding.")
-                                    continue
-                                    
-                            finally:
-                                loop.close()
-                        else:
-                            logger.error(f"Exchange connection {bot.exchange_connection_id} not found for bot {bot.id}")
-                            continue
+    try:
+        bot = _load_trading_bot(db, bot_id)
+        if not bot or not bot.is_active:
+            logger.info(f"Bot {bot_id} is no longer active. Stopping its trading ticks.")
+            unschedule_trading_bot(bot_id)
+            return
+        connection = bot.exchange_connection
+        user = bot.user
 
-                        _execute_trade(db, bot, symbol, signal)
+        if not _ensure_exchange_connection(bot, connection):
+            return
 
-            except Exception as e:
-                logger.error(f"Error in trading loop for bot {bot.id}: {e}", exc_info=True)
-                user = db.query(User).filter(User.id == bot.user_id).first()
-                activity = ActivityCreate(
-                    type="error",
-                    description=f"An error occurred in the trading loop: {e}",
-                    amount=None
-                )
-                activity_service.log_activity(db, user, activity)
+        # Held for at most one interval so a crashed worker cannot block later ticks
+        tick_lock_key = get_cache_key_for_bot_tick_lock(bot_id)
+        if not cache_client.set_if_absent(tick_lock_key, 1, ttl_seconds=_tick_interval_seconds(bot)):
+            logger.info(f"Trading tick for bot {bot_id} already running, skipping")
+            return
 
-            # Use appropriate sleep interval based on strategy timeframe
-            if bot.strategy_name == 'cassava_trend_following':
-                # For daily timeframe, check every 4 hours (14400 seconds)
-                sleep_interval = 14400
-            else:
-                # Use bot's configured interval for other strategies
-                sleep_interval = bot.trade_interval_seconds
-                
-            time.sleep(sleep_interval)
+        try:
+            strategy_service = _build_strategy_service(db, bot)
+            _run_trading_tick(db, bot, connection, user, strategy_service)
+        finally:
+            cache_client.delete(tick_lock_key)
 
     except Exception as e:
-        logger.error(f"Fatal error in trading task for bot {bot_id}: {e}", exc_info=True)
+        logger.error(f"Fatal error in trading tick for bot {bot_id}: {e}", exc_info=True)
         # Ensure bot is marked as inactive on fatal error
-        bot = db.query(Bot).filter(Bot.id == bot_id).first()
-        if bot:
-            bot.is_active = False
-            db.commit()
+        unschedule_trading_bot(bot_id)
+        db.rollback()
+        db.query(Bot).filter(Bot.id == bot_id).update({Bot.is_active: False}, synchronize_session=False)
+        db.commit()
     finally:
         db.close()
 
-def _execute_trade(db: Session, bot: Bot, symbol: str, signal: Signal):
-    """Calculates position size and executes a trade with Database First → Exchange → Update Database flow."""
+def _tick_interval_seconds(bot: Bot) -> int:
+    """Seconds between trading ticks for a bot"""
+    if bot.strategy_name == 'cassava_trend_following':
+        # For daily timeframe, check every 4 hours
+        return CASSAVA_TICK_INTERVAL_SECONDS
+    # Use bot's configured interval for other strategies
+    return bot.trade_interval_seconds
+
+def _tick_schedule_name(bot_id: int) -> str:
+    return f"trading-bot-tick:{bot_id}"
+
+def schedule_trading_bot(bot: Bot) -> None:
+    """Create or replace the redbeat entry that ticks a bot's trading loop"""
+    RedBeatSchedulerEntry(
+        name=_tick_schedule_name(bot.id),
+        task="tasks.tick_trading_bot",
+        schedule=celery_schedule(run_every=timedelta(seconds=_tick_interval_seconds(bot))),
+        args=[bot.id],
+        app=celery_app
+    ).save()
+
+def unschedule_trading_bot(bot_id: int) -> None:
+    """Remove a bot's trading tick entry, if any"""
+    try:
+        RedBeatSchedulerEntry(name=_tick_schedule_name(bot_id), app=celery_app).delete()
+    except Exception as e:
+        logger.error(f"Failed to unschedule trading ticks for bot {bot_id}: {e}")
+    _bot_stop_losses.pop(bot_id, None)
+
+def _get_stoploss_level(bot_id: int, symbol: str) -> Optional[float]:
+    return cache_client.get_hash_field(get_cache_key_for_bot_stoploss_levels(bot_id), symbol)
+
+def _set_stoploss_level(bot_id: int, symbol: str, level: float) -> None:
+    """Record a symbol's stop loss level where every worker ticking the bot can see it"""
+    cache_client.set_hash_field(
+        get_cache_key_for_bot_stoploss_levels(bot_id), symbol, float(level),
+        ttl_seconds=BOT_TRADING_STATE_TTL_SECONDS
+    )
+
+def _get_last_checked_bar(bot_id: int, symbol: str) -> Optional[str]:
+    return cache_client.get_hash_field(get_cache_key_for_bot_last_bar(bot_id), symbol)
+
+def _set_last_checked_bar(bot_id: int, symbol: str, bar_time: str) -> None:
+    cache_client.set_hash_field(
+        get_cache_key_for_bot_last_bar(bot_id), symbol, bar_time,
+        ttl_seconds=BOT_TRADING_STATE_TTL_SECONDS
+    )
+
+def _get_crossover_state(bot_id: int, symbol: str) -> Optional[Dict[str, Any]]:
+    return cache_client.get_hash_field(get_cache_key_for_bot_crossover_state(bot_id), symbol)
+
+def _set_crossover_state(bot_id: int, symbol: str, state: Dict[str, Any]) -> None:
+    cache_client.set_hash_field(
+        get_cache_key_for_bot_crossover_state(bot_id), symbol, state,
+        ttl_seconds=BOT_TRADING_STATE_TTL_SECONDS
+    )
+
+def _bot_stop_loss(bot: Bot, symbol: str) -> DynamicStopLoss:
+    """Return the generic stop loss for one of a bot's pairs, reused across ticks"""
+    percentage = getattr(bot, 'stop_loss_percent', 5.0)
+    fingerprint = (percentage, bot.stop_loss_timeframe)
+    cached = _bot_stop_losses.get(bot.id)
+    if cached is None or cached[0] != fingerprint:
+        cached = _bot_stop_losses[bot.id] = (fingerprint, {})
+    stop_losses = cached[1]
+    if symbol not in stop_losses:
+        stop_losses[symbol] = DynamicStopLoss(StopLossConfig(
+            stop_loss_type=StopLossType.FIXED_PERCENTAGE,  # Default, replace with actual config if available
+            percentage=percentage
+        ))
+    return stop_losses[symbol]
+
+def _load_trading_bot(db: Session, bot_id: int) -> Optional[Bot]:
+    # Bot, owner and exchange connection come back in one query and are reused
+    # for the whole tick rather than re-queried per pair
+    return db.query(Bot).options(
+        joinedload(Bot.exchange_connection),
+        joinedload(Bot.user)
+    ).filter(Bot.id == bot_id).first()
+
+def _build_strategy_service(db: Session, bot: Bot) -> StrategyService:
+    return StrategyService(
+        strategy_name=bot.strategy_name,
+        exchange_service=ExchangeService(db),
+        strategy_params={}
+    )
+
+def _ensure_exchange_connection(bot: Bot, connection: Optional[ExchangeConnection]) -> bool:
+    """Register the bot's exchange connection with this worker's trading service if needed"""
+    if not connection:
+        logger.error(f"Exchange connection {bot.exchange_connection_id} not found for bot {bot.id}")
+        return False
+    if run_coroutine(trading_service.get_exchange_by_connection_id(connection.id)) is not None:
+        return True
+    # Add the exchange connection to the trading service
+    success = run_coroutine(trading_service.add_exchange_connection(connection))
+    if not success:
+        logger.error(f"Failed to add exchange connection {connection.exchange_name} to trading service")
+        return False
+    logger.info(f"Successfully added exchange connection {connection.exchange_name} to trading service")
+    return True
+
+def _run_trading_tick(
+    db: Session,
+    bot: Bot,
+    connection: ExchangeConnection,
+    user: Optional[User],
+    strategy_service: StrategyService
+) -> None:
+    """Evaluate every trading pair of a bot once and act on the signals"""
+    # --- Main Trading Loop ---
     try:
-        # Import the trading service
-        from app.trading.trading_service import trading_service
-        from app.trading.exchanges.base import OrderType, OrderSide
+        # --- Risk Management Checks ---
+        # 1. Check daily loss limit
+        # NOTE: PnL tracking needs to be properly implemented for this to work.
+        # daily_pnl = activity_service.get_daily_pnl(db, bot_id=bot.id)
+        # if bot.max_daily_loss and daily_pnl < -abs(bot.max_daily_loss):
+        #     logger.warning(f"Bot {bot.id} reached max daily loss. Stopping.")
+        #     bot_service.update(db, db_obj=bot, obj_in={'is_active': False})
+        #     return
+
+        # 2. Check max trades per day
+        # daily_trades = activity_service.get_daily_trade_count(db, bot_id=bot.id)
+        # if bot.max_trades_per_day and daily_trades >= bot.max_trades_per_day:
+        #     logger.info(f"Bot {bot.id} reached max trades for the day. Skipping this tick.")
+        #     return
         
+        # TODO: Re-integrate stop-loss management
+
+        # One query for the bot's open positions per tick; each pair looks
+        # its position up here instead of querying per symbol
+        open_positions = {
+            p.symbol: p for p in db.query(Position).filter(
+                Position.bot_id == bot.id,
+                Position.is_open == True
+            ).all()
+        }
+        symbols = bot.symbol_list
+        bar_timeframes = ()
+        if bot.strategy_name == 'cassava_trend_following':
+            bar_timeframes = {(getattr(bot, 'strategy_params', {}) or {}).get('timeframe', '1d'), '1d'}
+        # Market data keyed by (symbol, timeframe), for every pair at once
+        tick_market_data = _fetch_market_data(symbols, bar_timeframes)
+        # Prices for every pair and the whole account balance, one request each and
+        # fetched together, but only once the tick is about to trade
+        snapshot = None
+
+        def market_snapshot() -> Tuple[Dict[str, Ticker], Optional[Dict[str, float]]]:
+            nonlocal snapshot
+            if snapshot is None:
+                snapshot = _fetch_tickers_and_balances(connection, symbols)
+            return snapshot
+
+        # Pairs that still need a signal once bar and exit checks have run
+        signal_symbols = []
+        for symbol in symbols:
+            # --- Only check signals when a new bar is available (Cassava strategy) ---
+            if bot.strategy_name == 'cassava_trend_following':
+                # Determine timeframe from strategy_params or default to '1d' for Cassava
+                strategy_params = getattr(bot, 'strategy_params', {}) or {}
+                timeframe = strategy_params.get('timeframe', '1d')
+                latest_bar_time, latest_signal = _latest_bar_signal(
+                    strategy_service, symbol, timeframe, tick_market_data
+                )
+                if latest_bar_time is None:
+                    continue
+                # Bar times are kept as strings so the state survives a JSON round trip
+                latest_bar_key = str(latest_bar_time)
+                last_checked = _get_last_checked_bar(bot.id, symbol)
+                if last_checked == latest_bar_key:
+                    # No new bar, skip signal check
+                    continue
+                # Update last checked bar
+                _set_last_checked_bar(bot.id, symbol, latest_bar_key)
+                
+                # Check current position and exit conditions
+                position = open_positions.get(symbol)
+                if position:
+                    # Execute exit if conditions are met
+                    if position.side == 'buy' and latest_signal.get('exit_long'):
+                        logger.info("Cassava strategy: Exiting LONG position for %s due to EMA25 exit condition", symbol)
+                        # Execute sell order to close long position
+                        _execute_trade(db, bot, symbol, Signal.SELL, connection=connection, user=user, ticker=market_snapshot()[0].get(symbol))
+                        continue
+                    elif position.side == 'sell' and latest_signal.get('exit_short'):
+                        logger.info("Cassava strategy: Exiting SHORT position for %s due to EMA8 exit condition", symbol)
+                        # Execute buy order to close short position
+                        _execute_trade(db, bot, symbol, Signal.BUY, connection=connection, user=user, ticker=market_snapshot()[0].get(symbol))
+                        continue
+
+            signal_symbols.append(symbol)
+
+        # Signals only for the pairs left, generated concurrently
+        signals = _generate_signals(db, bot, signal_symbols)
+
+        for symbol in signal_symbols:
+            base_asset = symbol.split('/', 1)[0]
+            signal = signals[symbol]
+
+            # --- Stoploss adjustment logging ---
+            # For Cassava strategy, use its internal stoploss logic instead of generic bot stoploss
+            if bot.strategy_name == 'cassava_trend_following':
+                # Get the latest signal with stoploss info from Cassava strategy; with the
+                # default '1d' timeframe this reuses the bar checked above
+                _, latest_signal = _latest_bar_signal(
+                    strategy_service, symbol, '1d', tick_market_data
+                )
+                current_ema25 = (latest_signal or {}).get('current_ema25')
+                
+                # Get current stop loss for this symbol
+                current_stoploss = _get_stoploss_level(bot.id, symbol)
+                
+                # Implement EMA25 trailing stop loss logic for long positions
+                if current_ema25 is not None:
+                    # Check if we have an existing stop loss (meaning we're in a long position)
+                    if current_stoploss is not None:
+                        # We're in a long position - implement trailing stop loss logic
+                        # Only update if new EMA25 is higher than current stop loss (trailing up only)
+                        if current_ema25 > current_stoploss:
+                            # New EMA25 is higher - update stop loss
+                            new_stoploss = current_ema25
+                            log_stoploss_adjustment(db, bot, symbol, new_stoploss)
+                            _set_stoploss_level(bot.id, symbol, new_stoploss)
+                            logger.info("Cassava strategy LONG trailing stop loss for %s: %s -> %s (EMA25: %s)", symbol, current_stoploss, new_stoploss, current_ema25)
+                        else:
+                            # New EMA25 is not higher - keep current stop loss
+                            logger.info("Cassava strategy LONG stop loss for %s: keeping current %s (EMA25: %s <= current stop loss)", symbol, current_stoploss, current_ema25)
+                    else:
+                        # No existing stop loss - this might be a new entry signal
+                        # The stop loss will be set when the BUY signal is executed
+                        logger.info("Cassava strategy for %s: No current stop loss, EMA25: %s", symbol, current_ema25)
+            else:
+                # Use generic bot stoploss for other strategies
+                position = open_positions.get(symbol)
+                if position:
+                    # Fetch market data for stoploss calculation
+                    market_data = data_service.get_market_data_for_strategy(symbol, bot.stop_loss_timeframe or '4h', lookback_periods=100)
+                    stop_loss = _bot_stop_loss(bot, symbol)
+                    stop_loss.set_position(entry_price=position.entry_price, side=position.side, entry_time=position.opened_at)
+                    new_stoploss = stop_loss.calculate_stop_loss(market_data)
+                    last_stoploss = _get_stoploss_level(bot.id, symbol)
+                    if new_stoploss is not None and new_stoploss != last_stoploss:
+                        log_stoploss_adjustment(db, bot, symbol, new_stoploss)
+                        _set_stoploss_level(bot.id, symbol, new_stoploss)
+
+            activity = ActivityCreate(
+                type="signal_generated",
+                description=f"Strategy '{bot.strategy_name}' generated signal: {signal.value} for {symbol}",
+                amount=None
+            )
+            queue_activity(bot.user_id, activity)
+
+            if signal != Signal.HOLD:
+                # Basic position check to avoid repeat actions
+                # Get the exchange name from the connection
+                if connection:
+                    tickers, balances_by_asset = market_snapshot()
+                    if balances_by_asset is None:
+                        logger.error(f"No account balance for bot {bot.id}. Skipping {signal.value} signal for {symbol}.")
+                        continue
+                    # Balance for the specific asset; zero balances are not listed
+                    current_position = balances_by_asset.get(base_asset, 0.0)
+                    
+                    if signal == Signal.BUY and current_position > 0:
+                        logger.info("BUY signal for %s, but already in position. Holding.", symbol)
+                        continue
+                    if signal == Signal.SELL and current_position == 0:
+                        logger.info("SELL signal for %s, but no position to sell. Holding.", symbol)
+                        continue
+                else:
+                    logger.error(f"Exchange connection {bot.exchange_connection_id} not found for bot {bot.id}")
+                    continue
+
+                _execute_trade(db, bot, symbol, signal, connection=connection, user=user, ticker=tickers.get(symbol))
+
+    except Exception as e:
+        logger.error(f"Error in trading loop for bot {bot.id}: {e}", exc_info=True)
+        activity = ActivityCreate(
+            type="error",
+            description=f"An error occurred in the trading loop: {e}",
+            amount=None
+        )
+        queue_activity(bot.user_id, activity)
+
+def _generate_signal(db: Session, bot: Bot, symbol: str) -> Signal:
+    """Generate one pair's signal, resuming the crossover wait left by earlier ticks.
+
+    StrategyService keeps a LONG crossover pending on the instance until DI+
+    confirms it, and every tick builds a new instance, so the state is loaded
+    from and saved back to the bot's crossover hash.
+    """
+    strategy_service = _build_strategy_service(db, bot)
+    crossover_state = _get_crossover_state(bot.id, symbol)
+    if crossover_state is not None:
+        strategy_service.crossover_state = crossover_state
+    signal = strategy_service.generate_signal(symbol)
+    if strategy_service.crossover_state != crossover_state:
+        _set_crossover_state(bot.id, symbol, strategy_service.crossover_state)
+    return signal
+
+def _generate_signals(db: Session, bot: Bot, symbols: Sequence[str]) -> Dict[str, Signal]:
+    """Generate every pair's signal concurrently.
+
+    Kline requests are blocking HTTP calls, so each one runs in a thread gathered
+    on the worker loop and a tick waits on the slowest pair rather than the sum
+    of all of them. Pairs run on separate StrategyService instances, so their
+    crossover state never mixes; _generate_signal carries it between ticks.
+    """
+    if not symbols:
+        return {}
+
+    async def gather_signals():
+        return await asyncio.gather(
+            *(asyncio.to_thread(_generate_signal, db, bot, symbol) for symbol in symbols)
+        )
+
+    return dict(zip(symbols, run_coroutine(gather_signals())))
+
+def _fetch_market_data(symbols: Sequence[str], bar_timeframes: Iterable[str] = ()) -> Dict[tuple, pd.DataFrame]:
+    """Market data for every pair in each of bar_timeframes, keyed by (symbol, timeframe) and fetched concurrently"""
+    data_keys = [(symbol, timeframe) for symbol in symbols for timeframe in bar_timeframes]
+    if not data_keys:
+        return {}
+
+    async def gather_market_data():
+        return await asyncio.gather(
+            *(asyncio.to_thread(data_service.get_market_data_for_strategy, symbol, timeframe, lookback_periods=100)
+              for symbol, timeframe in data_keys)
+        )
+
+    return dict(zip(data_keys, run_coroutine(gather_market_data())))
+
+def _fetch_tickers(connection: ExchangeConnection, symbols: Sequence[str]) -> Dict[str, Ticker]:
+    """Current tickers for all of a bot's pairs; pairs missing here are priced individually at trade time"""
+    try:
+        return run_coroutine(trading_service.get_tickers(list(symbols), connection.exchange_name)) or {}
+    except Exception as e:
+        logger.warning(f"Batch ticker fetch failed on {connection.exchange_name}: {e}")
+        return {}
+
+def _fetch_tickers_and_balances(
+    connection: ExchangeConnection,
+    symbols: Sequence[str]
+) -> Tuple[Dict[str, Ticker], Optional[Dict[str, float]]]:
+    """Tickers for all of a bot's pairs and its total balance per asset, fetched concurrently.
+
+    Balances are None when the account could not be read, so callers can hold
+    rather than trade on an unknown position.
+    """
+    async def gather_snapshot():
+        return await asyncio.gather(
+            trading_service.get_tickers(list(symbols), connection.exchange_name),
+            trading_service.get_balance(connection.exchange_name),
+            return_exceptions=True
+        )
+
+    tickers, balances = run_coroutine(gather_snapshot())
+    if isinstance(tickers, Exception):
+        logger.warning(f"Batch ticker fetch failed on {connection.exchange_name}: {tickers}")
+        tickers = {}
+    if isinstance(balances, Exception):
+        logger.error(f"Balance fetch failed on {connection.exchange_name}: {balances}")
+        return tickers or {}, None
+    return tickers or {}, {balance.currency: float(balance.total) for balance in balances}
+
+def _latest_bar_signal(
+    strategy_service: StrategyService,
+    symbol: str,
+    timeframe: str,
+    tick_market_data: Dict[tuple, pd.DataFrame]
+) -> Tuple[Optional[Any], Optional[Dict[str, Any]]]:
+    """Return the latest bar time and the strategy signal evaluated on it.
+
+    Market data is fetched at most once per (symbol, timeframe) per tick, and
+    indicators are only recalculated when a new bar has closed.
+    """
+    market_data = tick_market_data.get((symbol, timeframe))
+    if market_data is None:
+        market_data = data_service.get_market_data_for_strategy(symbol, timeframe, lookback_periods=100)
+        tick_market_data[(symbol, timeframe)] = market_data
+    if market_data.empty:
+        return None, None
+
+    latest_bar_time = market_data.index[-1]
+    key = (strategy_service.strategy_name, symbol, timeframe, latest_bar_time)
+    latest_signal = _bar_signal_cache.get(key)
+    if latest_signal is None:
+        strategy_service._calculate_indicators(market_data)
+        latest_signal = strategy_service._check_signal(market_data, len(market_data) - 1)
+        while len(_bar_signal_cache) >= BAR_SIGNAL_CACHE_SIZE:
+            _bar_signal_cache.pop(next(iter(_bar_signal_cache)))
+        _bar_signal_cache[key] = latest_signal
+    return latest_bar_time, latest_signal
+
+
+def _execute_trade(
+    db: Session,
+    bot: Bot,
+    symbol: str,
+    signal: Signal,
+    connection: Optional[ExchangeConnection] = None,
+    user: Optional[User] = None,
+    ticker: Optional[Ticker] = None
+) -> Optional[int]:
+    """Records the trade as PENDING and hands the exchange side off to execute_trade_on_exchange.
+
+    Only position sizing and the pending Trade insert run inside the strategy task, so
+    a slow exchange round trip no longer holds up signal generation for the other pairs.
+    Returns the id of the queued trade, or None if no trade was recorded.
+    """
+    trade_id = _create_pending_trade(db, bot, symbol, signal, connection, user, ticker)
+    if trade_id is not None:
+        execute_trade_on_exchange.delay(trade_id, signal.value)
+    return trade_id
+
+def _create_pending_trade(
+    db: Session,
+    bot: Bot,
+    symbol: str,
+    signal: Signal,
+    connection: Optional[ExchangeConnection] = None,
+    user: Optional[User] = None,
+    ticker: Optional[Ticker] = None
+) -> Optional[int]:
+    """Calculates position size and inserts the PENDING trade record, returning its id.
+
+    Callers that already hold the bot's exchange connection and owner pass them in;
+    otherwise they are resolved once through the bot's relationships, which reuse
+    rows already in the session's identity map. Likewise a ticker from the tick's
+    batched fetch is used as is, and only a missing one is fetched here.
+    """
+    try:
         # 1. Calculate position size
         # For now, we'll use a simple approach since we need to get balance from the exchange
         # In a real implementation, you'd want to get the actual balance from the exchange
         account_balance = bot.current_balance or 1000  # Default fallback
+        base_asset = symbol.split('/', 1)[0]
         position_size_usd = account_balance * (bot.max_position_size_percent / 100)
         
         # Get current price from the exchange
         # We need to get the exchange connection details first
-        from app.models.exchange import ExchangeConnection
-        connection = db.query(ExchangeConnection).filter(
-            ExchangeConnection.id == bot.exchange_connection_id
-        ).first()
+        if connection is None:
+            connection = bot.exchange_connection
+        if user is None:
+            user = bot.user
         
         if not connection:
             logger.error(f"Exchange connection {bot.exchange_connection_id} not found for bot {bot.id}")
-            return
+            return None
             
-        # Get current price using the trading service
-        import asyncio
-        try:
-            # Create a simple event loop for this sync function
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-            # Get ticker to get current price
-            ticker = loop.run_until_complete(
+        # Get ticker to get current price using the trading service
+        if ticker is None:
+            ticker = run_coroutine(
                 trading_service.get_ticker(symbol, connection.exchange_name)
             )
+        
+        if not ticker or not ticker.last_price:
+            logger.error(f"Could not fetch current price for {symbol}. Skipping trade.")
+            return None
             
-            if not ticker or not ticker.last_price:
-                logger.error(f"Could not fetch current price for {symbol}. Skipping trade.")
-                return
-                
-            current_price = float(ticker.last_price)
-            amount_to_trade = position_size_usd / current_price
+        current_price = float(ticker.last_price)
+        amount_to_trade = position_size_usd / current_price
 
-            # STEP 1: Create pending trade record in database FIRST
-            order_side = OrderSide.BUY if signal == Signal.BUY else OrderSide.SELL
+        # Create pending trade record in database FIRST
+        order_side = OrderSide.BUY if signal == Signal.BUY else OrderSide.SELL
+        
+        try:
+            pending_trade = Trade(
+                user_id=bot.user_id,
+                bot_id=bot.id,
+                exchange_connection_id=bot.exchange_connection_id,
+                symbol=symbol,
+                trade_type=bot.trade_type,  # CRITICAL FIX: Use bot's trade_type (spot/futures)
+                order_type=OrderType.MARKET.value,
+                side=order_side.value,
+                quantity=amount_to_trade,
+                price=current_price,
+                executed_price=0.0,  # Will be updated after exchange execution
+                status=OrderStatus.PENDING.value,
+                exchange_order_id=None,  # Will be updated after exchange execution
+                executed_at=None  # Will be updated after exchange execution
+            )
             
-            try:
-                pending_trade = Trade(
-                    user_id=bot.user_id,
-                    bot_id=bot.id,
-                    exchange_connection_id=bot.exchange_connection_id,
-                    symbol=symbol,
-                    trade_type=bot.trade_type,  # CRITICAL FIX: Use bot's trade_type (spot/futures)
-                    order_type=OrderType.MARKET.value,
-                    side=order_side.value,
-                    quantity=amount_to_trade,
-                    price=current_price,
-                    executed_price=0.0,  # Will be updated after exchange execution
-                    status=OrderStatus.PENDING.value,
-                    exchange_order_id=None,  # Will be updated after exchange execution
-                    executed_at=None  # Will be updated after exchange execution
+            db.add(pending_trade)
+            db.commit()
+            db.refresh(pending_trade)
+            logger.info("Pending bot trade record created in database: %s", pending_trade.id)
+            
+            # Log activity for pending trade
+            if user:
+                activity = ActivityCreate(
+                    type="BOT_TRADE_PENDING",
+                    description=f"Bot '{bot.name}' generated {signal.value} signal for {amount_to_trade:.4f} {base_asset} at market price. Status: PENDING (trade id: {pending_trade.id})",
+                    amount=amount_to_trade
                 )
-                
-                db.add(pending_trade)
-                db.commit()
-                db.refresh(pending_trade)
-                logger.info(f"Pending bot trade record created in database: {pending_trade.id}")
-                
-                # Log activity for pending trade
-                user = db.query(User).filter(User.id == bot.user_id).first()
-                if user:
-                    activity = ActivityCreate(
-                        type="BOT_TRADE_PENDING",
-                        description=f"Bot '{bot.name}' generated {signal.value} signal for {amount_to_trade:.4f} {symbol.split('/')[0]} at market price. Status: PENDING (trade id: {pending_trade.id})",
-                        amount=amount_to_trade
-                    )
-                    activity_service.log_activity(db, user, activity)
-                    logger.info(f"Activity logged for pending bot trade: {pending_trade.id}")
-                
-            except Exception as db_error:
-                logger.error(f"Failed to create pending bot trade record in database: {db_error}")
-                raise Exception(f"Failed to log bot trade in system: {db_error}")
+                queue_activity(bot.user_id, activity)
+                logger.info("Activity logged for pending bot trade: %s", pending_trade.id)
+            
+        except Exception as db_error:
+            logger.error(f"Failed to create pending bot trade record in database: {db_error}")
+            raise Exception(f"Failed to log bot trade in system: {db_error}")
 
-            # STEP 2: Execute trade on exchange
-            logger.info(f"Executing {order_side.value} {bot.trade_type} trade for {amount_to_trade:.4f} {symbol.split('/')[0]} on bot {bot.id}")
+        return pending_trade.id
 
-            # CRITICAL FIX: Pass trade_type to ensure proper exchange client selection
-            order_params = {"trade_type": bot.trade_type} if bot.trade_type == "futures" else None
+    except Exception as e:
+        logger.error(f"Failed to execute trade for bot {bot.id} on {symbol}: {e}", exc_info=True)
+        db.rollback()
+        if user:
+            activity = ActivityCreate(
+                type="error",
+                description=f"Bot '{bot.name}' failed to execute {signal.value} trade for {symbol}: {e}",
+                amount=None
+            )
+            queue_activity(bot.user_id, activity)
+        return None
+
+@celery_app.task(name="tasks.execute_trade_on_exchange")
+def execute_trade_on_exchange(trade_id: int, signal_value: str):
+    """
+    Place a PENDING bot trade on the exchange and record the outcome: trade status,
+    position, futures leverage, Cassava initial stop loss and the bot's balance.
+    Queued by _execute_trade once the pending record is committed.
+    """
+    db: Session = next(get_db())
+
+    try:
+        pending_trade = db.query(Trade).filter(Trade.id == trade_id).first()
+        if not pending_trade:
+            logger.error(f"Pending trade {trade_id} not found. Skipping exchange execution.")
+            return
+        if pending_trade.status != OrderStatus.PENDING.value:
+            logger.warning(f"Trade {trade_id} is {pending_trade.status}, not pending. Skipping exchange execution.")
+            return
+
+        bot = _load_trading_bot(db, pending_trade.bot_id)
+        if not bot:
+            logger.error(f"Bot {pending_trade.bot_id} for pending trade {trade_id} not found")
+            pending_trade.status = OrderStatus.REJECTED.value
+            db.commit()
+            return
+        connection = bot.exchange_connection
+
+        if not _ensure_exchange_connection(bot, connection):
+            pending_trade.status = OrderStatus.REJECTED.value
+            db.commit()
+            return
+
+        _place_pending_trade(db, bot, pending_trade, Signal(signal_value), connection, bot.user)
+    finally:
+        db.close()
+
+def _place_pending_trade(
+    db: Session,
+    bot: Bot,
+    pending_trade: Trade,
+    signal: Signal,
+    connection: ExchangeConnection,
+    user: Optional[User]
+):
+    """Executes a pending trade on the exchange and updates the database with the result"""
+    symbol = pending_trade.symbol
+    try:
+        account_balance = bot.current_balance or 1000  # Default fallback
+        base_asset = symbol.split('/', 1)[0]
+        current_price = pending_trade.price
+        amount_to_trade = pending_trade.quantity
+        order_side = OrderSide(pending_trade.side)
+
+        # Execute trade on exchange
+        logger.info("Executing %s %s trade for %.4f %s on bot %s", order_side.value, bot.trade_type, amount_to_trade, base_asset, bot.id)
+
+        # CRITICAL FIX: Pass trade_type to ensure proper exchange client selection
+        order_params = {"trade_type": bot.trade_type} if bot.trade_type == "futures" else None
+        
+        order_result = run_coroutine(
+            trading_service.create_order(
+                connection_id=bot.exchange_connection_id,
+                symbol=symbol,
+                order_type=OrderType.MARKET,
+                side=order_side,
+                amount=Decimal(str(amount_to_trade)),
+                price=None,  # Market order
+                params=order_params  # Pass trade_type for futures
+            )
+        )
+
+        if not order_result:
+            # Update database with failed status
+            pending_trade.status = OrderStatus.REJECTED.value
+            db.commit()
+            
+            error_message = f"Failed to create order for bot {bot.id} on {symbol}"
+            logger.error(error_message)
             
-            order_result = loop.run_until_complete(
-                trading_service.create_order(
-                    connection_id=bot.exchange_connection_id,
-                    symbol=symbol,
-                    order_type=OrderType.MARKET,
-                    side=order_side,
-                    amount=Decimal(str(amount_to_trade)),
-                    price=None,  # Market order
-                    params=order_params  # Pass trade_type for futures
+            # Log failed trade activity
+            if user:
+                activity = ActivityCreate(
+                    type="BOT_TRADE_FAILED",
+                    description=f"Bot '{bot.name}' failed to execute {signal.value} trade for {symbol}. Order creation failed. (trade id: {pending_trade.id})",
+                    amount=amount_to_trade
                 )
-            )
+                queue_activity(bot.user_id, activity)
+            
+            return
 
-            if not order_result:
-                # Update database with failed status
-                pending_trade.status = OrderStatus.REJECTED.value
-                db.commit()
-                
-                error_message = f"Failed to create order for bot {bot.id} on {symbol}"
-                logger.error(error_message)
+        # STEP 3: Update database with successful execution
+        try:
+            # Update main trade record
+            pending_trade.status = OrderStatus.FILLED.value if order_result.status == "closed" else OrderStatus.OPEN.value
+            pending_trade.executed_price = float(order_result.price) if order_result.price else current_price
+            pending_trade.exchange_order_id = str(order_result.id)
+            pending_trade.executed_at = datetime.utcnow()
+            db.commit()
+            logger.info("Bot trade record updated in database: %s", pending_trade.id)
+
+            # Create position record for successful bot trade
+            try:
+                # Check if position already exists for this order
+                existing_position = db.query(Position).filter(
+                    Position.exchange_order_id == str(order_result.id),
+                    Position.symbol == symbol,
+                    Position.user_id == bot.user_id
+                ).first()
                 
-                # Log failed trade activity
-                if user:
-                    activity = ActivityCreate(
-                        type="BOT_TRADE_FAILED",
-                        description=f"Bot '{bot.name}' failed to execute {signal.value} trade for {symbol}. Order creation failed. (trade id: {pending_trade.id})",
-                        amount=amount_to_trade
+                if existing_position:
+                    logger.warning(f"Position already exists for bot order {order_result.id} - skipping creation")
+                else:
+                    # Validate required fields before creating position
+                    if not amount_to_trade or amount_to_trade <= 0:
+                        raise ValueError(f"Invalid trade amount: {amount_to_trade}")
+                    
+                    if not order_result.price and not current_price:
+                        raise ValueError("No price available for position creation")
+                    
+                    entry_price = float(order_result.price) if order_result.price else current_price
+                    
+                    # CRITICAL FIX: Set leverage for futures bots before creating position
+                    bot_leverage = bot.leverage or (1 if bot.trade_type == "spot" else 10)
+                    
+                    if bot.trade_type == "futures":
+                        try:
+                            # Set leverage on exchange for futures bot
+                            exchange = run_coroutine(trading_service.get_exchange_by_connection_id(bot.exchange_connection_id))
+                            if exchange:
+                                leverage_set = run_coroutine(exchange.set_leverage(symbol, bot_leverage))
+                                if leverage_set:
+                                    logger.info("Bot %s: Leverage set to %sx for futures position on %s", bot.id, bot_leverage, symbol)
+                                else:
+                                    logger.warning(f"Bot {bot.id}: Failed to set leverage for {symbol}, using exchange default")
+                        except Exception as leverage_error:
+                            logger.error(f"Bot {bot.id}: Error setting leverage for {symbol}: {leverage_error}")
+                            # Don't fail the trade if leverage setting fails
+                    
+                    position = Position(
+                        user_id=bot.user_id,
+                        bot_id=bot.id,
+                        exchange_connection_id=bot.exchange_connection_id,
+                        symbol=symbol,
+                        trade_type=bot.trade_type,  # CRITICAL FIX: Use bot's trade_type
+                        side=order_side.value,
+                        quantity=amount_to_trade,
+                        entry_price=entry_price,
+                        current_price=entry_price,
+                        leverage=bot_leverage,  # CRITICAL FIX: Use bot's leverage setting
+                        exchange_order_id=str(order_result.id),  # Store the exchange order ID
+                        unrealized_pnl=0.0,  # Will be calculated later
+                        realized_pnl=0.0,
+                        total_pnl=0.0,
+                        is_open=True,
+                        opened_at=datetime.utcnow()
                     )
-                    activity_service.log_activity(db, user, activity)
-                
-                return
+                    
+                    db.add(position)
+                    db.commit()
+                    logger.info("Position record created for bot trade: %s with order ID %s", position.id, order_result.id)
 
-            # STEP 3: Update database with successful execution
-            try:
-                # Update main trade record
-                pending_trade.status = OrderStatus.FILLED.value if order_result.status == "closed" else OrderStatus.OPEN.value
-                pending_trade.executed_price = float(order_result.price) if order_result.price else current_price
-                pending_trade.exchange_order_id = str(order_result.id)
-                pending_trade.executed_at = datetime.utcnow()
-                db.commit()
-                logger.info(f"Bot trade record updated in database: {pending_trade.id}")
-
-                # Create position record for successful bot trade
-                try:
-                    # Check if position already exists for this order
-                    existing_position = db.query(Position).filter(
-                        Position.exchange_order_id == str(order_result.id),
-                        Position.symbol == symbol,
-                        Position.user_id == bot.user_id
+                    # Verify position was created successfully
+                    created_position = db.query(Position).filter(
+                        Position.id == position.id
                     ).first()
                     
-                    if existing_position:
-                        logger.warning(f"Position already exists for bot order {order_result.id} - skipping creation")
-                    else:
-                        # Validate required fields before creating position
-                        if not amount_to_trade or amount_to_trade <= 0:
-                            raise ValueError(f"Invalid trade amount: {amount_to_trade}")
-                        
-                        if not order_result.price and not current_price:
-                            raise ValueError("No price available for position creation")
-                        
-                        entry_price = float(order_result.price) if order_result.price else current_price
-                        
-                        # CRITICAL FIX: Set leverage for futures bots before creating position
-                        bot_leverage = bot.leverage or (1 if bot.trade_type == "spot" else 10)
-                        
-                        if bot.trade_type == "futures":
-                            try:
-                                # Set leverage on exchange for futures bot
-                                exchange = loop.run_until_complete(trading_service.get_exchange_by_connection_id(bot.exchange_connection_id))
-                                if exchange:
-                                    leverage_set = loop.run_until_complete(exchange.set_leverage(symbol, bot_leverage))
-                                    if leverage_set:
-                                        logger.info(f"Bot {bot.id}: Leverage set to {bot_leverage}x for futures position on {symbol}")
-                                    else:
-                                        logger.warning(f"Bot {bot.id}: Failed to set leverage for {symbol}, using exchange default")
-                            except Exception as leverage_error:
-                                logger.error(f"Bot {bot.id}: Error setting leverage for {symbol}: {leverage_error}")
-                                # Don't fail the trade if leverage setting fails
-                        
-                        position = Position(
-                            user_id=bot.user_id,
-                            bot_id=bot.id,
-                            exchange_connection_id=bot.exchange_connection_id,
-                            symbol=symbol,
-                            trade_type=bot.trade_type,  # CRITICAL FIX: Use bot's trade_type
-                            side=order_side.value,
-                            quantity=amount_to_trade,
-                            entry_price=entry_price,
-                            current_price=entry_price,
-                            leverage=bot_leverage,  # CRITICAL FIX: Use bot's leverage setting
-                            exchange_order_id=str(order_result.id),  # Store the exchange order ID
-                            unrealized_pnl=0.0,  # Will be calculated later
-                            realized_pnl=0.0,
-                            total_pnl=0.0,
-                            is_open=True,
-                            opened_at=datetime.utcnow()
-                        )
-                        
-                        db.add(position)
-                        db.commit()
-                        logger.info(f"Position record created for bot trade: {position.id} with order ID {order_result.id}")
-
-                        # Verify position was created successfully
-                        created_position = db.query(Position).filter(
-                            Position.id == position.id
-                        ).first()
-                        
-                        if not created_position:
-                            raise Exception("Position was not saved to database")
-                        
-                        # Set initial stop loss for Cassava strategy BUY trades
-                        if bot.strategy_name == 'cassava_trend_following' and signal == Signal.BUY:
-                            try:
-                                # Get D-1 EMA25 value for initial stop loss (consistency with D-1 signal generation)
-                                from app.trading.data_service import data_service
-                                market_data = data_service.get_market_data_for_strategy(symbol, '1d', lookback_periods=100)
+                    if not created_position:
+                        raise Exception("Position was not saved to database")
+                    
+                    # Set initial stop loss for Cassava strategy BUY trades
+                    if bot.strategy_name == 'cassava_trend_following' and signal == Signal.BUY:
+                        try:
+                            # Get D-1 EMA25 value for initial stop loss (consistency with D-1 signal generation)
+                            market_data = data_service.get_market_data_for_strategy(symbol, '1d', lookback_periods=100)
+                            
+                            if not market_data.empty and len(market_data) >= 2:
+                                # Calculate indicators
+                                strategy_service = _build_strategy_service(db, bot)
+                                strategy_service._calculate_indicators(market_data)
                                 
-                                if not market_data.empty and len(market_data) >= 2:
-                                    # Calculate indicators
-                                    strategy_service._calculate_indicators(market_data)
-                                    
-                                    # Get D-1 EMA25 value (second to last row for D-1 data)
-                                    ema_exit_period = strategy_service.params.get('ema_exit', 25)
-                                    ema_exit_col = f"EMA_{ema_exit_period}"
-                                    
-                                    if ema_exit_col in market_data.columns:
-                                        d1_ema25 = market_data[ema_exit_col].iloc[-2]  # D-1 EMA25
-                                        if not pd.isna(d1_ema25):
-                                            # Set initial stop loss at D-1 EMA25
-                                            bot._last_stoploss_levels[symbol] = d1_ema25
-                                            logger.info(f"Cassava strategy: Initial stop loss set for {symbol} at D-1 EMA25: {d1_ema25}")
-                                            # Log the stop loss setting
-                                            log_stoploss_adjustment(db, bot, symbol, d1_ema25)
-                                            # Log activity for stop loss setting
-                                            if user:
-                                                activity = ActivityCreate(
-                                                    type="STOP_LOSS_SET",
-                                                    description=f"Bot '{bot.name}' set initial D-1 EMA25 stop loss for {symbol} at {d1_ema25}",
-                                                    amount=d1_ema25
-                                                )
-                                                activity_service.log_activity(db, user, activity)
-                                            # --- Place stop loss order on exchange using timeout handler ---
-                                            # Use the trading_service's exchange instance
-                                            exchange = loop.run_until_complete(trading_service.get_exchange_client(connection))
-                                            # Define a get_position_func for this bot position
-                                            def get_position_func(symbol):
-                                                return {'quantity': float(amount_to_trade)}
-                                            # Use the safe wrapper for dynamic stop loss update
-                                            update_result = loop.run_until_complete(safe_dynamic_stoploss_update(
-                                                exchange=exchange,
-                                                session=db,
-                                                symbol=symbol,
-                                                current_stop=0,  # No previous stop for new position
-                                                new_ema_stop=d1_ema25,
-                                                user_id=bot.user_id,
-                                                exchange_conn=connection,
-                                                user=user,
-                                                activity_service=activity_service,
-                                                get_position_func=get_position_func
-                                            ))
-                                            if update_result.get('success'):
-                                                logger.info(f"Cassava bot: Stop loss order created successfully using cancel-and-replace for {symbol}")
-                                            else:
-                                                logger.warning(f"Cassava bot: Stop loss creation failed for {symbol}: {update_result.get('reason')}")
-                            except Exception as sl_error:
-                                logger.error(f"Failed to set initial stop loss for Cassava strategy: {sl_error}")
-                                # Don't fail the trade if stop loss setting fails
-                        
-                except Exception as pos_error:
-                    logger.error(f"Failed to create position record for bot trade: {pos_error}")
-                    logger.error(f"Position creation error details: {type(pos_error).__name__}: {str(pos_error)}")
-                    logger.error(f"Bot trade details - Order ID: {order_result.id}, Symbol: {symbol}, Amount: {amount_to_trade}, Price: {order_result.price}")
-                    # Don't fail the trade if position creation fails, but log the error for investigation
+                                # Get D-1 EMA25 value (second to last row for D-1 data)
+                                ema_exit_period = strategy_service.params.get('ema_exit', 25)
+                                ema_exit_col = f"EMA_{ema_exit_period}"
+                                
+                                if ema_exit_col in market_data.columns:
+                                    d1_ema25 = market_data[ema_exit_col].iloc[-2]  # D-1 EMA25
+                                    if not pd.isna(d1_ema25):
+                                        # Set initial stop loss at D-1 EMA25
+                                        _set_stoploss_level(bot.id, symbol, d1_ema25)
+                                        logger.info("Cassava strategy: Initial stop loss set for %s at D-1 EMA25: %s", symbol, d1_ema25)
+                                        # Log the stop loss setting
+                                        log_stoploss_adjustment(db, bot, symbol, d1_ema25)
+                                        # Log activity for stop loss setting
+                                        if user:
+                                            activity = ActivityCreate(
+                                                type="STOP_LOSS_SET",
+                                                description=f"Bot '{bot.name}' set initial D-1 EMA25 stop loss for {symbol} at {d1_ema25}",
+                                                amount=d1_ema25
+                                            )
+                                            queue_activity(bot.user_id, activity)
+                                        # --- Place stop loss order on exchange using timeout handler ---
+                                        # Use the trading_service's exchange instance
+                                        exchange = run_coroutine(trading_service.get_exchange_client(connection))
+                                        # Define a get_position_func for this bot position
+                                        def get_position_func(symbol):
+                                            return {'quantity': float(amount_to_trade)}
+                                        # Use the safe wrapper for dynamic stop loss update
+                                        update_result = run_coroutine(safe_dynamic_stoploss_update(
+                                            exchange=exchange,
+                                            session=db,
+                                            symbol=symbol,
+                                            current_stop=0,  # No previous stop for new position
+                                            new_ema_stop=d1_ema25,
+                                            user_id=bot.user_id,
+                                            exchange_conn=connection,
+                                            user=user,
+                                            activity_service=activity_service,
+                                            get_position_func=get_position_func
+                                        ))
+                                        if update_result.get('success'):
+                                            logger.info("Cassava bot: Stop loss order created successfully using cancel-and-replace for %s", symbol)
+                                        else:
+                                            logger.warning(f"Cassava bot: Stop loss creation failed for {symbol}: {update_result.get('reason')}")
+                        except Exception as sl_error:
+                            logger.error(f"Failed to set initial stop loss for Cassava strategy: {sl_error}")
+                            # Don't fail the trade if stop loss setting fails
+                    
+            except Exception as pos_error:
+                logger.error(f"Failed to create position record for bot trade: {pos_error}")
+                logger.error(f"Position creation error details: {type(pos_error).__name__}: {str(pos_error)}")
+                logger.error(f"Bot trade details - Order ID: {order_result.id}, Symbol: {symbol}, Amount: {amount_to_trade}, Price: {order_result.price}")
+                # Don't fail the trade if position creation fails, but log the error for investigation
 
-                # Log successful trade activity
-                if user:
-                    status_text = "closed" if order_result.status == "closed" else "open"
-                    activity = ActivityCreate(
-                        type="BOT_TRADE",
-                        description=f"Bot '{bot.name}' successfully executed {bot.trade_type} {order_side.value} of {amount_to_trade:.4f} {symbol.split('/')[0]} at market price ({bot_leverage}x leverage). Status: {status_text} (trade id: {pending_trade.id}, order id: {order_result.id})",
-                        amount=amount_to_trade
-                    )
-                    activity_service.log_activity(db, user, activity)
-                    logger.info(f"Activity logged for successful bot trade: {pending_trade.id}")
+            # Log successful trade activity
+            if user:
+                status_text = "closed" if order_result.status == "closed" else "open"
+                activity = ActivityCreate(
+                    type="BOT_TRADE",
+                    description=f"Bot '{bot.name}' successfully executed {bot.trade_type} {order_side.value} of {amount_to_trade:.4f} {base_asset} at market price ({bot_leverage}x leverage). Status: {status_text} (trade id: {pending_trade.id}, order id: {order_result.id})",
+                    amount=amount_to_trade
+                )
+                queue_activity(bot.user_id, activity)
+                logger.info("Activity logged for successful bot trade: %s", pending_trade.id)
 
-            except Exception as update_error:
-                logger.error(f"Failed to update bot trade record in database: {update_error}")
-                # Don't fail the entire operation if database update fails
-                # The trade was successful on exchange, we just couldn't update our records
+        except Exception as update_error:
+            logger.error(f"Failed to update bot trade record in database: {update_error}")
+            # Don't fail the entire operation if database update fails
+            # The trade was successful on exchange, we just couldn't update our records
 
-            # Update bot's current balance (simplified)
-            bot.current_balance = account_balance
-            db.commit()
-            
-            logger.info(f"Bot trade executed successfully: {order_result.id}")
-            
-        finally:
-            loop.close()
+        # Update bot's current balance (simplified)
+        bot.current_balance = account_balance
+        db.commit()
+        
+        logger.info("Bot trade executed successfully: %s", order_result.id)
 
     except Exception as e:
         logger.error(f"Failed to execute trade for bot {bot.id} on {symbol}: {e}", exc_info=True)
         
-        # Try to update database with failed status if we have a pending trade
+        # Try to update database with failed status for the pending trade
         try:
-            if 'pending_trade' in locals():
-                pending_trade.status = OrderStatus.REJECTED.value
-                db.commit()
-                
-                # Log failed trade activity
-                user = db.query(User).filter(User.id == bot.user_id).first()
-                if user:
-                    activity = ActivityCreate(
-                        type="BOT_TRADE_FAILED",
-                        description=f"Bot '{bot.name}' failed to execute {signal.value} trade for {symbol}. Error: {e} (trade id: {pending_trade.id})",
-                        amount=None
-                    )
-                    activity_service.log_activity(db, user, activity)
+            db.rollback()
+            pending_trade.status = OrderStatus.REJECTED.value
+            db.commit()
+            
+            # Log failed trade activity
+            if user:
+                activity = ActivityCreate(
+                    type="BOT_TRADE_FAILED",
+                    description=f"Bot '{bot.name}' failed to execute {signal.value} trade for {symbol}. Error: {e} (trade id: {pending_trade.id})",
+                    amount=None
+                )
+                queue_activity(bot.user_id, activity)
         except Exception as update_error:
             logger.error(f"Failed to update failed bot trade record: {update_error}")
         
         # Also log the general error
-        user = db.query(User).filter(User.id == bot.user_id).first()
         if user:
             activity = ActivityCreate(
                 type="error",
                 description=f"Bot '{bot.name}' failed to execute {signal.value} trade for {symbol}: {e}",
                 amount=None
             )
-            activity_service.log_activity(db, user, activity)
-
-def _execute_strategy(bot: Bot, market_data: pd.DataFrame, current_price: float, stop_loss_manager: StopLossManager) -> Dict[str, Any]:
-    """Execute the trading strategy and return signals"""
-    try:
-        # Get latest market data
-        latest_data = market_data.tail(20)  # Last 20 periods
-        
-        # Calculate basic indicators
-        sma_20 = latest_data['close'].rolling(window=20).mean().iloc[-1]
-        sma_50 = latest_data['close'].rolling(window=50).mean().iloc[-1]
-        rsi = latest_data['rsi'].iloc[-1] if 'rsi' in latest_data.columns else 50
-        
-        # Simple strategy logic (can be enhanced)
-        should_trade = False
-        trade_type = None
-        trade_size = 0
-        
-        if bot.strategy_name == "simple_strategy":
-            # Simple moving average crossover strategy
-            if sma_20 > sma_50 and rsi < 70:  # Bullish signal
-                should_trade = True
-                trade_type = "long"
-            elif sma_20 < sma_50 and rsi > 30:  # Bearish signal
-                should_trade = True
-                trade_type = "short"
-            
-            if should_trade:
-                # Calculate position size based on bot's risk settings
-                trade_size = min(bot.current_balance * (bot.max_position_size_percent / 100), 100)
-        
-        return {
-            "should_trade": should_trade,
-            "trade_type": trade_type,
-            "trade_size": trade_size,
-            "indicators": {
-                "sma_20": sma_20,
-                "sma_50": sma_50,
-                "rsi": rsi,
-                "current_price": current_price
-            }
-        }
-        
-    except Exception as e:
-        logger.error(f"Error executing strategy: {e}")
-        return {"should_trade": False, "error": str(e)}
-
-def _execute_stop_loss(db: Session, bot: Bot, current_price: float, stop_loss_results: Dict[str, Any]) -> Dict[str, Any]:
-    """Execute stop loss order"""
-    try:
-        # Simulate stop loss execution
-        logger.info(f"Executing stop loss for bot {bot.id} at price {current_price}")
-        
-        # Update bot status (stop trading)
-        bot.is_active = False
-        db.commit()
-        
-        return {
-            "success": True,
-            "stop_loss_triggered": True,
-            "price": current_price,
-            "stop_loss_info": stop_loss_results
-        }
-        
-    except Exception as e:
-        logger.error(f"Error executing stop loss: {e}")
-        db.rollback()
-        return {"success": False, "error": str(e)}
-
-def _log_activity(db: Session, bot: Bot, activity_type: str, details: Dict[str, Any]):
-    """Log trading activity"""
-    try:
-        description = f"{activity_type.replace('_', ' ').title()}: {details}"
-        
-        activity = Activity(
-            user_id=bot.user_id,
-            bot_id=bot.id,
-            type=activity_type,
-            description=description,
-            pnl=details.get('pnl'),
-            amount=details.get('size')
-        )
-        
-        db.add(activity)
-        db.commit()
-    except Exception as e:
-        logger.error(f"Error logging activity for bot {bot.id}: {e}")
-        db.rollback() 
+            queue_activity(bot.user_id, activity)
 
 def log_stoploss_adjustment(db, bot, symbol, new_stoploss):
-    user = db.query(User).filter(User.id == bot.user_id).first()
+    # Only the owner's id is needed, and it is already on the bot
     activity = ActivityCreate(
         type="stoploss_adjusted",
         description=f"Stoploss for {symbol} adjusted to {new_stoploss}",
         amount=new_stoploss
     )
-    activity_service.log_activity(db, user, activity) 
+    queue_activity(bot.user_id, activity, bot_id=bot.id)
 
 @celery_app.task(name="tasks.retry_stop_loss_order")
 def retry_stop_loss_order(trade_id: int):
@@ -918,12 +1213,12 @@ def retry_stop_loss_order(trade_id: int):
             stop_loss_price = original_trade.stop_loss if original_trade.stop_loss else trade.price
             logger.info(f"Using stop loss price: {stop_loss_price} from original trade {original_trade.id}")
             # Get exchange instance
-            exchange = asyncio.run(trading_service.get_exchange(conn.exchange_name))
+            exchange = run_coroutine(trading_service.get_exchange(conn.exchange_name))
             # Define a get_position_func for this trade
             def get_position_func(symbol):
                 return {'quantity': float(trade.quantity)}
             # Use the safe wrapper for dynamic stop loss update
-            update_result = asyncio.run(safe_dynamic_stoploss_update(
+            update_result = run_coroutine(safe_dynamic_stoploss_update(
                 exchange=exchange,
                 session=db,
                 symbol=trade.symbol,
@@ -952,7 +1247,7 @@ def retry_stop_loss_order(trade_id: int):
                 else:
                     trade.stop_loss_failed = True
                     db.commit()
-                    asyncio.run(_close_trade_after_failed_stop_loss(db, trade, user))
+                    run_coroutine(_close_trade_after_failed_stop_loss(db, trade, user))
                 logger.warning(f"Stop loss retry failed for trade {trade.id}: {update_result.get('reason')}")
                 return
 
@@ -966,7 +1261,7 @@ def retry_stop_loss_order(trade_id: int):
             else:
                 trade.stop_loss_failed = True
                 db.commit()
-                asyncio.run(_close_trade_after_failed_stop_loss(db, trade, user))
+                run_coroutine(_close_trade_after_failed_stop_loss(db, trade, user))
     except Exception as outer_e:
         logger.error(f"Error in retry_stop_loss_order for trade {trade_id}: {outer_e}")
     finally:
@@ -979,13 +1274,13 @@ async def _close_trade_after_failed_stop_loss(db: Session, trade: Trade, user: U
         if not conn:
             raise Exception("Exchange connection not found for closing trade")
         exchange_service = ExchangeService(db)
-        exchange = asyncio.run(exchange_service.get_exchange_client_for_user(trade.user_id, conn.exchange_name))
-        close_order = asyncio.run(exchange.create_order(
+        exchange = await exchange_service.get_exchange_client_for_user(trade.user_id, conn.exchange_name)
+        close_order = await exchange.create_order(
             symbol=trade.symbol,
             order_type="market",
             side="sell" if trade.side == "buy" else "buy",
             amount=trade.quantity
-        ))
+        )
         trade.status = OrderStatus.FILLED.value
         trade.exchange_order_id = str(close_order.id)
         db.commit()
@@ -995,7 +1290,7 @@ async def _close_trade_after_failed_stop_loss(db: Session, trade: Trade, user: U
                 description=f"Closed trade {trade.id} after stop loss failed 5 times (order id: {close_order.id})",
                 amount=trade.quantity
             )
-            activity_service.log_activity(db, user, activity_data)
+            queue_activity(trade.user_id, activity_data, bot_id=trade.bot_id)
     except Exception as close_e:
         logger.error(f"Failed to close trade {trade.id} after stop loss retries: {close_e}")
 
@@ -1022,12 +1317,13 @@ def sweep_and_close_failed_stop_loss_trades():
         ).all()
         for trade in open_trades:
             try:
-                conn = db.query(ExchangeConnection).filter(ExchangeConnection.id == trade.exchange_connection_id).first()
+                # Identity-map hit for connections already loaded this run
+                conn = db.get(ExchangeConnection, trade.exchange_connection_id)
                 if not conn:
                     continue
                 exchange_service = ExchangeService(db)
-                exchange = asyncio.run(exchange_service.get_exchange_client_for_user(trade.user_id, conn.exchange_name))
-                close_order = asyncio.run(exchange.create_order(
+                exchange = run_coroutine(exchange_service.get_exchange_client_for_user(trade.user_id, conn.exchange_name))
+                close_order = run_coroutine(exchange.create_order(
                     symbol=trade.symbol,
                     order_type="market",
                     side="sell" if trade.side == "buy" else "buy",
@@ -1036,14 +1332,12 @@ def sweep_and_close_failed_stop_loss_trades():
                 trade.status = OrderStatus.FILLED.value
                 trade.exchange_order_id = str(close_order.id)
                 db.commit()
-                user = db.query(User).filter(User.id == trade.user_id).first()
-                if user:
-                    activity_data = ActivityCreate(
-                        type="STOP_LOSS_SWEEP_CLOSE_TRADE",
-                        description=f"Hourly sweep closed trade {trade.id} (order id: {close_order.id})",
-                        amount=trade.quantity
-                    )
-                    activity_service.log_activity(db, user, activity_data)
+                activity_data = ActivityCreate(
+                    type="STOP_LOSS_SWEEP_CLOSE_TRADE",
+                    description=f"Hourly sweep closed trade {trade.id} (order id: {close_order.id})",
+                    amount=trade.quantity
+                )
+                queue_activity(trade.user_id, activity_data, bot_id=trade.bot_id)
             except Exception as e:
                 logger.error(f"Hourly sweep: Failed to close trade {trade.id}: {e}")
     except Exception as outer_e:
@@ -1054,7 +1348,6 @@ def sweep_and_close_failed_stop_loss_trades():
 @celery_app.task(name="tasks.create_missing_stop_losses")
 def create_missing_stop_losses():
     """Create stop loss orders for filled trades that don't have them"""
-    import logging
     db: Session = SessionLocal()
     try:
         # Find filled buy trades from the last 24 hours that don't have corresponding stop losses
@@ -1087,13 +1380,15 @@ def create_missing_stop_losses():
                 
             # Create stop loss order using robust timeout handler
             try:
-                conn = db.query(ExchangeConnection).filter(ExchangeConnection.id == trade.exchange_connection_id).first()
+                # Identity-map hit for connections already loaded this run
+                conn = db.get(ExchangeConnection, trade.exchange_connection_id)
                 if not conn:
                     logger.error(f"Exchange connection {trade.exchange_connection_id} not found for trade {trade.id}")
                     continue
                 
-                # Get the user
-                user = db.query(User).filter(User.id == trade.user_id).first()
+                # Get the user; Session.get answers from the identity map once a
+                # user has been loaded, so their other trades cost no query
+                user = db.get(User, trade.user_id)
                 if not user:
                     logger.error(f"User {trade.user_id} not found for trade {trade.id}")
                     continue
@@ -1126,7 +1421,7 @@ def create_missing_stop_losses():
                 )
                 
                 # Use the robust timeout handler to create stop loss order
-                stop_loss_order = asyncio.run(create_stop_loss_safe(
+                stop_loss_order = run_coroutine(create_stop_loss_safe(
                     trade_order, 
                     trade.user_id, 
                     conn, 
@@ -162,6 +162,13 @@ class TradingService:
         
         return None
     
+    async def get_tickers(self, symbols: List[str], exchange_name: str) -> Dict[str, Ticker]:
+        """Get tickers for several symbols from specified exchange in a single request"""
+        exchange = await self.get_exchange(exchange_name)
+        if exchange:
+            return await exchange.get_tickers(symbols)
+        return {}
+    
     async def get_order_book(self, symbol: str, exchange_name: str, limit: int = 20) -> Optional[OrderBook]:
         """Get order book for a symbol from specified exchange"""
         exchange = await self.get_exchange(exchange_name)
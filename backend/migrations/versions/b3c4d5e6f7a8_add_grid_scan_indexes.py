@@ -0,0 +1,30 @@
+"""add indexes for grid trading scans
+
+Revision ID: b3c4d5e6f7a8
+Revises: 9a8b7c6d5e4f
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3c4d5e6f7a8'
+down_revision: Union[str, Sequence[str], None] = '9a8b7c6d5e4f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_trades_bot_id_created_at', 'trades', ['bot_id', 'created_at'], unique=False)
+    op.create_index('ix_bots_strategy_active_updated', 'bots', ['strategy_name', 'is_active', 'updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_bots_strategy_active_updated', table_name='bots')
+    op.drop_index('ix_trades_bot_id_created_at', table_name='trades')
@@ -0,0 +1,38 @@
+"""unique performance record per user per day
+
+Revision ID: c4d5e6f7a8b9
+Revises: b3c4d5e6f7a8
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d5e6f7a8b9'
+down_revision: Union[str, Sequence[str], None] = 'b3c4d5e6f7a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep only the newest record for each (user_id, date) before enforcing uniqueness
+    op.execute(
+        """
+        DELETE FROM performance_records pr
+        USING performance_records newer
+        WHERE pr.user_id = newer.user_id
+          AND pr.date = newer.date
+          AND pr.id < newer.id
+        """
+    )
+    op.create_unique_constraint('uq_performance_records_user_id_date', 'performance_records', ['user_id', 'date'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_performance_records_user_id_date', 'performance_records', type_='unique')
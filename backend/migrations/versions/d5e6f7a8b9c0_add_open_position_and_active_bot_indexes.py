@@ -0,0 +1,36 @@
+"""add partial indexes for open positions and active bots
+
+Revision ID: d5e6f7a8b9c0
+Revises: c4d5e6f7a8b9
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5e6f7a8b9c0'
+down_revision: Union[str, Sequence[str], None] = 'c4d5e6f7a8b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_positions_bot_open_symbol', 'positions', ['bot_id', 'is_open', 'symbol'],
+        unique=False, postgresql_where=sa.text('is_open = true')
+    )
+    op.create_index(
+        'ix_bots_is_active', 'bots', ['is_active'],
+        unique=False, postgresql_where=sa.text('is_active = true')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_bots_is_active', table_name='bots')
+    op.drop_index('ix_positions_bot_open_symbol', table_name='positions')
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Tests for the redbeat trading tick scheduling and the per-bot tick lock
+Run with: python -m pytest test_trading_bot_ticks.py
+"""
+
+import sys
+import os
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Add the app directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from app.tasks import trading_tasks
+from app.tasks.trading_tasks import (
+    CASSAVA_TICK_INTERVAL_SECONDS,
+    schedule_trading_bot,
+    tick_trading_bot,
+    unschedule_trading_bot,
+)
+
+
+def _bot(bot_id=7, strategy_name="sma_cross", trade_interval_seconds=60, is_active=True):
+    return SimpleNamespace(
+        id=bot_id,
+        strategy_name=strategy_name,
+        trade_interval_seconds=trade_interval_seconds,
+        is_active=is_active,
+        exchange_connection=MagicMock(),
+        user=MagicMock(),
+    )
+
+
+@pytest.fixture
+def db():
+    session = MagicMock()
+    with patch.object(trading_tasks, "get_db", return_value=iter([session])):
+        yield session
+
+
+@pytest.fixture
+def redbeat_entry():
+    with patch.object(trading_tasks, "RedBeatSchedulerEntry") as entry:
+        yield entry
+
+
+def test_schedule_trading_bot_saves_redbeat_entry(redbeat_entry):
+    schedule_trading_bot(_bot(trade_interval_seconds=90))
+
+    kwargs = redbeat_entry.call_args.kwargs
+    assert kwargs["name"] == "trading-bot-tick:7"
+    assert kwargs["task"] == "tasks.tick_trading_bot"
+    assert kwargs["args"] == [7]
+    assert kwargs["schedule"].run_every == timedelta(seconds=90)
+    redbeat_entry.return_value.save.assert_called_once_with()
+
+
+def test_schedule_trading_bot_uses_cassava_interval(redbeat_entry):
+    schedule_trading_bot(_bot(strategy_name="cassava_trend_following", trade_interval_seconds=90))
+
+    schedule = redbeat_entry.call_args.kwargs["schedule"]
+    assert schedule.run_every == timedelta(seconds=CASSAVA_TICK_INTERVAL_SECONDS)
+
+
+def test_unschedule_trading_bot_deletes_entry_and_stop_losses(redbeat_entry):
+    trading_tasks._bot_stop_losses[7] = ((), {})
+
+    unschedule_trading_bot(7)
+
+    assert redbeat_entry.call_args.kwargs["name"] == "trading-bot-tick:7"
+    redbeat_entry.return_value.delete.assert_called_once_with()
+    assert 7 not in trading_tasks._bot_stop_losses
+
+
+def test_unschedule_trading_bot_ignores_delete_errors(redbeat_entry):
+    redbeat_entry.return_value.delete.side_effect = KeyError("trading-bot-tick:7")
+    trading_tasks._bot_stop_losses[7] = ((), {})
+
+    unschedule_trading_bot(7)
+
+    assert 7 not in trading_tasks._bot_stop_losses
+
+
+@pytest.mark.parametrize("bot", [None, _bot(is_active=False)])
+def test_tick_unschedules_missing_or_inactive_bot(db, bot):
+    with patch.object(trading_tasks, "_load_trading_bot", return_value=bot), \
+            patch.object(trading_tasks, "unschedule_trading_bot") as unschedule, \
+            patch.object(trading_tasks, "_run_trading_tick") as run_tick:
+        tick_trading_bot(7)
+
+    unschedule.assert_called_once_with(7)
+    run_tick.assert_not_called()
+    db.close.assert_called_once_with()
+
+
+def test_tick_skips_when_lock_is_held(db):
+    with patch.object(trading_tasks, "_load_trading_bot", return_value=_bot()), \
+            patch.object(trading_tasks, "_ensure_exchange_connection", return_value=True), \
+            patch.object(trading_tasks, "cache_client") as cache, \
+            patch.object(trading_tasks, "_run_trading_tick") as run_tick:
+        cache.set_if_absent.return_value = False
+        tick_trading_bot(7)
+
+    cache.set_if_absent.assert_called_once_with(
+        trading_tasks.get_cache_key_for_bot_tick_lock(7), 1, ttl_seconds=60
+    )
+    run_tick.assert_not_called()
+    cache.delete.assert_not_called()
+
+
+def test_tick_runs_and_releases_lock(db):
+    with patch.object(trading_tasks, "_load_trading_bot", return_value=_bot()), \
+            patch.object(trading_tasks, "_ensure_exchange_connection", return_value=True), \
+            patch.object(trading_tasks, "_build_strategy_service"), \
+            patch.object(trading_tasks, "cache_client") as cache, \
+            patch.object(trading_tasks, "_run_trading_tick") as run_tick:
+        cache.set_if_absent.return_value = True
+        tick_trading_bot(7)
+
+    run_tick.assert_called_once()
+    cache.delete.assert_called_once_with(trading_tasks.get_cache_key_for_bot_tick_lock(7))
+
+
+def test_tick_releases_lock_when_tick_fails(db):
+    with patch.object(trading_tasks, "_load_trading_bot", return_value=_bot()), \
+            patch.object(trading_tasks, "_ensure_exchange_connection", return_value=True), \
+            patch.object(trading_tasks, "_build_strategy_service"), \
+            patch.object(trading_tasks, "cache_client") as cache, \
+            patch.object(trading_tasks, "unschedule_trading_bot") as unschedule, \
+            patch.object(trading_tasks, "_run_trading_tick", side_effect=RuntimeError("exchange down")):
+        cache.set_if_absent.return_value = True
+        tick_trading_bot(7)
+
+    cache.delete.assert_called_once_with(trading_tasks.get_cache_key_for_bot_tick_lock(7))
+    # A fatal tick error still stops the bot
+    unschedule.assert_called_once_with(7)
+    db.commit.assert_called_once_with()
+
+
+def test_generate_signal_carries_crossover_state_between_ticks():
+    pending = {'type': 'LONG', 'bar_index': 98}
+    strategy_service = MagicMock()
+
+    def generate_signal(symbol):
+        # The pending crossover is visible to the strategy, which then resolves it
+        assert strategy_service.crossover_state == pending
+        strategy_service.crossover_state = {'type': None, 'bar_index': -1}
+        return trading_tasks.Signal.BUY
+
+    strategy_service.generate_signal.side_effect = generate_signal
+    with patch.object(trading_tasks, "_build_strategy_service", return_value=strategy_service), \
+            patch.object(trading_tasks, "_get_crossover_state", return_value=dict(pending)), \
+            patch.object(trading_tasks, "_set_crossover_state") as set_state:
+        signal = trading_tasks._generate_signal(MagicMock(), _bot(), "BTC/USDT")
+
+    assert signal == trading_tasks.Signal.BUY
+    set_state.assert_called_once_with(7, "BTC/USDT", {'type': None, 'bar_index': -1})